@@ -0,0 +1,130 @@
+"""
+Benchmark UserFieldRanking recomputation.
+
+Usage:
+    python manage.py bench_field_rankings
+    python manage.py bench_field_rankings --posts 10000 100000 --users 5000 --legacy-max 10000
+
+Compares the original per-post loop with the grouped-aggregate rewrite in
+core.rankings.calculate_rankings. Everything runs inside a
+transaction that is rolled back at the end.
+"""
+
+import random
+import time
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from core.models_extended import UserFieldRanking
+from core.rankings import RANKING_FIELDS, RANKING_PERIODS, calculate_rankings
+from posts.models import Post
+
+User = get_user_model()
+
+INSERT_BATCH_SIZE = 5000
+
+
+def legacy_calculate_field_period_ranking(field, period):
+    """The original per-post loop, kept here only for comparison."""
+    now = timezone.now()
+    if period == 'weekly':
+        start_date = now - timedelta(days=7)
+    elif period == 'monthly':
+        start_date = now - timedelta(days=30)
+    else:
+        start_date = None
+
+    posts_query = Post.objects.filter(category=field)
+    if start_date:
+        posts_query = posts_query.filter(created_at__gte=start_date)
+
+    user_scores = {}
+    for post in posts_query:
+        author = post.user
+        score = (post.like_count * 2) + (post.comment_count * 1)
+        if author not in user_scores:
+            user_scores[author] = 0
+        user_scores[author] += score
+
+    sorted_users = sorted(user_scores.items(), key=lambda x: x[1], reverse=True)
+    for rank, (user, score) in enumerate(sorted_users, 1):
+        UserFieldRanking.objects.update_or_create(
+            user=user, field=field, period=period, defaults={'rank': rank, 'score': score}
+        )
+
+
+def legacy_calculate_all_rankings():
+    for field in RANKING_FIELDS:
+        for period in RANKING_PERIODS:
+            legacy_calculate_field_period_ranking(field, period)
+
+
+class Command(BaseCommand):
+    help = 'Benchmark the per-post and grouped-aggregate UserFieldRanking calculations.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--posts', type=int, nargs='+', default=[10_000, 100_000],
+            help='Number of synthetic posts to benchmark with.',
+        )
+        parser.add_argument('--users', type=int, default=5_000)
+        parser.add_argument(
+            '--legacy-max', type=int, default=100_000,
+            help='Skip the per-post loop above this many posts.',
+        )
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        strategies = [
+            ('per-post loop', legacy_calculate_all_rankings),
+            ('grouped upsert', lambda: calculate_rankings(RANKING_FIELDS, RANKING_PERIODS)),
+        ]
+
+        for posts in options['posts']:
+            with transaction.atomic():
+                self._populate(posts, options['users'], rng)
+                for name, strategy in strategies:
+                    if strategy is legacy_calculate_all_rankings and posts > options['legacy_max']:
+                        self.stdout.write(f'{posts:>9} posts  {name:<15} skipped')
+                        continue
+                    UserFieldRanking.objects.all().delete()
+                    started = time.perf_counter()
+                    strategy()
+                    elapsed = time.perf_counter() - started
+                    self.stdout.write(
+                        f'{posts:>9} posts  {name:<15} {elapsed:8.3f}s  '
+                        f'({UserFieldRanking.objects.count()} ranking rows)'
+                    )
+                transaction.set_rollback(True)
+
+    def _populate(self, posts, user_count, rng):
+        users = User.objects.bulk_create([
+            User(
+                username=f'bench_field_{i}',
+                email=f'bench_field_{i}@example.edu',
+                password='!',
+                field_of_interest=rng.choice(RANKING_FIELDS),
+            )
+            for i in range(user_count)
+        ], batch_size=INSERT_BATCH_SIZE)
+        now = timezone.now()
+        for start in range(0, posts, INSERT_BATCH_SIZE):
+            created = Post.objects.bulk_create([
+                Post(
+                    user=rng.choice(users),
+                    title=f'Bench post {i}',
+                    category=rng.choice(RANKING_FIELDS),
+                    like_count=rng.randint(0, 50),
+                    comment_count=rng.randint(0, 20),
+                )
+                for i in range(start, min(start + INSERT_BATCH_SIZE, posts))
+            ])
+            # Spread posts over the last 60 days so every period has data.
+            for post in created:
+                post.created_at = now - timedelta(days=rng.uniform(0, 60))
+            Post.objects.bulk_update(created, ['created_at'], batch_size=INSERT_BATCH_SIZE)
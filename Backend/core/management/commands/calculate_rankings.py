@@ -0,0 +1,41 @@
+"""
+Recalculate UserFieldRanking directly, without going through a job.
+
+Usage:
+    python manage.py calculate_rankings                 # full recompute (nightly)
+    python manage.py calculate_rankings --incremental   # changed users only (hourly)
+
+See core/rankings.py for what the incremental mode does and does not cover.
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.rankings import calculate_all_rankings, calculate_rankings_incremental
+
+
+class Command(BaseCommand):
+    help = 'Recalculate user field rankings, fully or for changed users only.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--incremental', action='store_true',
+            help='Only rescore users with changes since the last successful run.',
+        )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        if options['incremental']:
+            result = calculate_rankings_incremental()
+        else:
+            result = {'mode': 'full', 'users': None, 'partitions': None,
+                      'rows_written': calculate_all_rankings()}
+        elapsed = time.perf_counter() - started
+
+        scope = ''
+        if result['users'] is not None:
+            scope = f", {result['users']} users, {result['partitions']} partitions"
+        self.stdout.write(
+            f"{result['mode']}: wrote {result['rows_written']} rows{scope} in {elapsed:.2f}s"
+        )
@@ -0,0 +1,46 @@
+"""
+Execute queued ranking jobs.
+
+Usage:
+    python manage.py run_ranking_jobs                 # run queued jobs and exit
+    python manage.py run_ranking_jobs --loop          # keep polling
+    python manage.py run_ranking_jobs --loop --sleep 10
+
+Jobs are queued by POST /api/rankings/calculate/; see core/ranking_jobs.py.
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from core.ranking_jobs import claim_next_job, run_job
+
+
+class Command(BaseCommand):
+    help = 'Run queued UserFieldRanking recalculation jobs.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true', help='Keep polling until interrupted.')
+        parser.add_argument(
+            '--sleep', type=float, default=5.0,
+            help='Seconds to wait when no job is queued in --loop mode.',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            while True:
+                close_old_connections()
+                job = claim_next_job()
+                if job is not None:
+                    job = run_job(job)
+                    self.stdout.write(
+                        f"Job {job.id} {job.status}: {job.fields_done}/{job.fields_total} fields, "
+                        f"{job.rows_written} rows in {job.elapsed_seconds}s"
+                    )
+                    continue
+                if not options['loop']:
+                    break
+                time.sleep(options['sleep'])
+        except KeyboardInterrupt:
+            pass
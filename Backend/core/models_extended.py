@@ -58,3 +58,91 @@ class Endorsement(models.Model):
     
     def __str__(self):
         return f"{self.endorser.username} endorsed {self.endorsed_user.username} for {self.skill}"
+
+
+class RankingJob(models.Model):
+    """
+    A queued or running UserFieldRanking recalculation.
+
+    Created by ``POST /api/rankings/calculate/`` and executed by
+    ``manage.py run_ranking_jobs``. At most one job is queued or running at a
+    time; further requests are folded into it.
+    """
+    
+    STATUS_QUEUED = 'queued'
+    STATUS_RUNNING = 'running'
+    STATUS_SUCCEEDED = 'succeeded'
+    STATUS_FAILED = 'failed'
+    
+    STATUS_CHOICES = [
+        (STATUS_QUEUED, 'Queued'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_SUCCEEDED, 'Succeeded'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+    ACTIVE_STATUSES = [STATUS_QUEUED, STATUS_RUNNING]
+    
+    MODE_FULL = 'full'
+    MODE_INCREMENTAL = 'incremental'
+    MODE_CHOICES = [
+        (MODE_FULL, 'Full recompute'),
+        (MODE_INCREMENTAL, 'Changed users only'),
+    ]
+    
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_QUEUED)
+    mode = models.CharField(max_length=20, choices=MODE_CHOICES, default=MODE_FULL)
+    # Constant for now; lets the unique constraint below allow one active job.
+    scope = models.CharField(max_length=20, default='all')
+    requested_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True,
+        related_name='ranking_jobs'
+    )
+    fields_total = models.PositiveIntegerField(default=0)
+    fields_done = models.PositiveIntegerField(default=0)
+    rows_written = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True)
+    worker = models.CharField(max_length=100, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        ordering = ['-created_at']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['scope'],
+                condition=models.Q(status__in=['queued', 'running']),
+                name='core_one_active_ranking_job',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['status', 'created_at']),
+        ]
+    
+    def __str__(self):
+        return f"Ranking job {self.id} ({self.status})"
+    
+    @property
+    def elapsed_seconds(self):
+        """Seconds spent running so far, or in total once finished."""
+        if not self.started_at:
+            return 0.0
+        end = self.finished_at or timezone.now()
+        return round((end - self.started_at).total_seconds(), 3)
+
+
+class RankingCheckpoint(models.Model):
+    """
+    High-water mark for incremental UserFieldRanking updates.
+
+    ``high_water`` is the start time of the last successful run; the next
+    incremental run only looks at posts, likes and comments changed since.
+    """
+    
+    name = models.CharField(max_length=50, unique=True)
+    high_water = models.DateTimeField()
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"{self.name} @ {self.high_water}"
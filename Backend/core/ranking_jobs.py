@@ -0,0 +1,140 @@
+"""
+Background execution of UserFieldRanking recalculations.
+
+``POST /api/rankings/calculate/`` only records a RankingJob; the
+``run_ranking_jobs`` management command picks queued jobs up and runs them
+field by field, saving progress after each field so ``GET
+/api/rankings/jobs/<id>/`` can report it.
+
+A partial unique constraint allows a single queued-or-running job, so
+concurrent requests all receive the same job.
+"""
+
+import logging
+import os
+import socket
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .models_extended import RankingJob
+from .rankings import (
+    RANKING_FIELDS,
+    RANKING_PERIODS,
+    calculate_rankings,
+    calculate_rankings_incremental,
+    set_high_water_mark,
+)
+
+logger = logging.getLogger(__name__)
+
+# A running job whose worker has not reported for this long is presumed dead.
+STALE_AFTER = timedelta(minutes=10)
+
+# Tries at inserting a job when the one we collided with keeps finishing first.
+ENQUEUE_ATTEMPTS = 3
+
+
+def enqueue_ranking_job(user=None, mode=RankingJob.MODE_FULL):
+    """
+    Queue a ranking recalculation unless one is already active.
+
+    Args:
+        user: User requesting the job, if any
+        mode: RankingJob.MODE_FULL or RankingJob.MODE_INCREMENTAL
+
+    Returns:
+        Tuple of (job, created)
+    """
+    requested_by = user if user is not None and user.is_authenticated else None
+    for attempt in range(ENQUEUE_ATTEMPTS):
+        try:
+            with transaction.atomic():
+                return RankingJob.objects.create(
+                    requested_by=requested_by,
+                    mode=mode,
+                    fields_total=len(RANKING_FIELDS) if mode == RankingJob.MODE_FULL else 1
+                ), True
+        except IntegrityError:
+            job = RankingJob.objects.filter(
+                scope='all', status__in=RankingJob.ACTIVE_STATUSES
+            ).first()
+            if job is not None:
+                return job, False
+            # The active job finished between our insert and this read.
+            if attempt == ENQUEUE_ATTEMPTS - 1:
+                raise
+
+
+def fail_stale_jobs(now=None):
+    """Mark running jobs whose worker stopped reporting as failed."""
+    now = now or timezone.now()
+    return RankingJob.objects.filter(
+        status=RankingJob.STATUS_RUNNING,
+        heartbeat_at__lt=now - STALE_AFTER
+    ).update(
+        status=RankingJob.STATUS_FAILED,
+        error='Worker stopped reporting progress',
+        finished_at=now
+    )
+
+
+def claim_next_job(worker=None):
+    """
+    Move the oldest queued job to running for this worker.
+
+    Returns:
+        The claimed RankingJob, or None if nothing is queued
+    """
+    worker = worker or f"{socket.gethostname()}:{os.getpid()}"
+    fail_stale_jobs()
+    job = RankingJob.objects.filter(status=RankingJob.STATUS_QUEUED).order_by('created_at').first()
+    if job is None:
+        return None
+
+    now = timezone.now()
+    claimed = RankingJob.objects.filter(id=job.id, status=RankingJob.STATUS_QUEUED).update(
+        status=RankingJob.STATUS_RUNNING,
+        worker=worker,
+        started_at=now,
+        heartbeat_at=now
+    )
+    if not claimed:
+        # Another worker got there first.
+        return None
+    job.refresh_from_db()
+    return job
+
+
+def _record_progress(job, written):
+    job.fields_done += 1
+    job.rows_written += written
+    job.heartbeat_at = timezone.now()
+    job.save(update_fields=['fields_done', 'rows_written', 'heartbeat_at'])
+
+
+def run_job(job):
+    """
+    Execute ``job``, recording progress per field for full recomputes.
+
+    Returns:
+        The finished RankingJob
+    """
+    try:
+        if job.mode == RankingJob.MODE_INCREMENTAL:
+            result = calculate_rankings_incremental()
+            _record_progress(job, result['rows_written'])
+        else:
+            started = timezone.now()
+            for field in RANKING_FIELDS:
+                _record_progress(job, calculate_rankings([field], RANKING_PERIODS))
+            set_high_water_mark(started)
+        job.status = RankingJob.STATUS_SUCCEEDED
+    except Exception as e:
+        logger.exception('Ranking job %s failed', job.id)
+        job.status = RankingJob.STATUS_FAILED
+        job.error = str(e)
+    job.finished_at = timezone.now()
+    job.save(update_fields=['status', 'error', 'finished_at'])
+    return job
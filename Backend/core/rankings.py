@@ -0,0 +1,255 @@
+"""
+UserFieldRanking calculation.
+
+Scores come from one grouped aggregate over Post, weighting likes and
+comments with the leaderboard scoring config (engagement.leaderboard_scoring),
+and are written with a single bulk upsert per run.
+
+Two modes:
+
+- full (``calculate_all_rankings``): recompute every (field, period);
+  run nightly as the safety net.
+- incremental (``calculate_rankings_incremental``): recompute only users
+  with posts, likes or comments changed since the last run, plus users
+  whose posts just left the weekly/monthly window, then re-rank only the
+  (field, period) partitions they appear in.
+
+Changes that leave no timestamp behind (a deleted like, comment or post)
+are only picked up by the next full run.
+
+Every (field, period) partition a run writes gets its version bumped (see
+engagement.leaderboard_snapshots) once the run commits, which is what the
+``/api/rankings/`` ETag is derived from.
+"""
+
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+from django.utils import timezone
+
+from .models_extended import RankingCheckpoint, UserFieldRanking
+from engagement.leaderboard_scoring import get_weights
+from engagement.leaderboard_snapshots import bump_scopes
+from engagement.models import Like, Comment
+from posts.models import Post
+
+
+RANKING_FIELDS = ['academics', 'sports', 'music', 'dance', 'tech', 'arts']
+RANKING_PERIODS = ['weekly', 'monthly', 'all_time']
+PERIOD_DAYS = {'weekly': 7, 'monthly': 30, 'all_time': None}
+RANKING_BATCH_SIZE = 1000
+CHECKPOINT_NAME = 'user_field_rankings'
+
+
+def ranking_scope(field, period):
+    """Return the version scope covering one (field, period) ranking."""
+    return f'ranking:{field}:{period}'
+
+
+def get_high_water_mark():
+    """Return when the last successful ranking run started, or None."""
+    return RankingCheckpoint.objects.filter(name=CHECKPOINT_NAME).values_list(
+        'high_water', flat=True
+    ).first()
+
+
+def set_high_water_mark(started):
+    """Record that rankings are complete as of ``started``."""
+    RankingCheckpoint.objects.update_or_create(
+        name=CHECKPOINT_NAME, defaults={'high_water': started}
+    )
+
+
+def calculate_all_rankings():
+    """Calculate rankings for all users in all fields."""
+    started = timezone.now()
+    written = calculate_rankings(RANKING_FIELDS, RANKING_PERIODS)
+    set_high_water_mark(started)
+    return written
+
+
+def calculate_field_period_ranking(field, period):
+    """Calculate ranking for a specific field and period."""
+    return calculate_rankings([field], [period])
+
+
+def aggregate_period_scores(fields, periods, now=None, user_ids=None):
+    """
+    Sum post scores per (field, period, user) in one grouped query.
+
+    Score calculation: like and comment counts times the scoring config's
+    like and comment weights. A user takes part in a period if they have
+    at least one post in it, even with a score of 0.
+
+    Returns:
+        Dictionary of (field, period) -> {user_id: score}
+    """
+    now = now or timezone.now()
+    weights = get_weights()
+    points = F('like_count') * weights['like'] + F('comment_count') * weights['comment']
+    annotations = {}
+    for period in periods:
+        days = PERIOD_DAYS[period]
+        in_period = Q(created_at__gte=now - timedelta(days=days)) if days else None
+        annotations[f'{period}_score'] = Sum(points, filter=in_period)
+        annotations[f'{period}_posts'] = Count('id', filter=in_period)
+
+    posts = Post.objects.filter(category__in=fields)
+    if user_ids is not None:
+        posts = posts.filter(user_id__in=user_ids)
+
+    scores = {(field, period): {} for field in fields for period in periods}
+    rows = posts.order_by().values('category', 'user_id').annotate(**annotations)
+    for row in rows.iterator(chunk_size=RANKING_BATCH_SIZE):
+        for period in periods:
+            if row[f'{period}_posts']:
+                scores[(row['category'], period)][row['user_id']] = row[f'{period}_score'] or 0
+    return scores
+
+
+def calculate_rankings(fields, periods):
+    """
+    Recompute UserFieldRanking for every (field, period) pair.
+
+    One grouped aggregate over Post, ranks assigned in Python (score
+    descending, ties by user id), one bulk upsert, and one DELETE for users
+    who dropped out of a partition.
+
+    Returns:
+        Number of ranking rows written
+    """
+    started = timezone.now()
+    scores = aggregate_period_scores(fields, periods, now=started)
+
+    rankings = []
+    for (field, period), user_scores in scores.items():
+        ordered = sorted(user_scores.items(), key=lambda item: (-item[1], item[0]))
+        rankings.extend(
+            UserFieldRanking(user_id=user_id, field=field, period=period, rank=rank, score=score)
+            for rank, (user_id, score) in enumerate(ordered, 1)
+        )
+
+    with transaction.atomic():
+        UserFieldRanking.objects.bulk_create(
+            rankings,
+            update_conflicts=True,
+            unique_fields=['user', 'field', 'period'],
+            update_fields=['rank', 'score', 'updated_at'],
+            batch_size=RANKING_BATCH_SIZE
+        )
+        # Every current row was just written, so anything older is stale.
+        UserFieldRanking.objects.filter(
+            field__in=fields,
+            period__in=periods,
+            updated_at__lt=started
+        ).delete()
+        bump_scopes(ranking_scope(field, period) for field, period in scores)
+    return len(rankings)
+
+
+def changed_user_ids(since, now):
+    """
+    Return ids of users whose ranking scores may have changed since ``since``.
+
+    Covers edited posts, new likes and comments, and posts that crossed a
+    weekly/monthly window boundary between ``since`` and ``now``.
+    """
+    sources = [
+        Post.objects.filter(updated_at__gte=since).values_list('user_id', flat=True),
+        Like.objects.filter(created_at__gte=since).values_list('post__user_id', flat=True),
+        Comment.objects.filter(created_at__gte=since).values_list('post__user_id', flat=True),
+    ]
+    for days in filter(None, PERIOD_DAYS.values()):
+        sources.append(
+            Post.objects.filter(
+                created_at__gte=since - timedelta(days=days),
+                created_at__lt=now - timedelta(days=days)
+            ).values_list('user_id', flat=True)
+        )
+
+    user_ids = set()
+    for source in sources:
+        user_ids.update(source.order_by().distinct())
+    return sorted(user_ids)
+
+
+def rank_partitions(partitions):
+    """
+    Re-rank the given (field, period) partitions, writing only moved ranks.
+
+    Returns:
+        Number of ranking rows whose rank changed
+    """
+    changed = []
+    for field, period in sorted(partitions):
+        rows = (
+            UserFieldRanking.objects.filter(field=field, period=period)
+            .order_by('-score', 'user_id')
+            .values_list('id', 'rank')
+        )
+        for position, (pk, rank) in enumerate(rows.iterator(chunk_size=RANKING_BATCH_SIZE), 1):
+            if rank != position:
+                changed.append(UserFieldRanking(id=pk, rank=position))
+
+    if changed:
+        UserFieldRanking.objects.bulk_update(changed, ['rank'], batch_size=RANKING_BATCH_SIZE)
+    return len(changed)
+
+
+def calculate_rankings_incremental():
+    """
+    Update rankings for users changed since the last run.
+
+    Falls back to a full recompute when there is no high-water mark yet.
+
+    Returns:
+        Dictionary with the mode used, users rescored, partitions re-ranked
+        and ranking rows written
+    """
+    since = get_high_water_mark()
+    if since is None:
+        return {'mode': 'full', 'users': None, 'partitions': None, 'rows_written': calculate_all_rankings()}
+
+    started = timezone.now()
+    user_ids = changed_user_ids(since, started)
+    partitions = set()
+    written = 0
+
+    with transaction.atomic():
+        for offset in range(0, len(user_ids), RANKING_BATCH_SIZE):
+            chunk = user_ids[offset:offset + RANKING_BATCH_SIZE]
+            scores = aggregate_period_scores(
+                RANKING_FIELDS, RANKING_PERIODS, now=started, user_ids=chunk
+            )
+
+            rankings = [
+                UserFieldRanking(user_id=user_id, field=field, period=period, rank=0, score=score)
+                for (field, period), user_scores in scores.items()
+                for user_id, score in user_scores.items()
+            ]
+            UserFieldRanking.objects.bulk_create(
+                rankings,
+                update_conflicts=True,
+                unique_fields=['user', 'field', 'period'],
+                update_fields=['score', 'updated_at'],
+                batch_size=RANKING_BATCH_SIZE
+            )
+            written += len(rankings)
+            partitions.update(key for key, user_scores in scores.items() if user_scores)
+
+            # Rows these users no longer qualify for were not rewritten above.
+            stale = UserFieldRanking.objects.filter(user_id__in=chunk, updated_at__lt=started)
+            partitions.update(stale.order_by().values_list('field', 'period').distinct())
+            stale.delete()
+
+        rank_partitions(partitions)
+        set_high_water_mark(started)
+        bump_scopes(ranking_scope(field, period) for field, period in partitions)
+
+    return {
+        'mode': 'incremental',
+        'users': len(user_ids),
+        'partitions': len(partitions),
+        'rows_written': written,
+    }
@@ -1,3 +1,388 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import IntegrityError
 from django.test import TestCase
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient, APITestCase
+
+from core.models_extended import RankingCheckpoint, RankingJob, UserFieldRanking
+from core.ranking_jobs import claim_next_job, enqueue_ranking_job
+from core.rankings import (
+    RANKING_FIELDS,
+    RANKING_PERIODS,
+    calculate_all_rankings,
+    calculate_field_period_ranking,
+    calculate_rankings,
+    calculate_rankings_incremental,
+    get_high_water_mark,
+)
+from engagement.leaderboard_models import Leaderboard
+from engagement.leaderboard_scoring import clear_weights_cache, get_weights, set_weights
+from engagement.models import Like
+from posts.models import Post
+
+User = get_user_model()
+
+
+class CalculateRankingsTest(TestCase):
+    """Test the grouped-aggregate UserFieldRanking calculation."""
+
+    def setUp(self):
+        """Create authors with recent and old posts in two fields."""
+        self.users = [
+            User.objects.create_user(
+                username=f'ranked{i}',
+                email=f'ranked{i}@university.edu',
+                password='testpass123'
+            )
+            for i in range(3)
+        ]
+        self.post(self.users[0], 'music', likes=5, comments=1, days_ago=2)    # 7
+        self.post(self.users[0], 'music', likes=0, comments=0, days_ago=40)   # 0
+        self.post(self.users[1], 'music', likes=1, comments=2, days_ago=10)   # 5
+        self.post(self.users[1], 'music', likes=10, comments=0, days_ago=90)  # 10
+        self.post(self.users[2], 'music', likes=0, comments=0, days_ago=1)    # 0
+        self.post(self.users[2], 'sports', likes=3, comments=3, days_ago=1)   # 9
+
+    def post(self, user, category, likes, comments, days_ago):
+        post = Post.objects.create(
+            user=user, title='Entry', category=category,
+            like_count=likes, comment_count=comments
+        )
+        Post.objects.filter(id=post.id).update(
+            created_at=timezone.now() - timedelta(days=days_ago)
+        )
+
+    def ranking(self, field, period):
+        return list(
+            UserFieldRanking.objects.filter(field=field, period=period)
+            .order_by('rank').values_list('user__username', 'score', 'rank')
+        )
+
+    def test_scores_and_ranks_per_period(self):
+        """Each (field, period) is ranked from the posts inside the period."""
+        calculate_all_rankings()
+
+        self.assertEqual(self.ranking('music', 'weekly'), [('ranked0', 7, 1), ('ranked2', 0, 2)])
+        self.assertEqual(
+            self.ranking('music', 'monthly'),
+            [('ranked0', 7, 1), ('ranked1', 5, 2), ('ranked2', 0, 3)]
+        )
+        self.assertEqual(
+            self.ranking('music', 'all_time'),
+            [('ranked1', 15, 1), ('ranked0', 7, 2), ('ranked2', 0, 3)]
+        )
+        self.assertEqual(self.ranking('sports', 'weekly'), [('ranked2', 9, 1)])
+        self.assertEqual(self.ranking('dance', 'all_time'), [])
+
+    def test_query_count_is_independent_of_data_size(self):
+        """One aggregate, one upsert batch and one stale-row delete."""
+        get_weights()  # loaded once per process, not per run
+        with self.assertNumQueries(5):
+            calculate_rankings(RANKING_FIELDS, RANKING_PERIODS)
+        for _ in range(5):
+            self.post(self.users[1], 'dance', likes=1, comments=0, days_ago=0)
+        with self.assertNumQueries(5):
+            calculate_rankings(RANKING_FIELDS, RANKING_PERIODS)
+
+    def test_scores_use_scoring_config(self):
+        """Like and comment weights come from the leaderboard scoring config."""
+        set_weights(like=3, comment=0, follow=5)
+        self.addCleanup(clear_weights_cache)
+        
+        calculate_all_rankings()
+        
+        self.assertEqual(self.ranking('music', 'weekly'), [('ranked0', 15, 1), ('ranked2', 0, 2)])
+    
+    def test_stale_rows_are_deleted(self):
+        """Users without posts in a period drop out of its ranking."""
+        calculate_all_rankings()
+        Post.objects.filter(user=self.users[2], category='music').delete()
+
+        calculate_field_period_ranking('music', 'weekly')
+
+        self.assertEqual(self.ranking('music', 'weekly'), [('ranked0', 7, 1)])
+        self.assertEqual(len(self.ranking('music', 'monthly')), 3)
+
+
+class RankingJobAPITest(APITestCase):
+    """Test the queued ranking job endpoints and worker."""
+
+    def setUp(self):
+        """Create an admin and one ranked post."""
+        self.admin = User.objects.create_user(
+            username='admin', email='admin@university.edu', password='testpass123', is_staff=True
+        )
+        Post.objects.create(user=self.admin, title='Entry', category='music', like_count=2)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.admin)
+
+    def test_concurrent_requests_share_one_job(self):
+        """A second request while a job is queued returns the same job."""
+        first = self.client.post('/api/rankings/calculate/')
+        second = self.client.post('/api/rankings/calculate/')
+
+        self.assertEqual(first.status_code, status.HTTP_202_ACCEPTED)
+        self.assertTrue(first.data['created'])
+        self.assertFalse(second.data['created'])
+        self.assertEqual(first.data['job_id'], second.data['job_id'])
+        self.assertEqual(RankingJob.objects.count(), 1)
+
+    def test_enqueue_retries_when_active_job_finishes(self):
+        """A job that finishes between the failed insert and the read is not a 500."""
+        create = RankingJob.objects.create
+        collisions = [IntegrityError('duplicate active job')]
+
+        def create_after_collision(**kwargs):
+            if collisions:
+                raise collisions.pop()
+            return create(**kwargs)
+
+        with mock.patch.object(RankingJob.objects, 'create', side_effect=create_after_collision):
+            job, created = enqueue_ranking_job(self.admin)
+
+        self.assertTrue(created)
+        self.assertEqual(RankingJob.objects.get().id, job.id)
+
+    def test_worker_runs_job_and_reports_progress(self):
+        """The worker finishes the job; GET reports fields, rows and timing."""
+        job_id = self.client.post('/api/rankings/calculate/').data['job_id']
+        self.assertEqual(self.client.get(f'/api/rankings/jobs/{job_id}/').data['status'], 'queued')
+
+        call_command('run_ranking_jobs', stdout=StringIO())
+
+        response = self.client.get(f'/api/rankings/jobs/{job_id}/')
+        self.assertEqual(response.data['status'], 'succeeded')
+        self.assertEqual(response.data['fields_done'], response.data['fields_total'])
+        self.assertEqual(response.data['rows_written'], 3)
+        self.assertGreaterEqual(response.data['elapsed_seconds'], 0)
+        self.assertEqual(UserFieldRanking.objects.filter(user=self.admin).count(), 3)
+
+        # Once finished, a new request queues a new job.
+        self.assertTrue(self.client.post('/api/rankings/calculate/').data['created'])
+
+    def test_incremental_job(self):
+        """mode=incremental runs as one step; unknown modes are rejected."""
+        calculate_all_rankings()
+        response = self.client.post('/api/rankings/calculate/', {'mode': 'incremental'})
+        self.assertEqual(response.data['mode'], 'incremental')
+        self.assertEqual(response.data['fields_total'], 1)
+
+        call_command('run_ranking_jobs', stdout=StringIO())
+
+        job = RankingJob.objects.get(id=response.data['job_id'])
+        self.assertEqual((job.status, job.fields_done), ('succeeded', 1))
+        self.assertEqual(
+            self.client.post('/api/rankings/calculate/', {'mode': 'partial'}).status_code,
+            status.HTTP_400_BAD_REQUEST
+        )
+
+    def test_stale_running_job_is_failed(self):
+        """A job whose worker died no longer blocks new requests."""
+        job, _ = enqueue_ranking_job()
+        claim_next_job('dead-worker')
+        RankingJob.objects.filter(id=job.id).update(
+            heartbeat_at=timezone.now() - timedelta(hours=1)
+        )
+
+        self.assertIsNone(claim_next_job('live-worker'))
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'failed')
+        self.assertTrue(self.client.post('/api/rankings/calculate/').data['created'])
+
+    def test_requires_admin(self):
+        """Regular users cannot queue or inspect jobs."""
+        user = User.objects.create_user(
+            username='member', email='member@university.edu', password='testpass123'
+        )
+        self.client.force_authenticate(user=user)
+
+        self.assertEqual(self.client.post('/api/rankings/calculate/').status_code, status.HTTP_403_FORBIDDEN)
+
+
+class IncrementalRankingTest(TestCase):
+    """Test incremental UserFieldRanking updates driven by the high-water mark."""
+
+    def setUp(self):
+        """Create three authors with posts from two hours ago, then a full run."""
+        self.users = [
+            User.objects.create_user(
+                username=f'incr{i}', email=f'incr{i}@university.edu', password='testpass123'
+            )
+            for i in range(3)
+        ]
+        self.posts = [
+            Post.objects.create(user=user, title='Entry', category='music', like_count=i)
+            for i, user in enumerate(self.users)
+        ]
+        two_hours_ago = timezone.now() - timedelta(hours=2)
+        Post.objects.update(created_at=two_hours_ago, updated_at=two_hours_ago)
+        calculate_all_rankings()
+
+    def rewind_high_water_mark(self, **delta):
+        RankingCheckpoint.objects.update(high_water=get_high_water_mark() - timedelta(**delta))
+
+    def snapshot(self):
+        return sorted(
+            UserFieldRanking.objects.values_list('user_id', 'field', 'period', 'rank', 'score')
+        )
+
+    def assert_matches_full_recompute(self):
+        incremental = self.snapshot()
+        calculate_all_rankings()
+        self.assertEqual(incremental, self.snapshot())
+
+    def test_first_run_falls_back_to_full(self):
+        """Without a high-water mark everything is recomputed."""
+        RankingCheckpoint.objects.all().delete()
+
+        self.assertEqual(calculate_rankings_incremental()['mode'], 'full')
+        self.assertIsNotNone(get_high_water_mark())
+
+    def test_only_changed_users_are_rescored(self):
+        """New likes and edited posts rescore just their authors."""
+        fan = User.objects.create_user(
+            username='fan', email='fan@university.edu', password='testpass123'
+        )
+        Like.objects.create(user=fan, post=self.posts[0])
+        self.posts[1].like_count = 10
+        self.posts[1].save()
+        untouched = UserFieldRanking.objects.get(user=self.users[2], period='all_time')
+
+        result = calculate_rankings_incremental()
+
+        self.assertEqual(result['users'], 2)
+        self.assertEqual(result['partitions'], 3)
+        self.assertEqual(
+            UserFieldRanking.objects.get(user=self.users[2], period='all_time').updated_at,
+            untouched.updated_at
+        )
+        self.assertEqual(
+            UserFieldRanking.objects.get(user=self.users[1], period='all_time').rank, 1
+        )
+        self.assert_matches_full_recompute()
+
+    def test_posts_leaving_a_window_are_picked_up(self):
+        """A post ageing out of the weekly window drops its author from weekly."""
+        Post.objects.filter(id=self.posts[2].id).update(
+            created_at=timezone.now() - timedelta(days=7, minutes=30)
+        )
+        self.rewind_high_water_mark(hours=1)
+
+        calculate_rankings_incremental()
+
+        self.assertFalse(
+            UserFieldRanking.objects.filter(user=self.users[2], period='weekly').exists()
+        )
+        self.assert_matches_full_recompute()
+
+    def test_nothing_changed_writes_nothing(self):
+        """A run with no changes only advances the high-water mark."""
+        before = get_high_water_mark()
+
+        result = calculate_rankings_incremental()
+
+        self.assertEqual((result['users'], result['rows_written']), (0, 0))
+        self.assertGreater(get_high_water_mark(), before)
+
+
+class LeaderboardConditionalGetTest(APITestCase):
+    """Test ETag / If-None-Match on GET /api/rankings/."""
+
+    url = '/api/rankings/?field=music&period=weekly'
+
+    def setUp(self):
+        """Rank one music post."""
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='poller', email='poller@university.edu', password='testpass123'
+        )
+        Post.objects.create(user=self.user, title='Entry', category='music', like_count=2)
+        calculate_all_rankings()
+        self.client = APIClient()
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_current_client_gets_304_without_queries(self):
+        """The ETag is checked against the ranking version, not the table."""
+        first = self.client.get(self.url)
+        self.assertEqual(first.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(first.data), 1)
+
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertNotEqual(
+            self.client.get(self.url + '&limit=5')['ETag'], first['ETag']
+        )
+
+    def test_ranking_runs_bump_only_their_partitions(self):
+        """Full and incremental runs change the ETag of what they rewrote."""
+        weekly = self.client.get(self.url)['ETag']
+        dance = self.client.get('/api/rankings/?field=dance&period=weekly')['ETag']
+
+        with self.captureOnCommitCallbacks(execute=True):
+            calculate_field_period_ranking('music', 'weekly')
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=weekly)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        Post.objects.create(user=self.user, title='More', category='music', like_count=1)
+        with self.captureOnCommitCallbacks(execute=True):
+            calculate_rankings_incremental()
+        self.assertEqual(
+            self.client.get(self.url, HTTP_IF_NONE_MATCH=response['ETag']).status_code,
+            status.HTTP_200_OK
+        )
+        self.assertEqual(
+            self.client.get(
+                '/api/rankings/?field=dance&period=weekly', HTTP_IF_NONE_MATCH=dance
+            ).status_code,
+            status.HTTP_304_NOT_MODIFIED
+        )
+
+    def test_invalid_limit_is_rejected(self):
+        """A non-integer limit is a 400, not a server error."""
+        response = self.client.get(self.url + '&limit=abc')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data, {'error': 'limit must be an integer'})
+        self.assertEqual(len(self.client.get(self.url + '&limit=-5').data), 1)
+
+
+class LeaderboardAliasTest(APITestCase):
+    """Test the deprecated /api/leaderboard/ path of the rankings list."""
+
+    def setUp(self):
+        """Create one user with a ranking and a leaderboard entry."""
+        self.user = User.objects.create_user(
+            username='alias', email='alias@university.edu', password='testpass123'
+        )
+        self.client.force_authenticate(user=self.user)
+        UserFieldRanking.objects.create(user=self.user, field='music', period='all_time', rank=1, score=7)
+        Leaderboard.objects.create(user=self.user, field='music', score=7, rank=1)
+
+    def test_rankings_parameters_reach_rankings_list(self):
+        """Old rankings requests get the same list, marked deprecated."""
+        response = self.client.get('/api/leaderboard/?field=music&period=all_time')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.data, self.client.get('/api/rankings/?field=music&period=all_time').data
+        )
+        self.assertEqual(response['Deprecation'], 'true')
+        self.assertIn('</api/rankings/>', response['Link'])
+
+    def test_other_requests_reach_leaderboard_list(self):
+        """Without rankings parameters the leaderboard list answers."""
+        response = self.client.get('/api/leaderboard/')
 
-# Create your tests here.
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertFalse(response.has_header('Deprecation'))
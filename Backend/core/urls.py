@@ -1,8 +1,10 @@
 from django.urls import path
+from .views import leaderboard_alias
 from .views_extended import (
     LeaderboardAPIView,
     UserLeaderboardsAPIView,
     CalculateRankingsAPIView,
+    RankingJobAPIView,
     EndorsementListCreateAPIView,
 )
 
@@ -10,11 +12,14 @@ app_name = 'core'
 
 urlpatterns = [
     # Leaderboard endpoints
-    path('leaderboard/', LeaderboardAPIView.as_view(), name='leaderboard'),
+    path('rankings/', LeaderboardAPIView.as_view(), name='leaderboard'),
+    # Deprecated: the rankings list's old path, shared with the leaderboard list.
+    path('leaderboard/', leaderboard_alias, name='leaderboard_alias'),
     path('leaderboard/user/<int:user_id>/', UserLeaderboardsAPIView.as_view(), name='user_leaderboards'),
     
     # Ranking calculation
     path('rankings/calculate/', CalculateRankingsAPIView.as_view(), name='calculate_rankings'),
+    path('rankings/jobs/<int:job_id>/', RankingJobAPIView.as_view(), name='ranking_job'),
     
     # Endorsements
     path('endorsements/', EndorsementListCreateAPIView.as_view(), name='endorsements'),
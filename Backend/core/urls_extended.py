@@ -3,6 +3,7 @@ from .views_extended import (
     LeaderboardAPIView,
     UserLeaderboardsAPIView,
     CalculateRankingsAPIView,
+    RankingJobAPIView,
     EndorsementListCreateAPIView,
 )
 
@@ -15,6 +16,7 @@ urlpatterns = [
     
     # Ranking calculation
     path('rankings/calculate/', CalculateRankingsAPIView.as_view(), name='calculate_rankings'),
+    path('rankings/jobs/<int:job_id>/', RankingJobAPIView.as_view(), name='ranking_job'),
     
     # Endorsements
     path('endorsements/', EndorsementListCreateAPIView.as_view(), name='endorsements'),
@@ -1,4 +1,32 @@
 from django.http import JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+
+from engagement.leaderboard_views import LeaderboardViewSet
+from .views_extended import LeaderboardAPIView
+
+# Query parameters only the rankings list understands.
+RANKINGS_PARAMS = ('period', 'time_period', 'limit')
+
+rankings_list = LeaderboardAPIView.as_view()
+leaderboard_list = LeaderboardViewSet.as_view({'get': 'list'})
+
 
 def health(request):
-    return JsonResponse({"status": "ok"})
\ No newline at end of file
+    return JsonResponse({"status": "ok"})
+
+
+@csrf_exempt
+def leaderboard_alias(request, *args, **kwargs):
+    """
+    Serve /api/leaderboard/ for both lists that used to claim it.
+
+    The rankings list moved to /api/rankings/. Requests carrying one of its
+    parameters are still answered by it, marked deprecated; everything else
+    is the leaderboard router's list.
+    """
+    if any(name in request.GET for name in RANKINGS_PARAMS):
+        response = rankings_list(request, *args, **kwargs)
+        response['Deprecation'] = 'true'
+        response['Link'] = '</api/rankings/>; rel="successor-version"'
+        return response
+    return leaderboard_list(request, *args, **kwargs)
@@ -2,11 +2,15 @@ from rest_framework import generics, viewsets, permissions, status
 from rest_framework.response import Response
 from rest_framework.decorators import action
 from django.db.models import Count, Q
-from django.utils import timezone
-from datetime import timedelta
 
-from .models_extended import UserFieldRanking, Endorsement
-from posts.models import Post
+from .models_extended import UserFieldRanking, Endorsement, RankingJob
+from .ranking_jobs import enqueue_ranking_job
+from .rankings import (
+    RANKING_FIELDS,
+    RANKING_PERIODS,
+    ranking_scope,
+)
+from engagement.leaderboard_conditional import conditional_get
 from engagement.models import Like, Comment
 from django.contrib.auth import get_user_model
 
@@ -19,14 +23,32 @@ class UserFieldRankingSerializer:
 
 
 class LeaderboardAPIView(generics.ListAPIView):
-    """Get leaderboard for a specific field and time period."""
+    """
+    Get leaderboard for a specific field and time period.
+    
+    Responses carry an ETag tied to the (field, period) ranking version;
+    a matching If-None-Match is answered with 304 without a query.
+    """
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
     
     def get(self, request, *args, **kwargs):
         field = request.query_params.get('field', 'academics')
         period = request.query_params.get('period', 'all_time')
-        limit = int(request.query_params.get('limit', 100))
+        try:
+            limit = int(request.query_params.get('limit', 100))
+        except ValueError:
+            return Response({'error': 'limit must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+        limit = max(1, limit)
         
+        if field not in RANKING_FIELDS or period not in RANKING_PERIODS:
+            return self.rankings(field, period, limit)
+        return conditional_get(
+            request, 'rankings', [ranking_scope(field, period)],
+            lambda: self.rankings(field, period, limit),
+            params=[field, period, limit]
+        )
+    
+    def rankings(self, field, period, limit):
         try:
             rankings = UserFieldRanking.objects.filter(
                 field=field,
@@ -78,18 +100,59 @@ class UserLeaderboardsAPIView(generics.RetrieveAPIView):
 
 
 class CalculateRankingsAPIView(generics.CreateAPIView):
-    """Calculate/recalculate all rankings."""
+    """
+    Queue a recalculation of all rankings.
+    
+    Returns immediately with a job id; ``manage.py run_ranking_jobs`` does
+    the work. While a job is queued or running, further requests return
+    that job instead of starting another. Pass ``mode=incremental`` to only
+    rescore users changed since the last run.
+    """
     permission_classes = [permissions.IsAdminUser]
     
     def post(self, request):
-        try:
-            calculate_all_rankings()
+        mode = request.data.get('mode', RankingJob.MODE_FULL)
+        if mode not in dict(RankingJob.MODE_CHOICES):
             return Response(
-                {'message': 'Rankings calculated successfully'},
-                status=status.HTTP_200_OK
+                {'error': 'mode must be "full" or "incremental"'},
+                status=status.HTTP_400_BAD_REQUEST
             )
-        except Exception as e:
-            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        job, created = enqueue_ranking_job(request.user, mode)
+        return Response(
+            serialize_ranking_job(job, created=created),
+            status=status.HTTP_202_ACCEPTED
+        )
+
+
+class RankingJobAPIView(generics.RetrieveAPIView):
+    """Report the progress of a ranking job."""
+    permission_classes = [permissions.IsAdminUser]
+    
+    def get(self, request, job_id=None, *args, **kwargs):
+        try:
+            job = RankingJob.objects.get(id=job_id)
+        except RankingJob.DoesNotExist:
+            return Response({'error': 'Job not found'}, status=status.HTTP_404_NOT_FOUND)
+        
+        return Response(serialize_ranking_job(job), status=status.HTTP_200_OK)
+
+
+def serialize_ranking_job(job, **extra):
+    """Progress payload shared by the ranking job endpoints."""
+    return {
+        'job_id': job.id,
+        'status': job.status,
+        'mode': job.mode,
+        'fields_done': job.fields_done,
+        'fields_total': job.fields_total,
+        'rows_written': job.rows_written,
+        'elapsed_seconds': job.elapsed_seconds,
+        'error': job.error,
+        'created_at': job.created_at,
+        'started_at': job.started_at,
+        'finished_at': job.finished_at,
+        **extra,
+    }
 
 
 class EndorsementListCreateAPIView(generics.ListCreateAPIView):
@@ -158,54 +221,3 @@ class EndorsementListCreateAPIView(generics.ListCreateAPIView):
             {'error': 'Already endorsed this user for this skill'},
             status=status.HTTP_400_BAD_REQUEST
         )
-
-
-def calculate_all_rankings():
-    """Calculate rankings for all users in all fields."""
-    fields = ['academics', 'sports', 'music', 'dance', 'tech', 'arts']
-    periods = ['weekly', 'monthly', 'all_time']
-    
-    for field in fields:
-        for period in periods:
-            calculate_field_period_ranking(field, period)
-
-
-def calculate_field_period_ranking(field, period):
-    """Calculate ranking for a specific field and period."""
-    now = timezone.now()
-    
-    # Determine date range based on period
-    if period == 'weekly':
-        start_date = now - timedelta(days=7)
-    elif period == 'monthly':
-        start_date = now - timedelta(days=30)
-    else:  # all_time
-        start_date = None
-    
-    # Get all posts in the field within the period
-    posts_query = Post.objects.filter(category=field)
-    if start_date:
-        posts_query = posts_query.filter(created_at__gte=start_date)
-    
-    # Calculate score for each user
-    user_scores = {}
-    
-    for post in posts_query:
-        author = post.user
-        # Score calculation: likes weighted 2x, comments weighted 1x
-        score = (post.like_count * 2) + (post.comment_count * 1)
-        
-        if author not in user_scores:
-            user_scores[author] = 0
-        user_scores[author] += score
-    
-    # Sort users by score and assign ranks
-    sorted_users = sorted(user_scores.items(), key=lambda x: x[1], reverse=True)
-    
-    for rank, (user, score) in enumerate(sorted_users, 1):
-        UserFieldRanking.objects.update_or_create(
-            user=user,
-            field=field,
-            period=period,
-            defaults={'rank': rank, 'score': score}
-        )
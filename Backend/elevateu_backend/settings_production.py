@@ -81,6 +81,10 @@ CACHE_TIMEOUT_POSTS = 300         # 5 minutes
 CACHE_TIMEOUT_USER_PROFILE = 600  # 10 minutes
 CACHE_TIMEOUT_CATEGORIES = 86400  # 1 day
 
+# Leaderboard ranks are refreshed at most once per window per field
+LEADERBOARD_RANK_DEBOUNCE_SECONDS = int(os.getenv('LEADERBOARD_RANK_DEBOUNCE_SECONDS', '5'))
+LEADERBOARD_RANK_FLUSH_ON_COMMIT = True
+
 # Session & CSRF
 SESSION_ENGINE = 'django.contrib.sessions.backends.cache'
 SESSION_CACHE_ALIAS = 'default'
@@ -26,4 +26,5 @@ urlpatterns = [
     path('api/engagement/', include('engagement.urls')),
     path('api/posts/', include('posts.urls')),
     path('api/', include('core.urls')),
+    path('api/', include('engagement.leaderboard_urls')),
 ]
@@ -1,5 +1,6 @@
 from django.contrib import admin
 from .models import Engagement, Like, Comment, Follow
+from .leaderboard_models import LeaderboardOutbox
 
 
 @admin.register(Engagement)
@@ -30,3 +31,17 @@ class FollowAdmin(admin.ModelAdmin):
     list_display = ('id', 'follower', 'following', 'created_at')
     list_filter = ('created_at',)
     search_fields = ('follower__email', 'following__email')
+
+
+@admin.register(LeaderboardOutbox)
+class LeaderboardOutboxAdmin(admin.ModelAdmin):
+    list_display = ('id', 'kind', 'user_id', 'field', 'delta', 'attempts', 'dead_lettered_at', 'created_at')
+    list_filter = ('kind', 'field', ('dead_lettered_at', admin.EmptyFieldListFilter))
+    search_fields = ('user_id',)
+    readonly_fields = ('locked_by', 'locked_until', 'created_at')
+    actions = ('requeue',)
+
+    @admin.action(description='Requeue selected entries')
+    def requeue(self, request, queryset):
+        updated = queryset.update(attempts=0, dead_lettered_at=None, locked_by='', locked_until=None)
+        self.message_user(request, f"Requeued {updated} outbox entries.")
@@ -10,5 +10,6 @@ class EngagementConfig(AppConfig):
         # import signals to wire up post_save/post_delete handlers
         try:
             from . import signals  # noqa: F401
+            from . import leaderboard_signals  # noqa: F401
         except Exception:
             pass
@@ -0,0 +1,158 @@
+"""
+Write buffering and retention for the LeaderboardUpdate audit log.
+
+Writes: likes, comments and follows reach the log through the outbox
+worker, and ``LeaderboardService.apply_events`` writes each batch's rows
+with one ``log_updates`` bulk insert inside its transaction. The direct
+``add_*_score`` calls change one entry each, so they use ``log_update``
+and write a single row.
+
+Ranks: updates logged one at a time (``LeaderboardService.add_*_score``)
+are written before their field is re-ranked, so they carry the rank the
+entry had before the change and no ``new_rank``. ``fill_new_ranks`` fills
+it in when the debounced refresh re-ranks the field.
+
+Retention: ``prune_updates`` (``manage.py prune_leaderboard_updates``)
+folds rows older than the cutoff into LeaderboardUpdateSummary, one row
+per leaderboard entry and day, then deletes them. Work is done in
+batches of ``batch_size`` ids, each in its own short transaction, so
+locks are held only for one batch at a time and an interrupted run can
+simply be restarted. Run a single pruner at a time; two concurrent runs
+could fold the same rows twice.
+"""
+
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import OuterRef, Subquery
+from django.utils import timezone
+
+from .leaderboard_models import Leaderboard, LeaderboardUpdate, LeaderboardUpdateSummary
+
+
+UPDATE_BATCH_SIZE = 500
+PRUNE_BATCH_SIZE = 5000
+
+
+def log_update(**fields):
+    """
+    Record a single LeaderboardUpdate.
+
+    Args:
+        **fields: LeaderboardUpdate field values
+    """
+    return LeaderboardUpdate.objects.create(**fields)
+
+
+def log_updates(updates):
+    """
+    Record several LeaderboardUpdates with one bulk insert.
+
+    Args:
+        updates: Iterable of dicts of LeaderboardUpdate field values
+
+    Returns:
+        Number of updates written
+    """
+    return len(LeaderboardUpdate.objects.bulk_create(
+        [LeaderboardUpdate(**fields) for fields in updates],
+        batch_size=UPDATE_BATCH_SIZE
+    ))
+
+
+def fill_new_ranks(field):
+    """
+    Set ``new_rank`` on ``field``'s updates logged before its last re-rank.
+
+    Returns:
+        Number of updates filled in
+    """
+    return LeaderboardUpdate.objects.filter(
+        new_rank__isnull=True,
+        leaderboard__field=field
+    ).update(
+        new_rank=Subquery(
+            Leaderboard.objects.filter(id=OuterRef('leaderboard_id')).values('rank')[:1]
+        )
+    )
+
+
+def _fold(summary, count, score_change, best_rank, worst_rank):
+    summary['update_count'] += count
+    summary['score_change'] += score_change
+    if best_rank is not None:
+        current = summary['best_rank']
+        summary['best_rank'] = best_rank if current is None else min(current, best_rank)
+    if worst_rank is not None:
+        current = summary['worst_rank']
+        summary['worst_rank'] = worst_rank if current is None else max(current, worst_rank)
+
+
+def prune_batch(cutoff, after_id=0, batch_size=PRUNE_BATCH_SIZE):
+    """
+    Summarize and delete up to ``batch_size`` updates older than ``cutoff``.
+
+    Args:
+        cutoff: Updates created before this are pruned
+        after_id: Only consider updates with a larger id
+        batch_size: Maximum number of updates to prune
+
+    Returns:
+        Tuple of (rows deleted, last id seen or None when done)
+    """
+    with transaction.atomic():
+        rows = list(
+            LeaderboardUpdate.objects.filter(id__gt=after_id, created_at__lt=cutoff)
+            .order_by('id')
+            .values_list('id', 'leaderboard_id', 'created_at', 'new_rank', 'score_change')
+            [:batch_size]
+        )
+        if not rows:
+            return 0, None
+
+        summaries = {}
+        for _, leaderboard_id, created_at, rank, score_change in rows:
+            key = (leaderboard_id, timezone.localdate(created_at))
+            summary = summaries.setdefault(key, {
+                'update_count': 0, 'score_change': 0, 'best_rank': None, 'worst_rank': None
+            })
+            _fold(summary, 1, score_change, rank, rank)
+
+        existing = LeaderboardUpdateSummary.objects.filter(
+            leaderboard_id__in={leaderboard_id for leaderboard_id, _ in summaries},
+            day__in={day for _, day in summaries}
+        ).values_list('leaderboard_id', 'day', 'update_count', 'score_change', 'best_rank', 'worst_rank')
+        for leaderboard_id, day, count, score_change, best, worst in existing:
+            if (leaderboard_id, day) in summaries:
+                _fold(summaries[(leaderboard_id, day)], count, score_change, best, worst)
+
+        LeaderboardUpdateSummary.objects.bulk_create(
+            [
+                LeaderboardUpdateSummary(leaderboard_id=leaderboard_id, day=day, **summary)
+                for (leaderboard_id, day), summary in summaries.items()
+            ],
+            update_conflicts=True,
+            unique_fields=['leaderboard', 'day'],
+            update_fields=['update_count', 'score_change', 'best_rank', 'worst_rank'],
+            batch_size=UPDATE_BATCH_SIZE
+        )
+        first_id, last_id = rows[0][0], rows[-1][0]
+        deleted, _ = LeaderboardUpdate.objects.filter(
+            id__gte=first_id, id__lte=last_id, created_at__lt=cutoff
+        ).delete()
+    return deleted, last_id
+
+
+def prune_updates(older_than_days, batch_size=PRUNE_BATCH_SIZE, now=None):
+    """
+    Summarize and delete every update older than ``older_than_days``.
+
+    Returns:
+        Number of updates deleted
+    """
+    cutoff = (now or timezone.now()) - timedelta(days=older_than_days)
+    total, last_id = 0, 0
+    while last_id is not None:
+        deleted, last_id = prune_batch(cutoff, last_id, batch_size)
+        total += deleted
+    return total
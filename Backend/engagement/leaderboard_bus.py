@@ -0,0 +1,161 @@
+"""
+Broadcast bus announcing which leaderboard fields changed.
+
+The write path calls ``publish(fields)`` after commit, from the same place
+that bumps the fields' snapshot versions. A backend carries the
+announcement to every worker process. In each process the bus hands it
+to the listeners registered by event loops (the SSE stream hub, see
+leaderboard_stream), on the loop's own thread.
+
+The announcement carries field codes only; listeners read whatever they
+need from the database themselves, so a lost or duplicated message costs
+at most one extra refresh.
+
+Backends (``LEADERBOARD_STREAM_BACKEND``, a dotted path):
+
+- ``LocalBackend`` (default) delivers within the publishing process only.
+  Fine for a single worker and used by the tests.
+- ``PostgresNotifyBackend`` uses ``NOTIFY``/``LISTEN`` on the default
+  database, so every worker sees every write. Each process runs one
+  listener thread, however many connections it serves.
+"""
+
+import logging
+import select
+import threading
+import time
+
+from django.conf import settings
+from django.db import connection
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BACKEND = 'engagement.leaderboard_bus.LocalBackend'
+NOTIFY_CHANNEL = 'leaderboard_changes'
+
+
+class LocalBackend:
+    """Deliver announcements to listeners in this process only."""
+
+    deliver = None
+
+    def start(self, deliver):
+        self.deliver = deliver
+
+    def publish(self, fields):
+        # Nothing to do until a stream in this process attaches.
+        if self.deliver is not None:
+            self.deliver(fields)
+
+
+class PostgresNotifyBackend:
+    """
+    Deliver announcements to every process through PostgreSQL NOTIFY.
+
+    ``publish`` runs ``pg_notify`` on Django's connection; ``start`` opens a
+    separate connection in a daemon thread that LISTENs and forwards each
+    payload, including this process's own.
+    """
+
+    poll_seconds = 5
+    retry_seconds = 5
+
+    def start(self, deliver):
+        self.deliver = deliver
+        thread = threading.Thread(target=self._listen, name='leaderboard-bus', daemon=True)
+        thread.start()
+
+    def publish(self, fields):
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT pg_notify(%s, %s)', [NOTIFY_CHANNEL, ','.join(fields)])
+
+    def _listen(self):
+        import psycopg2
+
+        while True:
+            try:
+                conn = psycopg2.connect(**connection.get_connection_params())
+                conn.autocommit = True
+                with conn.cursor() as cursor:
+                    cursor.execute(f'LISTEN {NOTIFY_CHANNEL}')
+                while True:
+                    if select.select([conn], [], [], self.poll_seconds)[0]:
+                        conn.poll()
+                        while conn.notifies:
+                            notify = conn.notifies.pop(0)
+                            self.deliver(notify.payload.split(','))
+            except Exception:
+                logger.exception('Leaderboard bus listener failed; reconnecting')
+                time.sleep(self.retry_seconds)
+
+
+class LeaderboardBus:
+    """
+    Fan announcements out to listeners, each on its own event loop.
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+        self._listeners = []
+        self._lock = threading.Lock()
+        self._started = False
+
+    def attach(self, loop, callback):
+        """
+        Call ``callback(fields)`` on ``loop`` for every announcement.
+
+        The backend is started on the first attach, so processes that never
+        serve a stream never listen.
+        """
+        with self._lock:
+            self._listeners.append((loop, callback))
+            if not self._started:
+                self._started = True
+                self.backend.start(self.deliver)
+
+    def deliver(self, fields):
+        """Hand ``fields`` to every listener; safe from any thread."""
+        fields = list(fields)
+        with self._lock:
+            self._listeners = [(loop, cb) for loop, cb in self._listeners if not loop.is_closed()]
+            listeners = list(self._listeners)
+        for loop, callback in listeners:
+            try:
+                loop.call_soon_threadsafe(callback, fields)
+            except RuntimeError:
+                # The loop closed after the check above.
+                pass
+
+    def publish(self, fields):
+        self.backend.publish(list(fields))
+
+
+_bus = None
+_bus_lock = threading.Lock()
+
+
+def get_bus():
+    """Return this process's bus, built from LEADERBOARD_STREAM_BACKEND."""
+    global _bus
+    with _bus_lock:
+        if _bus is None:
+            backend = getattr(settings, 'LEADERBOARD_STREAM_BACKEND', DEFAULT_BACKEND)
+            _bus = LeaderboardBus(import_string(backend)())
+        return _bus
+
+
+def publish(fields):
+    """
+    Announce that ``fields`` changed.
+
+    Errors are logged, never raised: a broken bus must not fail the write
+    that triggered it.
+    """
+    fields = list(fields)
+    if not fields:
+        return
+    try:
+        get_bus().publish(fields)
+    except Exception:
+        logger.exception('Could not publish leaderboard change for %s', fields)
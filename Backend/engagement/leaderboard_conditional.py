@@ -0,0 +1,77 @@
+"""
+Conditional GET (ETag / If-None-Match) for polled leaderboard reads.
+
+The ETag of a response is derived from the cached versions of the scopes
+it was built from (see leaderboard_snapshots) plus the request parameters
+that shape it, so computing it costs one cache round trip. A client that
+sends a matching If-None-Match gets a 304 before any ranking table is
+queried.
+
+Versions are read before the response is built, so a payload built
+concurrently with a write carries the older ETag and is fetched again on
+the next poll; a client is never told it is current when it is not.
+"""
+
+import hashlib
+
+from django.utils.http import parse_etags
+from rest_framework import status
+from rest_framework.response import Response
+
+from .leaderboard_snapshots import get_versions
+
+
+def make_etag(name, versions, params=()):
+    """
+    Build a weak ETag from the scope versions a payload depends on.
+
+    Args:
+        name: Endpoint kind (e.g. 'weekly', 'field')
+        versions: {scope: version} from get_versions
+        params: Request parameters that change the payload
+
+    Returns:
+        Quoted weak ETag, e.g. ``W/"weekly-3f2a..."``
+    """
+    parts = [str(param) for param in params]
+    parts.extend(f'{scope}={versions[scope]}' for scope in sorted(versions))
+    digest = hashlib.md5('|'.join(parts).encode(), usedforsecurity=False).hexdigest()[:20]
+    return f'W/"{name}-{digest}"'
+
+
+def etag_matches(request, etag):
+    """Return True if the request's If-None-Match covers ``etag``."""
+    header = request.META.get('HTTP_IF_NONE_MATCH')
+    if not header:
+        return False
+    if header.strip() == '*':
+        return True
+    # Weak comparison (RFC 9110 13.1.2): opaque tags compared without W/.
+    candidates = {tag.removeprefix('W/') for tag in parse_etags(header)}
+    return etag.removeprefix('W/') in candidates
+
+
+def conditional_get(request, name, scopes, respond, params=()):
+    """
+    Answer 304 if the client is current, otherwise call ``respond()``.
+
+    Args:
+        request: The incoming request
+        name: Endpoint kind, part of the ETag
+        scopes: Version scopes the response is built from
+        respond: Callable returning the full Response
+        params: Request parameters that change the payload
+
+    Returns:
+        A 304 Response or ``respond()``'s Response, both carrying the ETag
+    """
+    etag = make_etag(name, get_versions(scopes), params)
+    if etag_matches(request, etag):
+        response = Response(status=status.HTTP_304_NOT_MODIFIED)
+    else:
+        response = respond()
+    if response.status_code in (status.HTTP_200_OK, status.HTTP_304_NOT_MODIFIED):
+        response['ETag'] = etag
+        # Clients may keep the body but must revalidate before reusing it.
+        response['Cache-Control'] = 'private, no-cache'
+    return response
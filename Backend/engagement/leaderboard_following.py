@@ -0,0 +1,107 @@
+"""
+Friends-only leaderboard: a user ranked among the accounts they follow.
+
+Followed entries are ``Leaderboard`` rows of one field joined with the
+user's ``Follow`` rows, in one query shaped for one of two plans:
+
+- few follows: ``user_id IN (SELECT following_id FROM Follow WHERE
+  follower_id = ...)`` probes ``Leaderboard (user, field, score)`` once per
+  followed account, so the cost grows with the follow list;
+- many follows: a join that walks the field in score order through
+  ``Leaderboard (field, -score, id)`` and probes ``Follow (follower,
+  following)`` per entry, stopping after ``limit`` matches. With ``f``
+  follows among ``n`` entries that is about ``limit * n / f`` probes, so
+  it wins once ``f * f >= limit * n`` (``n`` comes from the field's score
+  histogram).
+
+Both indexes are covering for the probe side. Caching the follow list and
+passing it as an ``IN (...)`` list was measured slower than either plan
+(see ``manage.py bench_leaderboard_following``); instead the endpoint
+caches the computed result as a snapshot (leaderboard_snapshots) that is
+invalidated by the field's version, the user's own version and the
+user's follow-list version.
+
+Ranking among followed accounts uses the field's order (score descending,
+ties by id), so it agrees with the global rank. The requesting user is
+always part of their own ranking.
+"""
+
+from django.db.models import Count, Q
+
+from .leaderboard_histogram import field_total
+from .leaderboard_models import Leaderboard
+from .leaderboard_rows import LIST_COLUMNS, fetch_rows
+from .models import Follow
+
+
+FOLLOWING_COLUMNS = (('user_id', 'user_id'),) + LIST_COLUMNS
+
+
+def followed_entries(user_id, field, score_order=False):
+    """
+    Return the field's Leaderboard rows of the accounts ``user_id`` follows.
+
+    Args:
+        user_id: The following user
+        field: Field/category
+        score_order: Shape the query for the score-ordered join plan
+    """
+    entries = Leaderboard.objects.filter(field=field).exclude(user_id=user_id)
+    if score_order:
+        return entries.filter(user__followers__follower_id=user_id)
+    return entries.filter(
+        user_id__in=Follow.objects.filter(follower_id=user_id).values('following_id')
+    )
+
+
+def prefers_score_order(follow_count, field, limit):
+    """Return True if walking the field in score order is the cheaper plan."""
+    return follow_count * follow_count >= limit * max(field_total(field), 1)
+
+
+def get_following_leaderboard(user_id, field, limit):
+    """
+    Rank ``user_id`` among the accounts they follow in ``field``.
+
+    Five queries whatever the number of follows: the follow count and
+    field size that pick the plan, the user's own entry, the top ``limit``
+    followed entries, and one aggregate counting the followed entries and
+    those ahead of the user.
+
+    Args:
+        user_id: The requesting user
+        field: Field/category to rank in
+        limit: Number of entries to return
+
+    Returns:
+        Dictionary with the user's ``rank`` among followed accounts (None
+        without an entry), ``count`` of ranked entries and the top
+        ``leaderboards``, each with its ``following_rank``
+    """
+    follow_count = Follow.objects.filter(follower_id=user_id).count()
+    own = fetch_rows(
+        Leaderboard.objects.filter(user_id=user_id, field=field), FOLLOWING_COLUMNS
+    )
+    own = own[0] if own else None
+
+    rows = fetch_rows(
+        followed_entries(
+            user_id, field, prefers_score_order(follow_count, field, limit)
+        ).order_by('-score', 'id')[:limit],
+        FOLLOWING_COLUMNS
+    )
+
+    followed = followed_entries(user_id, field)
+    if own is None:
+        count, rank = followed.count(), None
+    else:
+        ahead = Q(score__gt=own['score']) | Q(score=own['score'], id__lt=own['id'])
+        totals = followed.aggregate(count=Count('id'), ahead=Count('id', filter=ahead))
+        count, rank = totals['count'] + 1, totals['ahead'] + 1
+        if rank <= limit:
+            rows.insert(rank - 1, own)
+            del rows[limit:]
+
+    for position, row in enumerate(rows, 1):
+        row['following_rank'] = position
+    return {'rank': rank, 'count': count, 'leaderboards': rows}
@@ -0,0 +1,187 @@
+"""
+Per-field score histograms for percentile lookups.
+
+Each field keeps a LeaderboardHistogram row per non-empty score bucket.
+Buckets are exact for scores below ``EXACT_LIMIT`` and log-linear above
+it: every power of two is split into ``SUB_BUCKETS`` equal slices, so a
+bucket never spans more than 1/16 (6.25%) of the scores it holds. A field
+with scores up to 10 million needs at most a few hundred rows.
+
+Writers report each score change with ``histogram_deltas`` and apply the
+net bucket changes with ``shift_histogram`` in the same transaction, so a
+batch costs two queries however many entries changed. Changes made
+outside the service (raw updates, cascade deletes) are reconciled by
+``rebuild_histograms``, which ``rebuild_leaderboards`` runs after every
+rebuild.
+
+``get_percentile`` reads one field's histogram (a few hundred rows at
+most) and returns an approximate rank with exact bounds: every entry in
+higher buckets ranks above the user, every entry in lower buckets below,
+so the true rank lies in ``[rank_low, rank_high]`` and the error is at
+most the number of other entries sharing the user's bucket. Below
+``EXACT_LIMIT`` the estimate is exact up to ties.
+"""
+
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import Case, Count, F, Q, Sum, Value, When
+from django.db.models.functions import Greatest
+
+from .leaderboard_models import Leaderboard, LeaderboardHistogram
+
+
+EXACT_LIMIT = 64
+SUB_BUCKETS = 16
+_SUB_BITS = SUB_BUCKETS.bit_length() - 1
+_EXACT_BITS = EXACT_LIMIT.bit_length() - 1
+
+
+def score_bucket(score):
+    """Return the histogram bucket index for a score."""
+    if score < EXACT_LIMIT:
+        return score
+    exponent = score.bit_length() - 1
+    sub = (score >> (exponent - _SUB_BITS)) - SUB_BUCKETS
+    return EXACT_LIMIT + (exponent - _EXACT_BITS) * SUB_BUCKETS + sub
+
+
+def bucket_bounds(bucket):
+    """Return the ``(lowest, highest)`` score held by a bucket."""
+    if bucket < EXACT_LIMIT:
+        return bucket, bucket
+    exponent, sub = divmod(bucket - EXACT_LIMIT, SUB_BUCKETS)
+    shift = exponent + _EXACT_BITS - _SUB_BITS
+    low = (SUB_BUCKETS + sub) << shift
+    return low, low + (1 << shift) - 1
+
+
+def histogram_deltas(changes):
+    """
+    Net bucket changes for a set of score changes.
+
+    Args:
+        changes: Iterable of (field, old_score, new_score); ``None`` for a
+            score means the entry did not exist before/after
+
+    Returns:
+        Counter of (field, bucket) -> count change, without zero entries
+    """
+    deltas = Counter()
+    for field, old, new in changes:
+        if old is not None:
+            deltas[(field, score_bucket(old))] -= 1
+        if new is not None:
+            deltas[(field, score_bucket(new))] += 1
+    return Counter({key: delta for key, delta in deltas.items() if delta})
+
+
+def shift_histogram(deltas):
+    """
+    Apply bucket count changes from ``histogram_deltas`` atomically.
+
+    Creates missing buckets, then adjusts every bucket in one UPDATE with
+    F() expressions so concurrent writers never lose counts.
+    """
+    if not deltas:
+        return
+    LeaderboardHistogram.objects.bulk_create(
+        [
+            LeaderboardHistogram(field=field, bucket=bucket)
+            for (field, bucket), delta in deltas.items() if delta > 0
+        ],
+        ignore_conflicts=True
+    )
+    condition = Q()
+    whens = []
+    for (field, bucket), delta in deltas.items():
+        match = Q(field=field, bucket=bucket)
+        condition |= match
+        whens.append(When(match, then=Value(delta)))
+    LeaderboardHistogram.objects.filter(condition).update(
+        count=Greatest(F('count') + Case(*whens, default=Value(0)), Value(0))
+    )
+
+
+def rebuild_histograms(fields):
+    """
+    Recompute the histograms of ``fields`` from the Leaderboard table.
+
+    Returns:
+        Number of histogram rows written
+    """
+    rows = []
+    for field in fields:
+        counts = Counter()
+        scores = (
+            Leaderboard.objects.filter(field=field)
+            .order_by()
+            .values('score')
+            .annotate(entries=Count('id'))
+            .values_list('score', 'entries')
+        )
+        for score, entries in scores.iterator():
+            counts[score_bucket(score)] += entries
+        rows.extend(
+            LeaderboardHistogram(field=field, bucket=bucket, count=count)
+            for bucket, count in counts.items()
+        )
+
+    with transaction.atomic():
+        LeaderboardHistogram.objects.filter(field__in=fields).delete()
+        LeaderboardHistogram.objects.bulk_create(rows, batch_size=1000)
+    return len(rows)
+
+
+def field_total(field):
+    """Return the number of entries in ``field`` according to its histogram."""
+    return LeaderboardHistogram.objects.filter(field=field).aggregate(
+        total=Sum('count')
+    )['total'] or 0
+
+
+def get_percentile(field, score):
+    """
+    Estimate where ``score`` ranks in ``field`` from the histogram.
+
+    ``rank`` estimates 1 + the number of entries with a higher score, so
+    tied entries share a rank. Within the score's bucket, entries are
+    assumed to be spread evenly over the bucket's score range; buckets
+    below ``EXACT_LIMIT`` hold a single score, so there it is exact.
+
+    Args:
+        field: Field/category
+        score: Score to place
+
+    Returns:
+        Dictionary with total entries, estimated rank, the ``rank_low`` /
+        ``rank_high`` bounds the exact rank is guaranteed to lie in, and
+        ``top_percent`` (estimated rank as a percentage of entries)
+    """
+    bucket = score_bucket(score)
+    above = same = total = 0
+    for other, count in LeaderboardHistogram.objects.filter(
+        field=field, count__gt=0
+    ).values_list('bucket', 'count'):
+        total += count
+        if other > bucket:
+            above += count
+        elif other == bucket:
+            same = count
+
+    if not same:
+        # The score is not in the histogram (e.g. a hypothetical score).
+        rank_low = rank_high = rank = above + 1
+    else:
+        low, high = bucket_bounds(bucket)
+        same_above = (high - score) * same / (high - low + 1)
+        rank_low, rank_high = above + 1, above + same
+        rank = min(rank_low + int(same_above + 0.5), rank_high)
+
+    return {
+        'total': total,
+        'rank': rank,
+        'rank_low': rank_low,
+        'rank_high': rank_high,
+        'top_percent': round(100.0 * rank / total, 2) if total else None,
+    }
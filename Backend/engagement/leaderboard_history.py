@@ -0,0 +1,82 @@
+"""
+Daily rank history for rank-over-time charts.
+
+LeaderboardUpdate records every individual rank change, which is too
+write-heavy and too fine-grained to chart from. Instead,
+``snapshot_ranks`` (``manage.py snapshot_leaderboard_ranks``, run once a
+day) copies every Leaderboard row's current rank and score into one
+LeaderboardRankHistory row per (user, field, day). Re-running it on the
+same day overwrites that day's rows, so it is safe to retry.
+
+``get_rank_history`` reads a user's series for one field and date range
+from the unique (user, field, day) index in a single range scan.
+"""
+
+from django.db import transaction
+from django.utils import timezone
+
+from .leaderboard_models import Leaderboard, LeaderboardRankHistory
+
+
+SNAPSHOT_BATCH_SIZE = 1000
+
+
+def snapshot_ranks(day=None):
+    """
+    Record every leaderboard entry's rank and score for ``day``.
+
+    Args:
+        day: Snapshot day (defaults to today)
+
+    Returns:
+        Number of history rows written
+    """
+    day = day or timezone.localdate()
+    rows = (
+        Leaderboard.objects.filter(rank__gt=0)
+        .order_by('id')
+        .values_list('user_id', 'field', 'rank', 'score')
+    )
+
+    written = 0
+    batch = []
+    with transaction.atomic():
+        for user_id, field, rank, score in rows.iterator(chunk_size=SNAPSHOT_BATCH_SIZE):
+            batch.append(LeaderboardRankHistory(
+                user_id=user_id, field=field, day=day, rank=rank, score=score
+            ))
+            if len(batch) >= SNAPSHOT_BATCH_SIZE:
+                written += _write_batch(batch)
+                batch = []
+        if batch:
+            written += _write_batch(batch)
+    return written
+
+
+def _write_batch(batch):
+    LeaderboardRankHistory.objects.bulk_create(
+        batch,
+        update_conflicts=True,
+        unique_fields=['user', 'field', 'day'],
+        update_fields=['rank', 'score'],
+    )
+    return len(batch)
+
+
+def get_rank_history(user_id, field, start, end):
+    """
+    Get a user's daily rank and score in a field, oldest first.
+
+    Args:
+        user_id: User ID
+        field: Field/category
+        start: First day (inclusive)
+        end: Last day (inclusive)
+
+    Returns:
+        List of dicts with day, rank and score
+    """
+    rows = LeaderboardRankHistory.objects.filter(
+        user_id=user_id, field=field, day__gte=start, day__lte=end
+    ).order_by('day').values_list('day', 'rank', 'score')
+    return [{'day': day, 'rank': rank, 'score': score} for day, rank, score in rows]
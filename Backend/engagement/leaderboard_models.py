@@ -1,7 +1,5 @@
 from django.db import models
 from django.conf import settings
-from django.utils import timezone
-from datetime import timedelta
 
 
 class Leaderboard(models.Model):
@@ -12,10 +10,11 @@ class Leaderboard(models.Model):
     Fields:
     - user: FK to CustomUser
     - field: Field of achievement (academics, sports, music, dance, etc.)
-    - score: Total engagement score (likes + comments*2 + follows*5)
+    - score: Total engagement score (weighted likes, comments and follows;
+      see ScoringConfig)
     - rank: Current rank in the field
-    - weekly_score: Score for current week
-    - monthly_score: Score for current month
+    - weekly_score: Score over the rolling last 7 days
+    - monthly_score: Score over the rolling last 30 days
     - all_time_score: Total all-time score
     - updated_at: Last update timestamp
     """
@@ -62,8 +61,14 @@ class Leaderboard(models.Model):
         unique_together = ('user', 'field')
         ordering = ['-score']
         indexes = [
-            models.Index(fields=['field', '-score']),
-            models.Index(fields=['user', 'field']),
+            models.Index(fields=['field', '-score', 'id']),
+            # Covers the friends-only join (see leaderboard_following).
+            models.Index(fields=['user', 'field', 'score']),
+            models.Index(fields=['field', '-weekly_score']),
+            models.Index(fields=['field', '-monthly_score']),
+            models.Index(fields=['-weekly_score']),
+            models.Index(fields=['-monthly_score']),
+            models.Index(fields=['-score', 'id']),
         ]
     
     def __str__(self):
@@ -71,25 +76,15 @@ class Leaderboard(models.Model):
     
     def calculate_score(self):
         """Calculate leaderboard score based on engagement."""
-        # Score formula: likes (1 pt) + comments (2 pts) + follows (5 pts)
-        return (self.total_likes * 1) + (self.total_comments * 2) + (self.total_follows * 5)
-    
-    def reset_weekly_if_needed(self):
-        """Reset weekly score if a week has passed."""
-        now = timezone.now()
-        if self.weekly_reset_at is None or (now - self.weekly_reset_at) >= timedelta(days=7):
-            self.weekly_score = 0
-            self.weekly_reset_at = now
-            self.save()
-    
-    def reset_monthly_if_needed(self):
-        """Reset monthly score if a month has passed."""
-        now = timezone.now()
-        if self.monthly_reset_at is None or (now - self.monthly_reset_at) >= timedelta(days=30):
-            self.monthly_score = 0
-            self.monthly_reset_at = now
-            self.save()
-
+        # Weights come from the ScoringConfig in effect (default 1/2/5)
+        from .leaderboard_scoring import get_weights
+        weights = get_weights()
+        return (
+            self.total_likes * weights['like']
+            + self.total_comments * weights['comment']
+            + self.total_follows * weights['follow']
+        )
+    
 
 class LeaderboardUpdate(models.Model):
     """
@@ -135,7 +130,291 @@ class LeaderboardUpdate(models.Model):
         ordering = ['-created_at']
         indexes = [
             models.Index(fields=['leaderboard', '-created_at']),
+            models.Index(fields=['-created_at', '-id']),
+            # Updates still waiting for the debounced re-rank (fill_new_ranks).
+            models.Index(
+                fields=['leaderboard'],
+                condition=models.Q(new_rank__isnull=True),
+                name='lb_update_rank_pending',
+            ),
         ]
     
     def __str__(self):
         return f"Rank {self.previous_rank} → {self.new_rank} for {self.leaderboard.user}"
+
+
+class LeaderboardOutbox(models.Model):
+    """
+    Pending leaderboard score change, written in the same transaction as the
+    like/comment/follow that caused it and applied later by
+    ``manage.py leaderboard_worker``.
+    
+    Fields:
+    - kind: Engagement type (like, comment, follow)
+    - user_id: User whose leaderboard changes (plain column so the row can be
+      written while the user or post is being cascade-deleted)
+    - field: Field/category of the leaderboard
+    - delta: +1 for a new engagement, -1 for a removed one
+    - post_id: Related post (optional)
+    - occurred_at: When the engagement happened; picks the score bucket
+    - locked_by / locked_until: Lease held by a worker on backends without
+      SELECT ... FOR UPDATE SKIP LOCKED
+    - attempts: Failed processing attempts
+    - dead_lettered_at: Set once ``attempts`` reaches the worker's limit; the
+      row is then kept for inspection in the admin but never retried
+    - created_at: Timestamp
+    """
+    
+    KIND_CHOICES = [
+        ('like', 'Like on Post'),
+        ('comment', 'Comment on Post'),
+        ('follow', 'User Followed'),
+    ]
+    
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    user_id = models.BigIntegerField()
+    field = models.CharField(max_length=50, choices=Leaderboard.FIELD_CHOICES)
+    delta = models.IntegerField(default=1)
+    post_id = models.BigIntegerField(null=True, blank=True)
+    occurred_at = models.DateTimeField(null=True, blank=True)
+    
+    locked_by = models.CharField(max_length=64, blank=True, default='')
+    locked_until = models.DateTimeField(null=True, blank=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    dead_lettered_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        ordering = ['id']
+        indexes = [
+            models.Index(fields=['locked_until', 'id']),
+        ]
+    
+    def __str__(self):
+        return f"{self.kind} {self.delta:+d} for user {self.user_id} in {self.field}"
+
+
+class LeaderboardScoreBucket(models.Model):
+    """
+    Score earned by one leaderboard entry on one day.
+    
+    Rolling ``weekly_score``/``monthly_score`` on Leaderboard are the sums
+    of the buckets inside each window; they are maintained incrementally by
+    adding to today's bucket and subtracting buckets as they expire (see
+    engagement/leaderboard_windows.py). Buckets older than the longest
+    window are pruned.
+    
+    Fields:
+    - leaderboard: FK to Leaderboard
+    - day: Calendar day (UTC) the score was earned
+    - score: Points earned that day
+    """
+    
+    leaderboard = models.ForeignKey(
+        Leaderboard,
+        on_delete=models.CASCADE,
+        related_name='score_buckets'
+    )
+    day = models.DateField()
+    score = models.PositiveIntegerField(default=0)
+    
+    class Meta:
+        unique_together = ('leaderboard', 'day')
+        indexes = [
+            models.Index(fields=['day']),
+        ]
+    
+    def __str__(self):
+        return f"{self.leaderboard_id} on {self.day}: {self.score}"
+
+
+class LeaderboardWindow(models.Model):
+    """
+    How far each rolling window has been advanced.
+    
+    Buckets with ``day <= rolled_through`` have already been subtracted
+    from the window's score column.
+    
+    Fields:
+    - period: 'weekly' or 'monthly'
+    - rolled_through: Last day expired from the window
+    """
+    
+    period = models.CharField(max_length=20, unique=True)
+    rolled_through = models.DateField()
+    
+    def __str__(self):
+        return f"{self.period} rolled through {self.rolled_through}"
+
+
+class LeaderboardRankHistory(models.Model):
+    """
+    Daily snapshot of a user's rank and score in one field.
+    
+    Written once a day by ``manage.py snapshot_leaderboard_ranks`` from the
+    current Leaderboard rows and used for rank-over-time charts; unlike
+    LeaderboardUpdate it grows by one narrow row per entry per day, no
+    matter how often the rank changed. The unique (user, field, day) index
+    serves a user's history for a date range as a single range scan.
+    
+    Fields:
+    - user: FK to CustomUser
+    - field: Field of the leaderboard
+    - day: Calendar day of the snapshot
+    - rank: Rank at snapshot time
+    - score: Score at snapshot time
+    """
+    
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='leaderboard_history'
+    )
+    field = models.CharField(max_length=50, choices=Leaderboard.FIELD_CHOICES)
+    day = models.DateField()
+    rank = models.PositiveIntegerField()
+    score = models.PositiveIntegerField()
+    
+    class Meta:
+        unique_together = ('user', 'field', 'day')
+        indexes = [
+            models.Index(fields=['day']),
+        ]
+    
+    def __str__(self):
+        return f"{self.user_id} in {self.field} on {self.day}: #{self.rank}"
+
+
+class LeaderboardUpdateSummary(models.Model):
+    """
+    Daily roll-up of LeaderboardUpdate rows for one leaderboard entry.
+    
+    ``manage.py prune_leaderboard_updates`` folds audit rows older than the
+    retention period into these summaries before deleting them, so the
+    per-event log stays small while daily totals are kept.
+    
+    Fields:
+    - leaderboard: FK to Leaderboard
+    - day: Calendar day the updates happened
+    - update_count: Number of updates folded in
+    - score_change: Sum of their score changes
+    - best_rank / worst_rank: Lowest and highest new_rank seen that day
+    """
+    
+    leaderboard = models.ForeignKey(
+        Leaderboard,
+        on_delete=models.CASCADE,
+        related_name='update_summaries'
+    )
+    day = models.DateField()
+    update_count = models.PositiveIntegerField(default=0)
+    score_change = models.IntegerField(default=0)
+    best_rank = models.PositiveIntegerField(null=True, blank=True)
+    worst_rank = models.PositiveIntegerField(null=True, blank=True)
+    
+    class Meta:
+        unique_together = ('leaderboard', 'day')
+    
+    def __str__(self):
+        return f"{self.leaderboard_id} on {self.day}: {self.update_count} updates"
+
+
+class LeaderboardHistogram(models.Model):
+    """
+    Number of leaderboard entries per score bucket in a field.
+    
+    Maintained incrementally as scores change and used to answer "top N%"
+    percentile lookups without counting Leaderboard rows; see
+    engagement/leaderboard_histogram.py for the bucket layout.
+    
+    Fields:
+    - field: Field of the leaderboard
+    - bucket: Score bucket index
+    - count: Entries whose score falls in the bucket
+    """
+    
+    field = models.CharField(max_length=50, choices=Leaderboard.FIELD_CHOICES)
+    bucket = models.PositiveIntegerField()
+    count = models.PositiveIntegerField(default=0)
+    
+    class Meta:
+        unique_together = ('field', 'bucket')
+    
+    def __str__(self):
+        return f"{self.field} bucket {self.bucket}: {self.count}"
+
+
+class ScoringConfig(models.Model):
+    """
+    Versioned leaderboard scoring weights.
+    
+    Rows are never edited: changing the weights adds a row with the next
+    version, and the highest version is the one in effect. See
+    engagement/leaderboard_scoring.py.
+    
+    Fields:
+    - version: Increasing version number
+    - like_weight / comment_weight / follow_weight: Points per engagement
+    - note: Why the weights changed
+    - created_by: Who changed them (optional)
+    - created_at: Timestamp
+    """
+    
+    version = models.PositiveIntegerField(unique=True)
+    like_weight = models.PositiveSmallIntegerField()
+    comment_weight = models.PositiveSmallIntegerField()
+    follow_weight = models.PositiveSmallIntegerField()
+    note = models.CharField(max_length=200, blank=True, default='')
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+'
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        ordering = ['-version']
+    
+    def __str__(self):
+        return (
+            f"v{self.version}: like={self.like_weight} comment={self.comment_weight} "
+            f"follow={self.follow_weight}"
+        )
+
+
+class OverallLeaderboard(models.Model):
+    """
+    Cross-field leaderboard: one row per user.
+    
+    ``score`` is the sum of the user's Leaderboard scores across fields. It
+    is kept up to date by the same write path as the field scores (see
+    engagement/leaderboard_overall.py), so reading the overall ranking
+    never aggregates Leaderboard rows.
+    
+    Fields:
+    - user: The ranked user
+    - score: Sum of the user's field scores
+    - rank: Current overall rank (1 = highest score, ties by id)
+    - updated_at: Last update timestamp
+    """
+    
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='overall_leaderboard'
+    )
+    score = models.PositiveIntegerField(default=0)
+    rank = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        ordering = ['-score']
+        indexes = [
+            models.Index(fields=['-score', 'id']),
+            models.Index(fields=['rank']),
+        ]
+    
+    def __str__(self):
+        return f"{self.user.username} - overall (Rank: {self.rank})"
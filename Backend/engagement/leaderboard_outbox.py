@@ -0,0 +1,219 @@
+"""
+Transactional outbox for leaderboard side effects.
+
+Signal handlers only append a LeaderboardOutbox row inside the request's
+transaction, so like/comment/follow latency no longer depends on the size
+of the leaderboard. ``manage.py leaderboard_worker`` drains the outbox in
+batches through ``LeaderboardService.apply_events``.
+
+Several workers can run at once:
+
+- On backends with ``SELECT ... FOR UPDATE SKIP LOCKED`` (PostgreSQL) each
+  worker locks its own batch for the duration of the transaction.
+- Elsewhere (SQLite) a worker first claims a batch by writing a lease
+  (``locked_by``/``locked_until``); an expired lease can be taken over.
+
+Rows are deleted in the same transaction that applies them, so a crash at
+any point either applies a batch completely or leaves it in the outbox.
+
+If applying a batch raises, the batch is split in half and each half is
+retried in its own savepoint until the failing rows are isolated. The rest
+of the batch is applied as usual. Only the failing rows have ``attempts``
+incremented, and a row reaching ``MAX_ATTEMPTS`` is dead-lettered: it stays
+in the table with ``dead_lettered_at`` set, is logged, and is listed in the
+admin, where it can be requeued.
+"""
+
+import logging
+import os
+import socket
+import uuid
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .leaderboard_models import LeaderboardOutbox
+from .leaderboard_service import LeaderboardService, LeaderboardEvent
+from posts.models import Post
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 500
+DEFAULT_LEASE_SECONDS = 60
+MAX_ATTEMPTS = 5
+
+
+def enqueue(kind, user_id, field, delta=1, post_id=None, occurred_at=None):
+    """
+    Append a pending score change to the outbox.
+
+    Call from inside the transaction that created or deleted the engagement.
+    ``occurred_at`` is when the engagement was created, also for removals,
+    so the points come out of the right daily score bucket.
+    """
+    return LeaderboardOutbox.objects.create(
+        kind=kind,
+        user_id=user_id,
+        field=field,
+        delta=delta,
+        post_id=post_id,
+        occurred_at=occurred_at
+    )
+
+
+def default_worker_id():
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+def _pending():
+    return LeaderboardOutbox.objects.filter(dead_lettered_at__isnull=True)
+
+
+def _claim_with_lease(worker_id, batch_size, lease_seconds):
+    """Lease up to ``batch_size`` unclaimed rows to ``worker_id``."""
+    now = timezone.now()
+    claimable = _pending().filter(
+        Q(locked_until__isnull=True) | Q(locked_until__lt=now)
+    ).order_by('id').values('id')[:batch_size]
+    LeaderboardOutbox.objects.filter(id__in=claimable).update(
+        locked_by=worker_id,
+        locked_until=now + timedelta(seconds=lease_seconds)
+    )
+    return LeaderboardOutbox.objects.filter(
+        locked_by=worker_id,
+        locked_until__gt=now
+    ).order_by('id')
+
+
+def _apply(rows):
+    """Apply outbox rows, skipping users and posts deleted since enqueueing."""
+    user_ids = {row.user_id for row in rows}
+    post_ids = {row.post_id for row in rows if row.post_id is not None}
+    live_users = set(
+        get_user_model().objects.filter(id__in=user_ids).values_list('id', flat=True)
+    )
+    live_posts = set(Post.objects.filter(id__in=post_ids).values_list('id', flat=True))
+
+    LeaderboardService.apply_events([
+        LeaderboardEvent(
+            row.kind,
+            row.user_id,
+            row.field,
+            row.delta,
+            row.post_id if row.post_id in live_posts else None,
+            row.occurred_at
+        )
+        for row in rows
+        if row.user_id in live_users
+    ])
+
+
+def _apply_isolating_failures(rows):
+    """
+    Apply ``rows`` in order, bisecting on failure.
+
+    Each attempt runs in a savepoint, so a failing half leaves no partial
+    writes behind and the other half is still applied.
+
+    Returns:
+        Rows that failed on their own
+    """
+    try:
+        with transaction.atomic():
+            _apply(rows)
+        return []
+    except Exception:
+        if len(rows) == 1:
+            logger.exception('Failed to apply leaderboard outbox row %s', rows[0].id)
+            return rows
+    middle = len(rows) // 2
+    return _apply_isolating_failures(rows[:middle]) + _apply_isolating_failures(rows[middle:])
+
+
+def _record_failures(rows):
+    """Count a failed attempt on ``rows`` and dead-letter those out of attempts."""
+    ids = [row.id for row in rows]
+    LeaderboardOutbox.objects.filter(id__in=ids).update(
+        attempts=F('attempts') + 1,
+        locked_by='',
+        locked_until=None
+    )
+    dead = list(
+        LeaderboardOutbox.objects.filter(id__in=ids, attempts__gte=MAX_ATTEMPTS).values_list('id', flat=True)
+    )
+    if dead:
+        LeaderboardOutbox.objects.filter(id__in=dead).update(dead_lettered_at=timezone.now())
+        logger.error(
+            'Dead-lettered leaderboard outbox rows %s after %d attempts', dead, MAX_ATTEMPTS
+        )
+
+
+def drain_batch(worker_id=None, batch_size=DEFAULT_BATCH_SIZE, lease_seconds=DEFAULT_LEASE_SECONDS):
+    """
+    Apply and delete one batch of outbox rows.
+
+    Rows that fail are kept for retry, or dead-lettered once they have
+    failed ``MAX_ATTEMPTS`` times.
+
+    Returns:
+        Number of outbox rows processed, including failed ones
+    """
+    worker_id = worker_id or default_worker_id()
+    skip_locked = connection.features.has_select_for_update_skip_locked
+
+    rows = claimed = []
+    if not skip_locked:
+        with transaction.atomic():
+            claimed = list(_claim_with_lease(worker_id, batch_size, lease_seconds))
+        if not claimed:
+            return 0
+
+    try:
+        with transaction.atomic():
+            if skip_locked:
+                rows = list(
+                    _pending().select_for_update(skip_locked=True).order_by('id')[:batch_size]
+                )
+            else:
+                # Re-read under the transaction: drop rows whose lease expired
+                # and was taken over by another worker in the meantime.
+                rows = list(
+                    LeaderboardOutbox.objects.filter(
+                        id__in=[row.id for row in claimed],
+                        locked_by=worker_id
+                    ).order_by('id')
+                )
+            if not rows:
+                return 0
+            failed = _apply_isolating_failures(rows)
+            if failed:
+                _record_failures(failed)
+            failed_ids = {row.id for row in failed}
+            LeaderboardOutbox.objects.filter(
+                id__in=[row.id for row in rows if row.id not in failed_ids]
+            ).delete()
+            return len(rows)
+    except Exception:
+        logger.exception('Failed to apply leaderboard outbox batch')
+        failed_ids = [row.id for row in (rows if skip_locked else claimed)]
+        LeaderboardOutbox.objects.filter(id__in=failed_ids).update(locked_by='', locked_until=None)
+        raise
+
+
+def drain_outbox(worker_id=None, batch_size=DEFAULT_BATCH_SIZE, lease_seconds=DEFAULT_LEASE_SECONDS):
+    """
+    Drain the outbox until it is empty.
+
+    Returns:
+        Total number of outbox rows processed
+    """
+    worker_id = worker_id or default_worker_id()
+    total = 0
+    while True:
+        processed = drain_batch(worker_id, batch_size, lease_seconds)
+        if not processed:
+            return total
+        total += processed
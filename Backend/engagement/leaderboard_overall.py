@@ -0,0 +1,175 @@
+"""
+Overall (cross-field) leaderboard maintained alongside the field scores.
+
+OverallLeaderboard holds one row per user whose score is the sum of their
+Leaderboard scores. Instead of a GROUP BY over Leaderboard per read, the
+write path passes each field score change on as a per-user delta:
+
+- ``LeaderboardService.apply_score_delta`` and ``apply_events`` call
+  ``apply_overall_deltas`` inside their transaction: one
+  ``INSERT ... ON CONFLICT DO NOTHING`` for new users and one UPDATE with a
+  CASE per user, however many users changed;
+- ranks are recomputed by ``rank_overall`` with a single window-function
+  UPDATE, debounced like a field (``mark_field_dirty(OVERALL)``) or
+  straight after a batch of events;
+- bulk rewrites of Leaderboard scores (``rescore``, ``rebuild_leaderboards``)
+  finish with ``rebuild_overall``, which recomputes every row from
+  Leaderboard. Run it once after deploying
+  (``manage.py rebuild_overall_leaderboard``) to fill the table.
+"""
+
+from django.db import connection, transaction
+from django.db.models import Case, F, Sum, Value, When
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from .leaderboard_models import Leaderboard, OverallLeaderboard
+from .leaderboard_ranking import BULK_UPDATE_BATCH_SIZE, supports_window_update
+from .leaderboard_snapshots import bump_scopes
+
+
+# Snapshot version scope and dirty-flag name of the overall ranking.
+OVERALL = 'overall'
+
+OVERALL_COLUMNS = (
+    ('id', 'id'),
+    ('user_id', 'user_id'),
+    ('username', 'user__username'),
+    ('score', 'score'),
+    ('rank', 'rank'),
+)
+
+
+def overall_deltas(changes):
+    """
+    Sum field score changes per user.
+
+    Args:
+        changes: Iterable of (user_id, old score or None, new score)
+
+    Returns:
+        Dictionary of user_id -> overall score change, for users whose
+        score changed or who got a new Leaderboard row (old score None)
+    """
+    deltas = {}
+    created = set()
+    for user_id, old, new in changes:
+        deltas[user_id] = deltas.get(user_id, 0) + new - (old or 0)
+        if old is None:
+            created.add(user_id)
+    return {
+        user_id: delta for user_id, delta in deltas.items()
+        if delta or user_id in created
+    }
+
+
+def apply_overall_deltas(deltas):
+    """
+    Add per-user score changes to the overall leaderboard.
+
+    Args:
+        deltas: Dictionary of user_id -> score change, from overall_deltas
+
+    Returns:
+        Number of overall rows updated
+    """
+    if not deltas:
+        return 0
+    OverallLeaderboard.objects.bulk_create(
+        [OverallLeaderboard(user_id=user_id) for user_id in deltas],
+        ignore_conflicts=True
+    )
+    whens = [When(user_id=user_id, then=Value(delta)) for user_id, delta in deltas.items()]
+    return OverallLeaderboard.objects.filter(user_id__in=deltas).update(
+        score=Greatest(F('score') + Case(*whens, default=Value(0)), Value(0)),
+        updated_at=timezone.now()
+    )
+
+
+def rank_overall_sql():
+    """Recompute overall ranks with one window-function UPDATE."""
+    qn = connection.ops.quote_name
+    table = qn(OverallLeaderboard._meta.db_table)
+    sql = (
+        f"UPDATE {table} SET {qn('rank')} = ranked.new_rank "
+        f"FROM ("
+        f"SELECT {qn('id')} AS overall_id, ROW_NUMBER() OVER ("
+        f"ORDER BY {qn('score')} DESC, {qn('id')} ASC"
+        f") AS new_rank FROM {table}"
+        f") AS ranked "
+        f"WHERE {table}.{qn('id')} = ranked.overall_id "
+        f"AND {table}.{qn('rank')} <> ranked.new_rank"
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql)
+        return cursor.rowcount
+
+
+def rank_overall_python():
+    """Recompute overall ranks in Python, writing only moved rows."""
+    rows = OverallLeaderboard.objects.order_by('-score', 'id').values_list('id', 'rank')
+    changed = [
+        OverallLeaderboard(id=pk, rank=position)
+        for position, (pk, rank) in enumerate(rows.iterator(chunk_size=BULK_UPDATE_BATCH_SIZE), 1)
+        if rank != position
+    ]
+    if changed:
+        with transaction.atomic():
+            OverallLeaderboard.objects.bulk_update(
+                changed, ['rank'], batch_size=BULK_UPDATE_BATCH_SIZE
+            )
+    return len(changed)
+
+
+def rank_overall():
+    """
+    Recompute overall ranks (1 = highest score, ties by id).
+
+    Returns:
+        Number of overall rows whose rank changed
+    """
+    bump_scopes([OVERALL])
+    if supports_window_update():
+        return rank_overall_sql()
+    return rank_overall_python()
+
+
+def rebuild_overall(batch_size=BULK_UPDATE_BATCH_SIZE):
+    """
+    Recompute every overall score from Leaderboard, then re-rank.
+
+    One grouped aggregate over Leaderboard, written with bulk upserts;
+    users left without any Leaderboard row are removed.
+
+    Returns:
+        Number of overall rows written
+    """
+    started = timezone.now()
+    totals = (
+        Leaderboard.objects.order_by()
+        .values('user_id')
+        .annotate(total=Sum('score'))
+        .values_list('user_id', 'total')
+    )
+    written = 0
+    with transaction.atomic():
+        batch = []
+        for user_id, total in totals.iterator(chunk_size=batch_size):
+            batch.append(OverallLeaderboard(user_id=user_id, score=total, updated_at=started))
+            if len(batch) == batch_size:
+                written += _upsert(batch)
+                batch = []
+        written += _upsert(batch)
+        OverallLeaderboard.objects.filter(updated_at__lt=started).delete()
+        rank_overall()
+    return written
+
+
+def _upsert(rows):
+    OverallLeaderboard.objects.bulk_create(
+        rows,
+        update_conflicts=True,
+        unique_fields=['user'],
+        update_fields=['score', 'updated_at']
+    )
+    return len(rows)
@@ -0,0 +1,176 @@
+"""
+Keyset (cursor) pagination for leaderboard list endpoints.
+
+Pages are ordered by a sort column plus a unique tie-breaker, e.g.
+``(-score, id)`` or ``(-created_at, -id)``. The cursor is the key of the
+last row served, and the next page starts with a range condition on the
+sort column:
+
+    score <= :score AND NOT (score = :score AND id <= :id)
+
+which an index on the sort column serves as a range scan. No COUNT(*) or
+OFFSET is involved, so page 1000 costs the same as page 1.
+"""
+
+import base64
+import json
+
+from rest_framework.exceptions import NotFound
+from rest_framework.filters import OrderingFilter
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Forward-only cursor pagination on a ``(sort column, tie-breaker)`` key.
+
+    The sort column defaults to ``ordering[0]`` and follows the view's
+    OrderingFilter when a client picks a different one; the tie-breaker is
+    always ``ordering[1]``, which must be unique.
+    """
+
+    ordering = ('-score', 'id')
+    page_size = 20
+    max_page_size = 100
+    page_size_query_param = 'page_size'
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except (TypeError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def get_ordering(self, request, queryset, view):
+        """Return ``(sort column, tie-breaker)`` for this request."""
+        sort, tiebreak = self.ordering
+        for backend in getattr(view, 'filter_backends', []):
+            if issubclass(backend, OrderingFilter):
+                chosen = backend().get_ordering(request, queryset, view)
+                if chosen:
+                    sort = chosen[0]
+                break
+        return sort, tiebreak
+
+    def encode_cursor(self, values):
+        # Full isoformat: DjangoJSONEncoder drops microseconds, which would
+        # skip or repeat rows created within the same millisecond.
+        raw = json.dumps(values, default=lambda value: value.isoformat()).encode('utf-8')
+        return base64.urlsafe_b64encode(raw).decode('ascii')
+
+    def decode_cursor(self, request, queryset, columns):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            values = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')))
+            if len(values) != len(columns):
+                raise ValueError(encoded)
+            return [
+                queryset.model._meta.get_field(column.lstrip('-')).to_python(value)
+                for column, value in zip(columns, values)
+            ]
+        except Exception:
+            raise NotFound(self.invalid_cursor_message)
+
+    @staticmethod
+    def row_value(row, name):
+        """Read a key column from a model instance or a ``values()`` dict."""
+        return row[name] if isinstance(row, dict) else getattr(row, name)
+
+    @staticmethod
+    def after(queryset, column, value, inclusive):
+        """Filter ``queryset`` to rows strictly/inclusively after ``value``."""
+        name = column.lstrip('-')
+        descending = column.startswith('-')
+        op = ('lte' if inclusive else 'lt') if descending else ('gte' if inclusive else 'gt')
+        return queryset.filter(**{f'{name}__{op}': value})
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size_value = self.get_page_size(request)
+        sort, tiebreak = self.get_ordering(request, queryset, view)
+        same_column = sort.lstrip('-') == tiebreak.lstrip('-')
+        columns = [sort] if same_column else [sort, tiebreak]
+
+        queryset = queryset.order_by(*columns)
+        cursor = self.decode_cursor(request, queryset, columns)
+        if cursor is not None:
+            if len(columns) == 1:
+                queryset = self.after(queryset, sort, cursor[0], inclusive=False)
+            else:
+                sort_name = sort.lstrip('-')
+                tiebreak_name = tiebreak.lstrip('-')
+                tiebreak_op = 'gte' if tiebreak.startswith('-') else 'lte'
+                queryset = self.after(queryset, sort, cursor[0], inclusive=True).exclude(**{
+                    sort_name: cursor[0],
+                    f'{tiebreak_name}__{tiebreak_op}': cursor[1],
+                })
+
+        return self._page(list(queryset[:self.page_size_value + 1]), columns)
+
+    def paginate_first_rows(self, rows, request):
+        """
+        Paginate the start of a list that was read elsewhere.
+
+        Args:
+            rows: At least ``page size + 1`` leading rows (or all of them),
+                already in the default ordering
+            request: The request, for the page size and ``next`` link
+
+        Returns:
+            The first page of ``rows``; ``get_next_link`` then points at
+            the second page exactly as after ``paginate_queryset``
+        """
+        self.request = request
+        self.page_size_value = self.get_page_size(request)
+        return self._page(list(rows[:self.page_size_value + 1]), self.ordering)
+
+    def _page(self, rows, columns):
+        self.has_next = len(rows) > self.page_size_value
+        rows = rows[:self.page_size_value]
+        self.next_cursor = None
+        if self.has_next:
+            last = rows[-1]
+            self.next_cursor = self.encode_cursor(
+                [self.row_value(last, column.lstrip('-')) for column in columns]
+            )
+        return rows
+
+    def get_next_link(self):
+        if not self.next_cursor:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.next_cursor)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+
+class LeaderboardPagination(KeysetPagination):
+    """Leaderboard entries in ranking order: score descending, ties by id."""
+
+    ordering = ('-score', 'id')
+
+
+class LeaderboardUpdatePagination(KeysetPagination):
+    """Score change log, newest first."""
+
+    ordering = ('-created_at', '-id')
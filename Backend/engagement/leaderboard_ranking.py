@@ -0,0 +1,129 @@
+"""
+Set-based rank recomputation for leaderboard fields.
+
+Ranks are assigned with ``ROW_NUMBER() OVER (PARTITION BY field ORDER BY
+score DESC, id ASC)`` in a single UPDATE on backends that support window
+functions in an ``UPDATE ... FROM`` (PostgreSQL, SQLite >= 3.33). Other
+backends fall back to computing ranks in Python and writing the changed
+rows with ``bulk_update``.
+
+Ties are broken by primary key so that both paths give identical, stable
+results: equal scores keep distinct ranks, earliest entry first.
+"""
+
+from django.db import connection, transaction
+
+from .leaderboard_models import Leaderboard
+from .leaderboard_snapshots import bump_versions
+
+
+BULK_UPDATE_BATCH_SIZE = 500
+
+
+def supports_window_update(conn=None):
+    """
+    Return True if the backend can rank a field in a single UPDATE statement.
+    """
+    conn = conn or connection
+    if conn.vendor == 'postgresql':
+        return True
+    if conn.vendor == 'sqlite':
+        # Window functions arrived in 3.25, UPDATE ... FROM in 3.33.
+        return conn.Database.sqlite_version_info >= (3, 33, 0)
+    return False
+
+
+def _normalize_fields(fields):
+    if fields is None:
+        return [code for code, _ in Leaderboard.FIELD_CHOICES]
+    if isinstance(fields, str):
+        return [fields]
+    return list(fields)
+
+
+def rank_fields_sql(fields=None):
+    """
+    Recompute ranks for the given fields with one window-function UPDATE.
+
+    Only rows whose rank actually moved are written.
+
+    Returns:
+        Number of leaderboard rows whose rank changed
+    """
+    fields = _normalize_fields(fields)
+    if not fields:
+        return 0
+
+    qn = connection.ops.quote_name
+    table = qn(Leaderboard._meta.db_table)
+    placeholders = ', '.join(['%s'] * len(fields))
+    sql = (
+        f"UPDATE {table} SET {qn('rank')} = ranked.new_rank "
+        f"FROM ("
+        f"SELECT {qn('id')} AS lb_id, ROW_NUMBER() OVER ("
+        f"PARTITION BY {qn('field')} ORDER BY {qn('score')} DESC, {qn('id')} ASC"
+        f") AS new_rank "
+        f"FROM {table} WHERE {qn('field')} IN ({placeholders})"
+        f") AS ranked "
+        f"WHERE {table}.{qn('id')} = ranked.lb_id "
+        f"AND {table}.{qn('rank')} <> ranked.new_rank"
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, fields)
+        return cursor.rowcount
+
+
+def rank_fields_python(fields=None):
+    """
+    Recompute ranks for the given fields in Python.
+
+    Streams ``(id, field, rank)`` tuples in rank order and writes only the
+    rows whose rank moved with ``bulk_update``.
+
+    Returns:
+        Number of leaderboard rows whose rank changed
+    """
+    fields = _normalize_fields(fields)
+    if not fields:
+        return 0
+
+    rows = (
+        Leaderboard.objects.filter(field__in=fields)
+        .order_by('field', '-score', 'id')
+        .values_list('id', 'field', 'rank')
+    )
+
+    changed = []
+    current_field = None
+    position = 0
+    for pk, field, rank in rows.iterator(chunk_size=BULK_UPDATE_BATCH_SIZE):
+        if field != current_field:
+            current_field = field
+            position = 0
+        position += 1
+        if rank != position:
+            changed.append(Leaderboard(id=pk, rank=position))
+
+    if changed:
+        with transaction.atomic():
+            Leaderboard.objects.bulk_update(
+                changed, ['rank'], batch_size=BULK_UPDATE_BATCH_SIZE
+            )
+    return len(changed)
+
+
+def rank_fields(fields=None):
+    """
+    Recompute ranks for one field, a list of fields, or every field.
+
+    Picks the single-statement path when the backend supports it, and
+    invalidates the cached snapshots of the ranked fields.
+
+    Returns:
+        Number of leaderboard rows whose rank changed
+    """
+    fields = _normalize_fields(fields)
+    bump_versions(fields)
+    if supports_window_update():
+        return rank_fields_sql(fields)
+    return rank_fields_python(fields)
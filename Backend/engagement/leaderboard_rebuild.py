@@ -0,0 +1,204 @@
+"""
+Full rebuild of leaderboard counters from the raw engagement tables.
+
+Leaderboard counters are maintained incrementally and can drift (a failed
+outbox batch, rows removed by raw SQL, cascades that skipped signals).
+``rebuild_field`` recomputes a field's counters from Like, Comment and
+Follow and writes back only the rows that differ:
+
+- users are processed in ranges of ``chunk_size`` ids, so memory is bounded
+  by the chunk rather than by the number of engagement rows;
+- for each range, three grouped COUNT queries (likes and comments joined to
+  ``Post.category``, follows joined to ``CustomUser.field_of_interest``) are
+  compared with the existing leaderboard rows;
+- changed rows are written with ``bulk_update``, missing ones with
+  ``bulk_create``.
+
+``rebuild_leaderboards`` runs fields in parallel on a process pool, then
+re-ranks every rebuilt field and recomputes its score histogram once.
+
+Counters are overwritten with absolute values, so stop
+``manage.py leaderboard_worker`` while a rebuild runs; outbox entries
+applied concurrently could otherwise be counted twice or lost. Weekly and
+monthly scores are owned by the daily score buckets and are not touched.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.contrib.auth import get_user_model
+from django.db import connections, transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from .leaderboard_histogram import rebuild_histograms
+from .leaderboard_models import Leaderboard
+from .leaderboard_overall import rebuild_overall
+from .leaderboard_ranking import BULK_UPDATE_BATCH_SIZE, rank_fields
+from .leaderboard_service import LeaderboardService
+from .leaderboard_snapshots import bump_user_versions
+from .models import Like, Comment, Follow
+from posts.models import Post
+
+
+CHUNK_SIZE = 2000
+
+COUNTER_COLUMNS = ('total_likes', 'total_comments', 'total_follows')
+
+
+def _field_filter(column, field):
+    """Match rows whose category/interest maps to ``field`` ('' counts as 'other')."""
+    if field == 'other':
+        return Q(**{f'{column}__in': ['', 'other']})
+    return Q(**{column: field})
+
+
+def target_fields():
+    """Every field that has engagement or an existing leaderboard row."""
+    fields = {code for code, _ in Leaderboard.FIELD_CHOICES}
+    fields.update(Leaderboard.objects.order_by().values_list('field', flat=True).distinct())
+    fields.update(Post.objects.order_by().values_list('category', flat=True).distinct())
+    fields.update(
+        get_user_model().objects.order_by().values_list('field_of_interest', flat=True).distinct()
+    )
+    fields.discard('')
+    return sorted(fields)
+
+
+def user_id_ranges(chunk_size=CHUNK_SIZE):
+    """Yield ``(first, last)`` user id bounds of consecutive chunks."""
+    users = get_user_model().objects.order_by('id').values_list('id', flat=True)
+    last = 0
+    while True:
+        ids = list(users.filter(id__gt=last)[:chunk_size])
+        if not ids:
+            return
+        yield ids[0], ids[-1]
+        last = ids[-1]
+
+
+def _grouped_counts(queryset, user_column, first, last):
+    """Return ``{user_id: count}`` for users in ``[first, last]``."""
+    return dict(
+        queryset.filter(**{f'{user_column}__gte': first, f'{user_column}__lte': last})
+        .order_by()
+        .values(user_column)
+        .annotate(total=Count('id'))
+        .values_list(user_column, 'total')
+    )
+
+
+def rebuild_field(field, dry_run=False, chunk_size=CHUNK_SIZE):
+    """
+    Recompute one field's counters and write the rows that drifted.
+
+    Does not re-rank; see ``rebuild_leaderboards``.
+
+    Args:
+        field: Field/category to rebuild
+        dry_run: Compute the diff without writing it
+        chunk_size: Number of user ids per chunk
+
+    Returns:
+        Dictionary with the field and counts of checked, updated and
+        created rows
+    """
+    weights = {column: weight for column, weight in LeaderboardService.counters().values()}
+    likes = Like.objects.filter(_field_filter('post__category', field))
+    comments = Comment.objects.filter(_field_filter('post__category', field))
+    follows = Follow.objects.filter(_field_filter('following__field_of_interest', field))
+    result = {'field': field, 'checked': 0, 'updated': 0, 'created': 0}
+
+    for first, last in user_id_ranges(chunk_size):
+        expected = {}
+        for column, counts in (
+            ('total_likes', _grouped_counts(likes, 'post__user_id', first, last)),
+            ('total_comments', _grouped_counts(comments, 'post__user_id', first, last)),
+            ('total_follows', _grouped_counts(follows, 'following_id', first, last)),
+        ):
+            for user_id, total in counts.items():
+                expected.setdefault(user_id, dict.fromkeys(COUNTER_COLUMNS, 0))[column] = total
+
+        existing = {
+            row['user_id']: row
+            for row in Leaderboard.objects.filter(
+                field=field, user_id__gte=first, user_id__lte=last
+            ).order_by().values('id', 'user_id', 'score', 'all_time_score', *COUNTER_COLUMNS)
+        }
+
+        now = timezone.now()
+        to_update, to_create, changed_users = [], [], []
+        for user_id in expected.keys() | existing.keys():
+            counters = expected.get(user_id, dict.fromkeys(COUNTER_COLUMNS, 0))
+            score = sum(counters[column] * weights[column] for column in COUNTER_COLUMNS)
+            row = existing.get(user_id)
+            result['checked'] += 1
+            if row is None:
+                to_create.append(Leaderboard(
+                    user_id=user_id, field=field, score=score, all_time_score=score, **counters
+                ))
+                changed_users.append(user_id)
+            elif any(row[column] != counters[column] for column in COUNTER_COLUMNS) \
+                    or row['score'] != score or row['all_time_score'] != score:
+                to_update.append(Leaderboard(
+                    id=row['id'], score=score, all_time_score=score, updated_at=now, **counters
+                ))
+                changed_users.append(user_id)
+
+        result['updated'] += len(to_update)
+        result['created'] += len(to_create)
+        if dry_run or not (to_update or to_create):
+            continue
+
+        with transaction.atomic():
+            Leaderboard.objects.bulk_update(
+                to_update,
+                [*COUNTER_COLUMNS, 'score', 'all_time_score', 'updated_at'],
+                batch_size=BULK_UPDATE_BATCH_SIZE
+            )
+            Leaderboard.objects.bulk_create(
+                to_create, ignore_conflicts=True, batch_size=BULK_UPDATE_BATCH_SIZE
+            )
+            bump_user_versions(changed_users)
+
+    return result
+
+
+def _rebuild_field_task(args):
+    field, dry_run, chunk_size = args
+    try:
+        return rebuild_field(field, dry_run, chunk_size)
+    finally:
+        connections.close_all()
+
+
+def rebuild_leaderboards(fields=None, dry_run=False, workers=1, chunk_size=CHUNK_SIZE):
+    """
+    Rebuild the given fields (default: all), then re-rank them,
+    recompute their score histograms and the overall leaderboard once.
+
+    Args:
+        fields: Fields to rebuild, or None for every field with data
+        dry_run: Report the diff without writing anything
+        workers: Number of processes; 1 runs in the current process
+        chunk_size: Number of user ids per chunk
+
+    Returns:
+        List of per-field results from ``rebuild_field``
+    """
+    fields = list(fields) if fields else target_fields()
+    tasks = [(field, dry_run, chunk_size) for field in fields]
+
+    if workers > 1 and len(fields) > 1:
+        # Children must open their own connections rather than share ours.
+        connections.close_all()
+        with ProcessPoolExecutor(max_workers=workers, initializer=django.setup) as pool:
+            results = list(pool.map(_rebuild_field_task, tasks))
+    else:
+        results = [rebuild_field(*task) for task in tasks]
+
+    if not dry_run:
+        rank_fields(fields)
+        rebuild_histograms(fields)
+        rebuild_overall()
+    return results
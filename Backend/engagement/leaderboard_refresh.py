@@ -0,0 +1,101 @@
+"""
+Coalesced, debounced rank refresh for leaderboard fields.
+
+Score changes are written immediately; ranks are not. Instead, the write
+path marks the field dirty in the cache and ranks are recomputed at most
+once per ``LEADERBOARD_RANK_DEBOUNCE_SECONDS`` per field:
+
+- After the surrounding transaction commits, the writer tries to flush.
+  The first writer in a debounce window re-ranks the field, the rest
+  only leave it marked dirty.
+- ``manage.py flush_leaderboard_ranks --loop`` picks up fields that stay
+  dirty once traffic stops, so ranks settle within one window.
+
+The overall leaderboard (leaderboard_overall) is debounced the same way
+under the name ``OVERALL``.
+"""
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from .leaderboard_audit import fill_new_ranks
+from .leaderboard_models import Leaderboard
+from .leaderboard_overall import OVERALL, rank_overall
+from .leaderboard_ranking import rank_fields
+
+
+DIRTY_KEY = 'leaderboard:dirty:{field}'
+THROTTLE_KEY = 'leaderboard:ranked:{field}'
+
+
+def get_debounce_seconds():
+    return getattr(settings, 'LEADERBOARD_RANK_DEBOUNCE_SECONDS', 5)
+
+
+def flush_on_commit_enabled():
+    return getattr(settings, 'LEADERBOARD_RANK_FLUSH_ON_COMMIT', True)
+
+
+def mark_field_dirty(field):
+    """
+    Record that scores in ``field`` changed and its ranks need a refresh.
+
+    Keeps the time of the first unflushed change so the flusher can report
+    how stale a field's ranks are.
+    """
+    cache.add(DIRTY_KEY.format(field=field), timezone.now().timestamp(), timeout=None)
+    if flush_on_commit_enabled():
+        transaction.on_commit(lambda: flush_field(field))
+
+
+def get_dirty_fields():
+    """
+    Return a dict of dirty field codes (and ``OVERALL``) to the timestamp
+    they were first marked.
+    """
+    codes = [code for code, _ in Leaderboard.FIELD_CHOICES] + [OVERALL]
+    keys = {DIRTY_KEY.format(field=code): code for code in codes}
+    found = cache.get_many(keys.keys())
+    return {keys[key]: marked_at for key, marked_at in found.items()}
+
+
+def flush_field(field, force=False):
+    """
+    Re-rank ``field`` unless it was already ranked within the debounce window.
+
+    Args:
+        field: Field/category to re-rank, or ``OVERALL``
+        force: Ignore the debounce window
+
+    Returns:
+        True if the field was re-ranked
+    """
+    throttle_key = THROTTLE_KEY.format(field=field)
+    if force:
+        cache.set(throttle_key, 1, timeout=get_debounce_seconds())
+    elif not cache.add(throttle_key, 1, timeout=get_debounce_seconds()):
+        return False
+
+    # Clear before ranking so changes made while ranking mark it dirty again.
+    cache.delete(DIRTY_KEY.format(field=field))
+    if field == OVERALL:
+        rank_overall()
+    else:
+        rank_fields(field)
+        fill_new_ranks(field)
+    return True
+
+
+def flush_dirty_fields(force=False):
+    """
+    Re-rank every dirty field whose debounce window has elapsed.
+
+    Returns:
+        List of field codes that were re-ranked
+    """
+    return [
+        field for field in get_dirty_fields()
+        if flush_field(field, force=force)
+    ]
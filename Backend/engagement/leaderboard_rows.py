@@ -0,0 +1,117 @@
+"""
+Fast read path for leaderboard list responses.
+
+The list endpoints return many rows of a few flat columns. Going through
+``ModelSerializer`` means building a model instance (and a related user
+instance) per row and running every DRF field on it, which dominates CPU
+time for lists of 50-500 rows. Here each response shape is a tuple of
+``(output key, queryset column)`` pairs; rows are fetched with
+``values_list`` (user columns joined in the same query) and zipped into
+dicts directly.
+
+Each shape produces exactly the JSON of the serializer it stands in for:
+
+- ``DETAIL_COLUMNS``       -> LeaderboardSerializer
+- ``LIST_COLUMNS``         -> LeaderboardListSerializer
+- ``TIME_SERIES_COLUMNS``  -> LeaderboardTimeSeriesSerializer
+
+Keep them in sync when a serializer's fields change.
+"""
+
+from rest_framework import serializers
+
+
+DETAIL_COLUMNS = (
+    ('id', 'id'),
+    ('user_id', 'user_id'),
+    ('user_username', 'user__username'),
+    ('user_email', 'user__email'),
+    ('field', 'field'),
+    ('score', 'score'),
+    ('rank', 'rank'),
+    ('weekly_score', 'weekly_score'),
+    ('monthly_score', 'monthly_score'),
+    ('all_time_score', 'all_time_score'),
+    ('total_likes', 'total_likes'),
+    ('total_comments', 'total_comments'),
+    ('total_follows', 'total_follows'),
+    ('created_at', 'created_at'),
+    ('updated_at', 'updated_at'),
+)
+
+LIST_COLUMNS = (
+    ('id', 'id'),
+    ('username', 'user__username'),
+    ('field', 'field'),
+    ('score', 'score'),
+    ('rank', 'rank'),
+    ('total_likes', 'total_likes'),
+    ('total_comments', 'total_comments'),
+    ('total_follows', 'total_follows'),
+)
+
+TIME_SERIES_COLUMNS = (
+    ('id', 'id'),
+    ('username', 'user__username'),
+    ('field', 'field'),
+    ('rank', 'rank'),
+    ('weekly_score', 'weekly_score'),
+    ('monthly_score', 'monthly_score'),
+    ('all_time_score', 'all_time_score'),
+)
+
+# Formats datetimes exactly like the serializers do (settings-aware ISO 8601).
+_DATETIME = serializers.DateTimeField()
+_FORMATTERS = {
+    'created_at': _DATETIME.to_representation,
+    'updated_at': _DATETIME.to_representation,
+}
+
+
+def row_values(queryset, columns):
+    """
+    Restrict ``queryset`` to the source columns of a response shape.
+
+    Returns a ``values()`` queryset (dict rows keyed by source column) that
+    can still be filtered, ordered and paginated; pass its rows to
+    ``build_rows``.
+    """
+    return queryset.values(*(source for _, source in columns))
+
+
+def build_rows(rows, columns):
+    """Turn ``values()`` dicts from ``row_values`` into response dicts."""
+    formatters = [(key, source, _FORMATTERS.get(key)) for key, source in columns]
+    return [
+        {
+            key: format(row[source]) if format and row[source] is not None else row[source]
+            for key, source, format in formatters
+        }
+        for row in rows
+    ]
+
+
+def fetch_rows(queryset, columns):
+    """
+    Fetch a response shape straight from ``queryset`` with ``values_list``.
+
+    Args:
+        queryset: Leaderboard queryset, already filtered, ordered and sliced
+        columns: One of the ``*_COLUMNS`` shapes
+
+    Returns:
+        List of response dicts
+    """
+    keys = [key for key, _ in columns]
+    rows = queryset.values_list(*(source for _, source in columns))
+    formatted = [(index, _FORMATTERS[key]) for index, key in enumerate(keys) if key in _FORMATTERS]
+    if not formatted:
+        return [dict(zip(keys, row)) for row in rows]
+    result = []
+    for row in rows:
+        row = list(row)
+        for index, format in formatted:
+            if row[index] is not None:
+                row[index] = format(row[index])
+        result.append(dict(zip(keys, row)))
+    return result
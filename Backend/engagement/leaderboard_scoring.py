@@ -0,0 +1,184 @@
+"""
+Single source of truth for leaderboard scoring weights.
+
+The weights live in ScoringConfig; the row with the highest version is in
+effect, and ``DEFAULT_WEIGHTS`` apply until the first one is saved. They
+are used by every score computation:
+
+- LeaderboardService (likes, comments and follows per field);
+- ``Leaderboard.calculate_score``;
+- core.rankings (UserFieldRanking, which only has likes and comments).
+
+Each process keeps its copy of the weights, tagged with the version it
+was loaded at. ``set_weights`` publishes the new version in the shared
+cache once it commits, and every read compares against it, so all
+processes switch on their next batch rather than after a timeout. The
+copy is also reloaded after ``LEADERBOARD_SCORING_TTL`` seconds (default
+60) in case the published version was evicted.
+
+Changing weights does not touch stored scores. ``rescore`` (``manage.py
+rescore_leaderboards``) recomputes ``score``/``all_time_score`` from the
+counters with one set-based UPDATE per id range, then re-ranks and
+rebuilds the score histograms. Weekly/monthly scores come from daily
+buckets that do not record which engagement earned the points, so they
+move to the new weights as the windows roll over.
+"""
+
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import F, Max, Min, Q, Value
+from django.utils import timezone
+
+from .leaderboard_models import Leaderboard, ScoringConfig
+
+
+DEFAULT_WEIGHTS = {'like': 1, 'comment': 2, 'follow': 5}
+
+# Engagement kind -> Leaderboard counter column
+COUNTER_COLUMNS = {
+    'like': 'total_likes',
+    'comment': 'total_comments',
+    'follow': 'total_follows',
+}
+
+RESCORE_BATCH_SIZE = 50000
+
+# Shared cache key holding the version in effect (0 for the defaults).
+SCORING_VERSION_KEY = 'leaderboard:scoring:version'
+
+_loaded = {'weights': None, 'version': None, 'at': 0.0}
+
+
+def get_cache_ttl():
+    return getattr(settings, 'LEADERBOARD_SCORING_TTL', 60)
+
+
+def clear_weights_cache():
+    """Forget this process's copy of the weights."""
+    _loaded['weights'] = None
+
+
+def _is_stale():
+    if _loaded['weights'] is None or time.monotonic() - _loaded['at'] > get_cache_ttl():
+        return True
+    published = cache.get(SCORING_VERSION_KEY)
+    return published is not None and published != (_loaded['version'] or 0)
+
+
+def _load():
+    if _is_stale():
+        row = ScoringConfig.objects.order_by('-version').values_list(
+            'version', 'like_weight', 'comment_weight', 'follow_weight'
+        ).first()
+        if row is None:
+            _loaded['version'], weights = None, dict(DEFAULT_WEIGHTS)
+        else:
+            _loaded['version'], like, comment, follow = row
+            weights = {'like': like, 'comment': comment, 'follow': follow}
+        _loaded['weights'], _loaded['at'] = weights, time.monotonic()
+        # Re-publish after an eviction; never overwrites a newer version.
+        cache.add(SCORING_VERSION_KEY, _loaded['version'] or 0, timeout=None)
+    return _loaded
+
+
+def get_weights():
+    """Return the weights in effect as ``{kind: points}``."""
+    return dict(_load()['weights'])
+
+
+def get_version():
+    """Return the ScoringConfig version in effect, or None for the defaults."""
+    return _load()['version']
+
+
+def get_counters():
+    """Return ``{kind: (counter column, weight)}`` for the weights in effect."""
+    weights = _load()['weights']
+    return {kind: (column, weights[kind]) for kind, column in COUNTER_COLUMNS.items()}
+
+
+def set_weights(like, comment, follow, user=None, note=''):
+    """
+    Save new weights as the next ScoringConfig version.
+
+    Stored scores keep the old weights until ``rescore`` runs. Other
+    processes pick the new version up once this transaction commits.
+
+    Returns:
+        The new ScoringConfig
+    """
+    for _ in range(3):
+        version = (ScoringConfig.objects.aggregate(latest=Max('version'))['latest'] or 0) + 1
+        try:
+            with transaction.atomic():
+                config = ScoringConfig.objects.create(
+                    version=version,
+                    like_weight=like,
+                    comment_weight=comment,
+                    follow_weight=follow,
+                    created_by=user,
+                    note=note
+                )
+        except IntegrityError:
+            # Another writer took this version number; retry with the next.
+            continue
+        clear_weights_cache()
+        transaction.on_commit(lambda: cache.set(SCORING_VERSION_KEY, version, timeout=None))
+        return config
+    raise IntegrityError('Could not allocate a scoring config version')
+
+
+def score_expression(counters=None):
+    """Database expression computing a Leaderboard score from its counters."""
+    counters = counters or get_counters()
+    expression = Value(0)
+    for column, weight in counters.values():
+        expression = expression + F(column) * weight
+    return expression
+
+
+def rescore(fields=None, batch_size=RESCORE_BATCH_SIZE):
+    """
+    Recompute stored scores from the counters with the current weights.
+
+    Rows are updated in primary-key ranges of ``batch_size``, each with one
+    UPDATE in its own transaction that only writes rows whose score
+    changed; the fields are then re-ranked, their histograms rebuilt and
+    the overall leaderboard recomputed.
+
+    Args:
+        fields: Fields to rescore (default: all)
+        batch_size: Primary-key range per UPDATE
+
+    Returns:
+        Number of leaderboard rows whose score changed
+    """
+    # Imported here: the service module imports this one.
+    from .leaderboard_histogram import rebuild_histograms
+    from .leaderboard_overall import rebuild_overall
+    from .leaderboard_ranking import rank_fields
+    from .leaderboard_snapshots import FIELD_CODES
+
+    fields = list(fields) if fields else FIELD_CODES
+    clear_weights_cache()
+    score = score_expression()
+    rows = Leaderboard.objects.filter(field__in=fields)
+    bounds = rows.aggregate(first=Min('id'), last=Max('id'))
+    first, last = bounds['first'], bounds['last']
+
+    changed = 0
+    if last is not None:
+        now = timezone.now()
+        for start in range(first, last + 1, batch_size):
+            with transaction.atomic():
+                changed += rows.filter(id__gte=start, id__lt=start + batch_size).filter(
+                    ~Q(score=score) | ~Q(all_time_score=score)
+                ).update(score=score, all_time_score=score, updated_at=now)
+
+    rank_fields(fields)
+    rebuild_histograms(fields)
+    rebuild_overall()
+    return changed
@@ -1,6 +1,7 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
 from .leaderboard_models import Leaderboard, LeaderboardUpdate
+from .leaderboard_user_stats import get_user_stats
 
 User = get_user_model()
 
@@ -62,20 +63,21 @@ class UserLeaderboardStatsSerializer(serializers.Serializer):
     username = serializers.CharField(read_only=True)
     email = serializers.CharField(read_only=True)
     field_of_interest = serializers.CharField(read_only=True)
-    leaderboards = LeaderboardListSerializer(many=True, read_only=True)
+    leaderboards = serializers.SerializerMethodField()
     total_score = serializers.SerializerMethodField()
     total_rank = serializers.SerializerMethodField()
     
+    def get_leaderboards(self, obj):
+        """List the user's leaderboard entries, highest score first."""
+        return get_user_stats(obj.id)['leaderboards']
+    
     def get_total_score(self, obj):
         """Calculate total score across all fields."""
-        return sum([lb.score for lb in obj.leaderboards.all()])
+        return get_user_stats(obj.id)['total_score']
     
     def get_total_rank(self, obj):
         """Calculate average rank across all fields."""
-        leaderboards = obj.leaderboards.all()
-        if leaderboards.exists():
-            return round(sum([lb.rank for lb in leaderboards]) / leaderboards.count())
-        return 0
+        return get_user_stats(obj.id)['avg_rank']
 
 
 class LeaderboardTimeSeriesSerializer(serializers.ModelSerializer):
@@ -2,23 +2,177 @@
 Leaderboard service functions for score calculation and ranking updates.
 """
 
-from django.db.models import F
+import logging
+from collections import namedtuple
+
+from django.db import transaction
+from django.db.models import F, Value, Window
+from django.db.models.functions import Greatest, RowNumber
 from django.utils import timezone
-from datetime import timedelta
-from .leaderboard_models import Leaderboard, LeaderboardUpdate
+from .leaderboard_audit import log_update, log_updates
+from .leaderboard_histogram import histogram_deltas, shift_histogram
+from .leaderboard_models import Leaderboard, LeaderboardScoreBucket
+from .leaderboard_overall import (
+    OVERALL, apply_overall_deltas, overall_deltas, rank_overall
+)
+from .leaderboard_ranking import rank_fields
+from .leaderboard_rows import LIST_COLUMNS, fetch_rows
+from .leaderboard_scoring import DEFAULT_WEIGHTS, get_counters
+from .leaderboard_refresh import mark_field_dirty
+from .leaderboard_snapshots import bump_user_versions
+from .leaderboard_topn import number_rows
+from .leaderboard_user_stats import get_user_stats
+from .leaderboard_windows import (
+    add_to_bucket,
+    bucket_day,
+    get_rolled_through,
+    roll_windows,
+    window_columns,
+)
 from posts.models import Post
 from engagement.models import Like, Comment, Follow
 
+logger = logging.getLogger(__name__)
+
+
+# A single engagement event for LeaderboardService.apply_events.
+# kind is 'like', 'comment' or 'follow'; delta is +n to add, -n to remove;
+# occurred_at picks the daily score bucket (defaults to now).
+LeaderboardEvent = namedtuple(
+    'LeaderboardEvent',
+    ['kind', 'user_id', 'field', 'delta', 'post_id', 'occurred_at'],
+    defaults=[1, None, None]
+)
+
 
 class LeaderboardService:
     """
     Service class for managing leaderboard scores and rankings.
     """
     
-    # Score weights
-    LIKE_WEIGHT = 1
-    COMMENT_WEIGHT = 2
-    FOLLOW_WEIGHT = 5
+    # Default score weights; the weights in effect come from ScoringConfig
+    LIKE_WEIGHT = DEFAULT_WEIGHTS['like']
+    COMMENT_WEIGHT = DEFAULT_WEIGHTS['comment']
+    FOLLOW_WEIGHT = DEFAULT_WEIGHTS['follow']
+    
+    @staticmethod
+    def counters():
+        """Engagement reason -> (counter column, weight) for the weights in effect."""
+        return get_counters()
+    
+    @staticmethod
+    def _shifted(column, amount):
+        """F() expression for ``column + amount``, floored at zero when removing."""
+        if amount >= 0:
+            return F(column) + amount
+        return Greatest(F(column) - (-amount), Value(0))
+    
+    @staticmethod
+    def apply_score_delta(user_id, field, reason, count=1, occurred_at=None):
+        """
+        Atomically add (or remove, with a negative count) engagement for a user.
+        
+        Issues a single UPDATE with F() expressions so concurrent workers never
+        lose increments; the row is created first if it does not exist yet.
+        Counters and time-based scores never drop below zero, and ``score``
+        is recomputed from the new counters like ``calculate_score``.
+        
+        The points also go into the daily score bucket for ``occurred_at``;
+        weekly/monthly scores only change if that day is still inside the
+        rolling window.
+        
+        Args:
+            user_id: ID of the user whose leaderboard changes
+            field: Field/category of the leaderboard
+            reason: One of 'like', 'comment', 'follow'
+            count: Number of engagements to add (negative to remove)
+            occurred_at: When the engagement happened (defaults to now)
+        
+        Returns:
+            ID of the updated Leaderboard, or None if there was nothing to remove
+        """
+        counters = LeaderboardService.counters()
+        changed_column, weight = counters[reason]
+        shift = LeaderboardService._shifted
+        day = bucket_day(occurred_at)
+        
+        score = Value(0)
+        for column, column_weight in counters.values():
+            counter = shift(column, count) if column == changed_column else F(column)
+            score = score + counter * column_weight
+        
+        updates = {
+            changed_column: shift(changed_column, count),
+            'all_time_score': shift('all_time_score', weight * count),
+            'score': score,
+            'updated_at': timezone.now(),
+        }
+        for column in window_columns(day, get_rolled_through()):
+            updates[column] = shift(column, weight * count)
+        
+        rows = Leaderboard.objects.filter(user_id=user_id, field=field)
+        with transaction.atomic():
+            old_score = None
+            if count < 0:
+                # Removals may floor at zero, so the old score is read first.
+                old_score = rows.select_for_update().values_list('score', flat=True).first()
+                if old_score is None:
+                    return None
+            
+            created = False
+            if not rows.update(**updates):
+                # First engagement for this (user, field): create the row,
+                # tolerating a concurrent insert, then apply the same atomic update.
+                Leaderboard.objects.bulk_create(
+                    [Leaderboard(user_id=user_id, field=field)],
+                    ignore_conflicts=True
+                )
+                rows.update(**updates)
+                created = True
+            
+            leaderboard_id, new_score = rows.values_list('id', 'score').get()
+            if count > 0:
+                # Additions never floor, so the old score follows from the new one.
+                old_score = new_score - weight * count
+                if created and old_score == 0:
+                    old_score = None
+            shift_histogram(histogram_deltas([(field, old_score, new_score)]))
+            apply_overall_deltas(overall_deltas([(user_id, old_score, new_score)]))
+            add_to_bucket(leaderboard_id, day, weight * count)
+        bump_user_versions([user_id])
+        return leaderboard_id
+    
+    @staticmethod
+    def _record_score_change(user_id, field, reason, post_id=None, count=1, occurred_at=None):
+        """
+        Apply a score change, schedule a rank refresh and log the update.
+        """
+        leaderboard_id = LeaderboardService.apply_score_delta(
+            user_id, field, reason, count, occurred_at
+        )
+        if leaderboard_id is None:
+            return
+        
+        # Ranks are refreshed after commit, debounced per field
+        mark_field_dirty(field)
+        mark_field_dirty(OVERALL)
+        
+        if count < 0:
+            return
+        
+        rank = Leaderboard.objects.filter(id=leaderboard_id).values_list('rank', flat=True).get()
+        
+        # Log the update. The field is re-ranked later, so new_rank is
+        # filled in by flush_field.
+        _, weight = LeaderboardService.counters()[reason]
+        log_update(
+            leaderboard_id=leaderboard_id,
+            previous_rank=rank or None,
+            new_rank=None,
+            score_change=weight * count,
+            reason=reason,
+            post_id=post_id
+        )
     
     @staticmethod
     def add_like_score(post_id, field):
@@ -29,40 +183,9 @@ class LeaderboardService:
             post_id: ID of the post that was liked
             field: Field/category of the post
         """
-        try:
-            post = Post.objects.get(id=post_id)
-            leaderboard, _ = Leaderboard.objects.get_or_create(
-                user=post.user,
-                field=field
-            )
-            
-            previous_rank = leaderboard.rank
-            
-            # Update counts
-            leaderboard.total_likes += 1
-            leaderboard.all_time_score += LeaderboardService.LIKE_WEIGHT
-            leaderboard.weekly_score += LeaderboardService.LIKE_WEIGHT
-            leaderboard.monthly_score += LeaderboardService.LIKE_WEIGHT
-            leaderboard.score = leaderboard.calculate_score()
-            
-            leaderboard.save()
-            
-            # Update rank
-            new_rank = LeaderboardService.update_rankings(field)
-            new_rank = leaderboard.rank
-            
-            # Log the update
-            LeaderboardUpdate.objects.create(
-                leaderboard=leaderboard,
-                previous_rank=previous_rank,
-                new_rank=new_rank,
-                score_change=LeaderboardService.LIKE_WEIGHT,
-                reason='like',
-                post_id=post_id
-            )
-            
-        except Post.DoesNotExist:
-            pass
+        author_id = Post.objects.filter(id=post_id).values_list('user_id', flat=True).first()
+        if author_id is not None:
+            LeaderboardService._record_score_change(author_id, field, 'like', post_id=post_id)
     
     @staticmethod
     def add_comment_score(post_id, field):
@@ -73,40 +196,9 @@ class LeaderboardService:
             post_id: ID of the post that was commented on
             field: Field/category of the post
         """
-        try:
-            post = Post.objects.get(id=post_id)
-            leaderboard, _ = Leaderboard.objects.get_or_create(
-                user=post.user,
-                field=field
-            )
-            
-            previous_rank = leaderboard.rank
-            
-            # Update counts
-            leaderboard.total_comments += 1
-            leaderboard.all_time_score += LeaderboardService.COMMENT_WEIGHT
-            leaderboard.weekly_score += LeaderboardService.COMMENT_WEIGHT
-            leaderboard.monthly_score += LeaderboardService.COMMENT_WEIGHT
-            leaderboard.score = leaderboard.calculate_score()
-            
-            leaderboard.save()
-            
-            # Update rank
-            new_rank = LeaderboardService.update_rankings(field)
-            new_rank = leaderboard.rank
-            
-            # Log the update
-            LeaderboardUpdate.objects.create(
-                leaderboard=leaderboard,
-                previous_rank=previous_rank,
-                new_rank=new_rank,
-                score_change=LeaderboardService.COMMENT_WEIGHT,
-                reason='comment',
-                post_id=post_id
-            )
-            
-        except Post.DoesNotExist:
-            pass
+        author_id = Post.objects.filter(id=post_id).values_list('user_id', flat=True).first()
+        if author_id is not None:
+            LeaderboardService._record_score_change(author_id, field, 'comment', post_id=post_id)
     
     @staticmethod
     def add_follow_score(user_id, field):
@@ -118,43 +210,174 @@ class LeaderboardService:
             field: Field/category of the user
         """
         try:
-            leaderboard, _ = Leaderboard.objects.get_or_create(
-                user_id=user_id,
-                field=field
+            LeaderboardService._record_score_change(user_id, field, 'follow')
+        except Exception:
+            logger.exception('Failed to update follow score for user %s in %s', user_id, field)
+            raise
+    
+    @staticmethod
+    def remove_score(user_id, field, reason, occurred_at=None):
+        """
+        Update leaderboard when a like, comment or follow is deleted.
+        
+        Args:
+            user_id: ID of the user who loses the points
+            field: Field/category of the leaderboard
+            reason: One of 'like', 'comment', 'follow'
+            occurred_at: When the removed engagement was originally created
+        """
+        LeaderboardService._record_score_change(
+            user_id, field, reason, count=-1, occurred_at=occurred_at
+        )
+    
+    @staticmethod
+    def apply_events(events):
+        """
+        Apply a batch of engagement events in a handful of queries.
+        
+        Events are applied in order with the same semantics as calling
+        ``add_*_score``/``remove_score`` once per event (counters floor at
+        zero, removals from a missing leaderboard are ignored), but all rows
+        are written with one upsert, each affected field is re-ranked once
+        and the audit log is written with one bulk insert.
+        
+        Args:
+            events: Iterable of LeaderboardEvent or
+                (kind, user_id, field, delta, post_id[, occurred_at]) tuples
+        
+        Returns:
+            Number of leaderboard rows written
+        """
+        events = [LeaderboardEvent(*event) for event in events]
+        if not events:
+            return 0
+        
+        counters = LeaderboardService.counters()
+        counter_columns = [column for column, _ in counters.values()]
+        score_columns = ['all_time_score', 'weekly_score', 'monthly_score']
+        keys = {(event.user_id, event.field) for event in events}
+        days = [bucket_day(event.occurred_at) for event in events]
+        
+        with transaction.atomic():
+            existing = Leaderboard.objects.select_for_update().filter(
+                user_id__in={user_id for user_id, _ in keys},
+                field__in={field for _, field in keys}
+            ).order_by().values(
+                'id', 'user_id', 'field', 'rank', 'score', *counter_columns, *score_columns
             )
+            state = {
+                (row['user_id'], row['field']): row
+                for row in existing
+                if (row['user_id'], row['field']) in keys
+            }
+            previous_ranks = {key: row['rank'] for key, row in state.items()}
+            previous_scores = {key: row['score'] for key, row in state.items()}
+            rolled_through = get_rolled_through()
             
-            previous_rank = leaderboard.rank
+            # (user_id, field, day) -> bucket score
+            buckets = {}
+            existing_ids = {row['id']: key for key, row in state.items()}
+            for leaderboard_id, day, score in LeaderboardScoreBucket.objects.filter(
+                leaderboard_id__in=existing_ids,
+                day__in=set(days)
+            ).values_list('leaderboard_id', 'day', 'score'):
+                buckets[existing_ids[leaderboard_id] + (day,)] = score
             
-            # Update counts
-            leaderboard.total_follows += 1
-            leaderboard.all_time_score += LeaderboardService.FOLLOW_WEIGHT
-            leaderboard.weekly_score += LeaderboardService.FOLLOW_WEIGHT
-            leaderboard.monthly_score += LeaderboardService.FOLLOW_WEIGHT
-            leaderboard.score = leaderboard.calculate_score()
+            logged = []
+            for event, day in zip(events, days):
+                key = (event.user_id, event.field)
+                column, weight = counters[event.kind]
+                row = state.get(key)
+                if row is None:
+                    if event.delta < 0:
+                        continue
+                    row = state[key] = dict.fromkeys(counter_columns + score_columns, 0)
+                
+                change = weight * event.delta
+                row[column] = max(0, row[column] + event.delta)
+                row['all_time_score'] = max(0, row['all_time_score'] + change)
+                for score_column in window_columns(day, rolled_through):
+                    row[score_column] = max(0, row[score_column] + change)
+                
+                bucket_key = key + (day,)
+                if bucket_key in buckets or change > 0:
+                    buckets[bucket_key] = max(0, buckets.get(bucket_key, 0) + change)
+                if event.delta > 0:
+                    logged.append(event)
             
-            leaderboard.save()
+            leaderboards = []
+            score_changes = []
+            overall_changes = []
+            for (user_id, field), row in state.items():
+                values = {name: row[name] for name in counter_columns + score_columns}
+                values['score'] = sum(
+                    row[column] * weight
+                    for column, weight in counters.values()
+                )
+                leaderboards.append(Leaderboard(user_id=user_id, field=field, **values))
+                previous_score = previous_scores.get((user_id, field))
+                score_changes.append((field, previous_score, values['score']))
+                overall_changes.append((user_id, previous_score, values['score']))
             
-            # Update rank
-            new_rank = LeaderboardService.update_rankings(field)
-            new_rank = leaderboard.rank
+            Leaderboard.objects.bulk_create(
+                leaderboards,
+                update_conflicts=True,
+                unique_fields=['user', 'field'],
+                update_fields=counter_columns + score_columns + ['score', 'updated_at'],
+                batch_size=1000
+            )
+            shift_histogram(histogram_deltas(score_changes))
+            apply_overall_deltas(overall_deltas(overall_changes))
+            
+            rank_fields(sorted({field for _, field in keys}))
+            rank_overall()
+            bump_user_versions(user_id for user_id, _ in state)
+            
+            current = {
+                (row['user_id'], row['field']): row
+                for row in Leaderboard.objects.filter(
+                    user_id__in={user_id for user_id, _ in state},
+                    field__in={field for _, field in state}
+                ).order_by().values('id', 'user_id', 'field', 'rank')
+            }
             
-            # Log the update
-            LeaderboardUpdate.objects.create(
-                leaderboard=leaderboard,
-                previous_rank=previous_rank,
-                new_rank=new_rank,
-                score_change=LeaderboardService.FOLLOW_WEIGHT,
-                reason='follow'
+            LeaderboardScoreBucket.objects.bulk_create(
+                [
+                    LeaderboardScoreBucket(
+                        leaderboard_id=current[(user_id, field)]['id'],
+                        day=day,
+                        score=score
+                    )
+                    for (user_id, field, day), score in buckets.items()
+                ],
+                update_conflicts=True,
+                unique_fields=['leaderboard', 'day'],
+                update_fields=['score'],
+                batch_size=1000
             )
             
-        except Exception as e:
-            print(f"Error updating follow score: {str(e)}")
+            # Written before the transaction commits, so the log and the
+            # scores land together.
+            log_updates(
+                {
+                    'leaderboard_id': current[(event.user_id, event.field)]['id'],
+                    'previous_rank': previous_ranks.get((event.user_id, event.field)),
+                    'new_rank': current[(event.user_id, event.field)]['rank'],
+                    'score_change': counters[event.kind][1] * event.delta,
+                    'reason': event.kind,
+                    'post_id': event.post_id,
+                }
+                for event in logged
+            )
+        
+        return len(leaderboards)
     
     @staticmethod
     def update_rankings(field):
         """
         Update rankings for a specific field.
-        Assigns rank based on score (1 = highest score).
+        Assigns rank based on score (1 = highest score); equal scores
+        keep distinct ranks, earliest entry first.
         
         Args:
             field: Field/category to update rankings for
@@ -162,16 +385,7 @@ class LeaderboardService:
         Returns:
             Number of leaderboards updated
         """
-        leaderboards = Leaderboard.objects.filter(field=field).order_by('-score')
-        
-        updated_count = 0
-        for rank, leaderboard in enumerate(leaderboards, start=1):
-            if leaderboard.rank != rank:
-                leaderboard.rank = rank
-                leaderboard.save(update_fields=['rank'])
-                updated_count += 1
-        
-        return updated_count
+        return rank_fields(field)
     
     @staticmethod
     def update_all_rankings():
@@ -179,63 +393,47 @@ class LeaderboardService:
         Update rankings for all fields.
         Should be called periodically (via Celery task).
         """
-        for field_code, _ in Leaderboard.FIELD_CHOICES:
-            LeaderboardService.update_rankings(field_code)
+        return rank_fields()
+    
+    @staticmethod
+    def roll_score_windows():
+        """
+        Advance the rolling weekly and monthly windows.
+        Subtracts daily score buckets that have left each window.
+        Should be called at least once per day (manage.py roll_leaderboard_windows).
+        """
+        return roll_windows()
     
     @staticmethod
     def reset_weekly_scores():
         """
-        Reset all weekly scores.
-        Should be called once per week (via Celery task).
+        Expire score buckets that have left the rolling 7-day window.
+        Weekly scores are no longer zeroed; kept for existing schedules.
         """
-        now = timezone.now()
-        reset_count = Leaderboard.objects.filter(
-            weekly_reset_at__lt=now - timedelta(days=7)
-        ).update(weekly_score=0, weekly_reset_at=now)
-        
-        return reset_count
+        return roll_windows()['weekly']
     
     @staticmethod
     def reset_monthly_scores():
         """
-        Reset all monthly scores.
-        Should be called once per month (via Celery task).
+        Expire score buckets that have left the rolling 30-day window.
+        Monthly scores are no longer zeroed; kept for existing schedules.
         """
-        now = timezone.now()
-        reset_count = Leaderboard.objects.filter(
-            monthly_reset_at__lt=now - timedelta(days=30)
-        ).update(monthly_score=0, monthly_reset_at=now)
-        
-        return reset_count
+        return roll_windows()['monthly']
     
     @staticmethod
     def get_user_stats(user_id):
         """
         Get comprehensive stats for a user across all fields.
         
+        Served from the per-user cache in leaderboard_user_stats.
+        
         Args:
             user_id: ID of the user
         
         Returns:
             Dictionary with user stats
         """
-        leaderboards = Leaderboard.objects.filter(user_id=user_id)
-        
-        return {
-            'total_score': sum([lb.score for lb in leaderboards]),
-            'avg_rank': round(sum([lb.rank for lb in leaderboards]) / max(leaderboards.count(), 1)),
-            'field_count': leaderboards.count(),
-            'fields': {
-                lb.field: {
-                    'score': lb.score,
-                    'rank': lb.rank,
-                    'likes': lb.total_likes,
-                    'comments': lb.total_comments,
-                    'follows': lb.total_follows
-                }
-                for lb in leaderboards
-            }
-        }
+        return get_user_stats(user_id)
     
     @staticmethod
     def get_field_leaders(field, limit=10):
@@ -251,6 +449,44 @@ class LeaderboardService:
         """
         return Leaderboard.objects.filter(field=field).order_by('rank')[:limit]
     
+    @staticmethod
+    def get_top_by_field_rows(limit=10):
+        """
+        Get the top ranked users of every field in a single query.
+        
+        Fallback for ``top-by-field`` when ``limit`` is larger than the
+        per-process read model holds (``LEADERBOARD_TOP_N + 1``). Returns
+        the same rows as the read model: entries with rank 0 are left out,
+        the rest are numbered per field with ``ROW_NUMBER() OVER (PARTITION
+        BY field ORDER BY score DESC, id)`` and ``rank`` is that position.
+        Reads flat tuples with ``values_list`` instead of building model
+        instances; see engagement/leaderboard_rows.py.
+        
+        Args:
+            limit: Number of top users to return per field
+        
+        Returns:
+            Dictionary of field -> list of LeaderboardListSerializer-shaped
+            dicts, with an (empty) list for every field in FIELD_CHOICES
+        """
+        top = {field_code: [] for field_code, _ in Leaderboard.FIELD_CHOICES}
+        queryset = (
+            Leaderboard.objects
+            .exclude(rank=0)
+            .annotate(position=Window(
+                RowNumber(),
+                partition_by=F('field'),
+                order_by=[F('score').desc(), F('id').asc()]
+            ))
+            .filter(position__lte=limit)
+            .order_by('field', 'position')
+        )
+        for row in fetch_rows(queryset, LIST_COLUMNS):
+            top.setdefault(row['field'], []).append(row)
+        for rows in top.values():
+            number_rows(rows)
+        return top
+    
     @staticmethod
     def get_weekly_leaders(field=None, limit=10):
         """
@@ -286,3 +522,43 @@ class LeaderboardService:
             queryset = queryset.filter(field=field)
         
         return queryset.order_by('-monthly_score')[:limit]
+    
+    @staticmethod
+    def get_around_user(user_id, field, window=5):
+        """
+        Get the entries just above and below a user in a field.
+        
+        Neighbours are found with two range scans on the (field, -score, id)
+        index starting at the user's own entry, so the cost depends on
+        ``window`` rather than on the size of the field. Order matches
+        ranking: score descending, ties by id.
+        
+        Args:
+            user_id: User whose position to centre on
+            field: Field/category
+            window: Number of entries to return on each side
+        
+        Returns:
+            Tuple of (entry, above, below) where ``above`` is ordered from
+            the highest-ranked neighbour down, or (None, [], []) if the user
+            has no entry in the field
+        """
+        entry = Leaderboard.objects.select_related('user').filter(
+            user_id=user_id, field=field
+        ).first()
+        if entry is None:
+            return None, [], []
+        
+        in_field = Leaderboard.objects.select_related('user').filter(field=field)
+        above = list(
+            in_field.filter(score__gte=entry.score)
+            .exclude(score=entry.score, id__gte=entry.id)
+            .order_by('score', '-id')[:window]
+        )
+        below = list(
+            in_field.filter(score__lte=entry.score)
+            .exclude(score=entry.score, id__lte=entry.id)
+            .order_by('-score', 'id')[:window]
+        )
+        above.reverse()
+        return entry, above, below
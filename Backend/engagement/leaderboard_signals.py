@@ -1,13 +1,27 @@
 """
 Django signals for leaderboard updates.
-Triggered when likes, comments, or follows are created.
+Triggered when likes, comments, or follows are created or deleted.
+
+Handlers only append to the leaderboard outbox inside the current
+transaction; ``manage.py leaderboard_worker`` applies the score changes.
+Follow changes also invalidate the follower's friends-only leaderboard.
 """
 
 from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 from .models import Like, Comment, Follow
-from .leaderboard_service import LeaderboardService
-from posts.models import Post
+from .leaderboard_outbox import enqueue
+from .leaderboard_snapshots import bump_follow_versions
+
+
+def _post_target(post):
+    """Return (author id, field) that a post's engagement scores for."""
+    return post.user_id, post.category if post.category else 'other'
+
+
+def _follow_target(user):
+    """Return (user id, field) that a follow scores for."""
+    return user.id, user.field_of_interest if user.field_of_interest else 'other'
 
 
 @receiver(post_save, sender=Like)
@@ -16,12 +30,8 @@ def update_leaderboard_on_like(sender, instance, created, **kwargs):
     Update leaderboard when a like is created.
     """
     if created:
-        try:
-            post = instance.post
-            field = post.category if post.category else 'other'
-            LeaderboardService.add_like_score(post.id, field)
-        except Exception as e:
-            print(f"Error updating leaderboard on like: {str(e)}")
+        user_id, field = _post_target(instance.post)
+        enqueue('like', user_id, field, 1, instance.post_id, instance.created_at)
 
 
 @receiver(post_delete, sender=Like)
@@ -29,23 +39,8 @@ def update_leaderboard_on_like_delete(sender, instance, **kwargs):
     """
     Update leaderboard when a like is deleted (deduct points).
     """
-    try:
-        from .leaderboard_models import Leaderboard
-        
-        post = instance.post
-        field = post.category if post.category else 'other'
-        
-        leaderboard = Leaderboard.objects.get(user=post.user, field=field)
-        leaderboard.total_likes = max(0, leaderboard.total_likes - 1)
-        leaderboard.all_time_score = max(0, leaderboard.all_time_score - LeaderboardService.LIKE_WEIGHT)
-        leaderboard.weekly_score = max(0, leaderboard.weekly_score - LeaderboardService.LIKE_WEIGHT)
-        leaderboard.monthly_score = max(0, leaderboard.monthly_score - LeaderboardService.LIKE_WEIGHT)
-        leaderboard.score = leaderboard.calculate_score()
-        leaderboard.save()
-        
-        LeaderboardService.update_rankings(field)
-    except Exception as e:
-        print(f"Error updating leaderboard on like delete: {str(e)}")
+    user_id, field = _post_target(instance.post)
+    enqueue('like', user_id, field, -1, instance.post_id, instance.created_at)
 
 
 @receiver(post_save, sender=Comment)
@@ -54,12 +49,8 @@ def update_leaderboard_on_comment(sender, instance, created, **kwargs):
     Update leaderboard when a comment is created.
     """
     if created:
-        try:
-            post = instance.post
-            field = post.category if post.category else 'other'
-            LeaderboardService.add_comment_score(post.id, field)
-        except Exception as e:
-            print(f"Error updating leaderboard on comment: {str(e)}")
+        user_id, field = _post_target(instance.post)
+        enqueue('comment', user_id, field, 1, instance.post_id, instance.created_at)
 
 
 @receiver(post_delete, sender=Comment)
@@ -67,23 +58,8 @@ def update_leaderboard_on_comment_delete(sender, instance, **kwargs):
     """
     Update leaderboard when a comment is deleted (deduct points).
     """
-    try:
-        from .leaderboard_models import Leaderboard
-        
-        post = instance.post
-        field = post.category if post.category else 'other'
-        
-        leaderboard = Leaderboard.objects.get(user=post.user, field=field)
-        leaderboard.total_comments = max(0, leaderboard.total_comments - 1)
-        leaderboard.all_time_score = max(0, leaderboard.all_time_score - LeaderboardService.COMMENT_WEIGHT)
-        leaderboard.weekly_score = max(0, leaderboard.weekly_score - LeaderboardService.COMMENT_WEIGHT)
-        leaderboard.monthly_score = max(0, leaderboard.monthly_score - LeaderboardService.COMMENT_WEIGHT)
-        leaderboard.score = leaderboard.calculate_score()
-        leaderboard.save()
-        
-        LeaderboardService.update_rankings(field)
-    except Exception as e:
-        print(f"Error updating leaderboard on comment delete: {str(e)}")
+    user_id, field = _post_target(instance.post)
+    enqueue('comment', user_id, field, -1, instance.post_id, instance.created_at)
 
 
 @receiver(post_save, sender=Follow)
@@ -92,13 +68,9 @@ def update_leaderboard_on_follow(sender, instance, created, **kwargs):
     Update leaderboard when a user is followed.
     """
     if created:
-        try:
-            # Get the user's primary field
-            user = instance.following
-            field = user.field_of_interest if user.field_of_interest else 'other'
-            LeaderboardService.add_follow_score(user.id, field)
-        except Exception as e:
-            print(f"Error updating leaderboard on follow: {str(e)}")
+        user_id, field = _follow_target(instance.following)
+        enqueue('follow', user_id, field, 1, occurred_at=instance.created_at)
+        bump_follow_versions([instance.follower_id])
 
 
 @receiver(post_delete, sender=Follow)
@@ -106,20 +78,6 @@ def update_leaderboard_on_follow_delete(sender, instance, **kwargs):
     """
     Update leaderboard when a follow is deleted (deduct points).
     """
-    try:
-        from .leaderboard_models import Leaderboard
-        
-        user = instance.following
-        field = user.field_of_interest if user.field_of_interest else 'other'
-        
-        leaderboard = Leaderboard.objects.get(user=user, field=field)
-        leaderboard.total_follows = max(0, leaderboard.total_follows - 1)
-        leaderboard.all_time_score = max(0, leaderboard.all_time_score - LeaderboardService.FOLLOW_WEIGHT)
-        leaderboard.weekly_score = max(0, leaderboard.weekly_score - LeaderboardService.FOLLOW_WEIGHT)
-        leaderboard.monthly_score = max(0, leaderboard.monthly_score - LeaderboardService.FOLLOW_WEIGHT)
-        leaderboard.score = leaderboard.calculate_score()
-        leaderboard.save()
-        
-        LeaderboardService.update_rankings(field)
-    except Exception as e:
-        print(f"Error updating leaderboard on follow delete: {str(e)}")
+    user_id, field = _follow_target(instance.following)
+    enqueue('follow', user_id, field, -1, occurred_at=instance.created_at)
+    bump_follow_versions([instance.follower_id])
@@ -0,0 +1,156 @@
+"""
+Materialized, versioned snapshots of hot leaderboard payloads.
+
+Each leaderboard field has a version number in the cache. It is bumped
+(after commit) whenever the field's scores or ranks are rewritten: when the
+field is re-ranked and when the rolling windows advance. Users get a
+version of their own, bumped whenever one of their rows changes. Snapshots
+store the pre-serialized response payload together with the versions of
+the scopes it was built from.
+
+A read fetches the snapshot and the current versions in one ``get_many``
+round trip and serves the payload as-is when the versions still match, so
+a hot read costs one cache lookup and no database queries. Because the
+versions are read before the payload is rebuilt, a snapshot built
+concurrently with a write is tagged with the older version and rebuilt by
+the next reader.
+"""
+
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .leaderboard_bus import publish
+from .leaderboard_models import Leaderboard
+
+
+VERSION_KEY = 'leaderboard:version:{scope}'
+SNAPSHOT_KEY = 'leaderboard:snapshot:{name}:{scope}'
+
+FIELD_CODES = [code for code, _ in Leaderboard.FIELD_CHOICES]
+
+
+def get_snapshot_timeout():
+    return getattr(settings, 'CACHE_TIMEOUT_LEADERBOARD', 3600)
+
+
+def _initial_version():
+    # Start from the clock rather than 0 so a version key that was evicted
+    # and re-created can never match a snapshot tagged before the eviction.
+    return int(time.time() * 1000)
+
+
+def user_scope(user_id):
+    """Return the version scope covering one user's leaderboard rows."""
+    return f'user:{user_id}'
+
+
+def bump_scopes(scopes):
+    """
+    Invalidate snapshots built from any of ``scopes``.
+
+    Runs after the current transaction commits so readers cannot rebuild
+    a snapshot from uncommitted data under the new version.
+    """
+    scopes = list(scopes)
+
+    def bump():
+        for scope in scopes:
+            key = VERSION_KEY.format(scope=scope)
+            cache.add(key, _initial_version(), timeout=None)
+            try:
+                cache.incr(key)
+            except ValueError:
+                # Evicted between add() and incr(); a fresh key is already new.
+                cache.add(key, _initial_version(), timeout=None)
+
+    if scopes:
+        transaction.on_commit(bump)
+
+
+def bump_versions(fields=None):
+    """Invalidate snapshots built from ``fields`` (default: every field)."""
+    if fields is None:
+        fields = FIELD_CODES
+    elif isinstance(fields, str):
+        fields = [fields]
+    bump_scopes(fields)
+    # Live streams refresh from the same signal (see leaderboard_stream).
+    fields = list(fields)
+    if fields:
+        transaction.on_commit(lambda: publish(fields))
+
+
+def bump_user_versions(user_ids):
+    """Invalidate snapshots built from these users' rows."""
+    bump_scopes(user_scope(user_id) for user_id in set(user_ids))
+
+
+def get_versions(scopes):
+    """Return {scope: version} for ``scopes`` in one cache round trip."""
+    return read_versioned(None, scopes)[1]
+
+
+def read_versioned(key, scopes):
+    """
+    Fetch a cached value and the current versions of ``scopes`` together.
+
+    One ``get_many`` round trip; missing versions are initialised.
+
+    Returns:
+        Tuple of (cached value or None, {scope: version})
+    """
+    version_keys = {scope: VERSION_KEY.format(scope=scope) for scope in scopes}
+    found = cache.get_many(([key] if key else []) + list(version_keys.values()))
+    missing = [k for k in version_keys.values() if k not in found]
+    if missing:
+        cache.set_many({k: _initial_version() for k in missing}, timeout=None)
+        found.update(cache.get_many(missing))
+    versions = {scope: found.get(k) for scope, k in version_keys.items()}
+    return found.get(key), versions
+
+
+def follow_scope(user_id):
+    """Return the version scope covering the accounts a user follows."""
+    return f'follows:{user_id}'
+
+
+def bump_follow_versions(user_ids):
+    """Invalidate snapshots built from these users' follow lists."""
+    bump_scopes(follow_scope(user_id) for user_id in set(user_ids))
+
+
+def get_or_build(name, fields, build, params=(), scopes=()):
+    """
+    Return the snapshot payload for ``name``, rebuilding it if stale.
+
+    Args:
+        name: Snapshot kind (e.g. 'field', 'weekly', 'top-by-field')
+        fields: Leaderboard fields the payload is built from
+        build: Callable returning the payload when the snapshot is stale
+        params: Extra values that distinguish payloads (e.g. limit)
+        scopes: Further version scopes the payload depends on
+            (e.g. ``user_scope(user_id)``)
+
+    Returns:
+        The payload, from cache when current
+    """
+    fields = list(fields)
+    if any(field not in FIELD_CODES for field in fields):
+        return build()
+
+    scope = ':'.join(fields if len(fields) < len(FIELD_CODES) else ['all'])
+    snapshot_key = SNAPSHOT_KEY.format(
+        name=name,
+        scope=':'.join([scope] + [str(param) for param in params])
+    )
+
+    snapshot, versions = read_versioned(snapshot_key, fields + list(scopes))
+    if snapshot is not None and snapshot['versions'] == versions:
+        return snapshot['data']
+
+    data = build()
+    cache.set(snapshot_key, {'versions': versions, 'data': data}, timeout=get_snapshot_timeout())
+    return data
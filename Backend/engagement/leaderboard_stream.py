@@ -0,0 +1,291 @@
+"""
+Live leaderboard push over Server-Sent Events.
+
+``GET /api/leaderboard/stream/?field=music`` opens an ``text/event-stream``
+that starts with a ``snapshot`` event holding the field's top
+``STREAM_TOP_N`` and then sends ``delta`` events listing only the entries
+whose rank or score changed, and the users who left the top N. Entries are
+listed and ranked as by ``top-by-field``: ranked entries only, by score,
+with ``rank`` their position in the list.
+
+Each worker keeps one StreamHub per event loop, with one FieldFeed per
+field that has subscribers. When the leaderboard bus announces a change to
+a field, its feed reloads the top N once (one query), diffs it against the
+previous top N and queues the same delta frame for every subscriber.
+Subscribers are asyncio queues, not threads, so idle connections cost a
+queue and a suspended generator each.
+
+A subscriber whose queue fills up (a client too slow to read) gets its
+pending frames replaced by a fresh snapshot instead of an unbounded
+backlog.
+
+Engagement reaches the leaderboard through the outbox, and
+``apply_events`` re-ranks the fields of each batch before it commits, so
+a field gets at most one delta per applied batch. Direct
+``LeaderboardService.add_*_score`` callers still go through the debounced
+refresh in leaderboard_refresh.
+
+The view is async and must be served through ASGI
+(``elevateu_backend.asgi:application`` under uvicorn workers, as the deploy
+configs do); a sync WSGI worker would be held for the life of each stream.
+"""
+
+import asyncio
+import json
+import logging
+import weakref
+
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse, StreamingHttpResponse
+from rest_framework.exceptions import APIException
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+from .leaderboard_bus import get_bus
+from .leaderboard_models import Leaderboard
+from .leaderboard_rows import fetch_rows
+from .leaderboard_snapshots import FIELD_CODES
+from .leaderboard_topn import TOP_ORDER, number_rows
+
+logger = logging.getLogger(__name__)
+
+STREAM_TOP_N = 50
+HEARTBEAT_SECONDS = 15
+SUBSCRIBER_QUEUE_SIZE = 64
+
+STREAM_COLUMNS = (
+    ('user_id', 'user_id'),
+    ('username', 'user__username'),
+    ('rank', 'rank'),
+    ('score', 'score'),
+)
+
+# Queued in place of pending frames when a subscriber falls behind.
+RESYNC = None
+
+
+def load_top(field, limit=STREAM_TOP_N):
+    """
+    Return the top ``limit`` ranked entries of ``field``.
+
+    Same order and ranks as ``top-by-field`` (see leaderboard_topn).
+    """
+    return number_rows(fetch_rows(
+        Leaderboard.objects.filter(field=field).exclude(rank=0).order_by(*TOP_ORDER)[:limit],
+        STREAM_COLUMNS
+    ))
+
+
+def diff_rows(previous, current):
+    """
+    Compare two top-N lists.
+
+    Returns:
+        Tuple of (entries in ``current`` that are new or changed,
+        user ids in ``previous`` that are no longer in ``current``)
+    """
+    before = {row['user_id']: row for row in previous}
+    changed = [row for row in current if before.get(row['user_id']) != row]
+    present = {row['user_id'] for row in current}
+    removed = [user_id for user_id in before if user_id not in present]
+    return changed, removed
+
+
+def format_event(event, data, event_id=None):
+    """Encode one SSE event."""
+    lines = []
+    if event_id is not None:
+        lines.append(f'id: {event_id}')
+    lines.append(f'event: {event}')
+    lines.append(f'data: {json.dumps(data, separators=(",", ":"))}')
+    return '\n'.join(lines) + '\n\n'
+
+
+class Subscription:
+    """One open stream: a bounded queue of encoded frames."""
+
+    __slots__ = ('feed', 'queue')
+
+    def __init__(self, feed):
+        self.feed = feed
+        self.queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+
+    def send(self, frame):
+        try:
+            self.queue.put_nowait(frame)
+        except asyncio.QueueFull:
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(RESYNC)
+
+
+class FieldFeed:
+    """Current top N of one field and the subscriptions following it."""
+
+    def __init__(self, field):
+        self.field = field
+        self.rows = None
+        self.sequence = 0
+        self.subscriptions = set()
+        self.lock = asyncio.Lock()
+        self.refreshing = False
+        self.pending = False
+
+    def snapshot(self):
+        return format_event(
+            'snapshot',
+            {'field': self.field, 'leaderboards': self.rows},
+            event_id=self.sequence
+        )
+
+    async def load(self):
+        """Load the top N unless already loaded."""
+        async with self.lock:
+            if self.rows is None:
+                self.rows = await sync_to_async(load_top)(self.field)
+
+    async def refresh(self):
+        """
+        Reload the top N and send the delta to every subscription.
+
+        Announcements arriving during a reload are coalesced into one more
+        reload afterwards.
+        """
+        if self.refreshing:
+            self.pending = True
+            return
+        self.refreshing = True
+        try:
+            while True:
+                self.pending = False
+                async with self.lock:
+                    try:
+                        rows = await sync_to_async(load_top)(self.field)
+                    except Exception:
+                        # Subscribers keep the last top N until the next change.
+                        logger.exception('Could not refresh leaderboard stream for %s', self.field)
+                        break
+                    changed, removed = diff_rows(self.rows or [], rows)
+                    self.rows = rows
+                    if changed or removed:
+                        self.sequence += 1
+                        frame = format_event(
+                            'delta',
+                            {'field': self.field, 'changed': changed, 'removed': removed},
+                            event_id=self.sequence
+                        )
+                        for subscription in self.subscriptions:
+                            subscription.send(frame)
+                if not self.pending or not self.subscriptions:
+                    break
+        finally:
+            self.refreshing = False
+
+
+class StreamHub:
+    """The feeds of one event loop."""
+
+    def __init__(self):
+        self.feeds = {}
+        self.tasks = set()
+
+    def on_change(self, fields):
+        """Bus callback: refresh the feeds of ``fields`` that have subscribers."""
+        for field in fields:
+            feed = self.feeds.get(field)
+            if feed is not None and feed.subscriptions:
+                task = asyncio.ensure_future(feed.refresh())
+                self.tasks.add(task)
+                task.add_done_callback(self.tasks.discard)
+
+    async def subscribe(self, field):
+        """
+        Follow ``field``.
+
+        Returns:
+            Tuple of (Subscription, snapshot frame). The snapshot and the
+            deltas queued afterwards are consistent: nothing is sent to the
+            subscription between reading the snapshot and registering it.
+        """
+        feed = self.feeds.get(field)
+        if feed is None:
+            feed = self.feeds[field] = FieldFeed(field)
+        await feed.load()
+        async with feed.lock:
+            subscription = Subscription(feed)
+            feed.subscriptions.add(subscription)
+            return subscription, feed.snapshot()
+
+    def unsubscribe(self, subscription):
+        feed = subscription.feed
+        feed.subscriptions.discard(subscription)
+        if not feed.subscriptions and self.feeds.get(feed.field) is feed:
+            # Drop the cached rows; the next subscriber reloads them.
+            del self.feeds[feed.field]
+
+
+_hubs = weakref.WeakKeyDictionary()
+
+
+def get_hub():
+    """Return the StreamHub of the running event loop, attaching it to the bus."""
+    loop = asyncio.get_running_loop()
+    hub = _hubs.get(loop)
+    if hub is None:
+        hub = _hubs[loop] = StreamHub()
+        get_bus().attach(loop, hub.on_change)
+    return hub
+
+
+async def event_stream(field):
+    """Yield the snapshot, then deltas and keep-alive comments, until closed."""
+    hub = get_hub()
+    subscription, snapshot = await hub.subscribe(field)
+    try:
+        yield snapshot
+        while True:
+            try:
+                frame = await asyncio.wait_for(subscription.queue.get(), HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                yield ': keep-alive\n\n'
+                continue
+            yield subscription.feed.snapshot() if frame is RESYNC else frame
+    finally:
+        hub.unsubscribe(subscription)
+
+
+def authenticate(request):
+    """Return the user authenticated by the REST framework's authenticators, or None."""
+    drf_request = Request(
+        request,
+        authenticators=[auth() for auth in api_settings.DEFAULT_AUTHENTICATION_CLASSES]
+    )
+    try:
+        return drf_request.user
+    except APIException:
+        return None
+
+
+async def leaderboard_stream(request):
+    """
+    Stream live leaderboard changes for one field.
+
+    Usage: GET /api/leaderboard/stream/?field=music
+           (Accept: text/event-stream, Authorization: Bearer <token>)
+    """
+    user = await sync_to_async(authenticate)(request)
+    if user is None or not user.is_authenticated:
+        return JsonResponse(
+            {'detail': 'Authentication credentials were not provided.'}, status=401
+        )
+
+    field = request.GET.get('field')
+    if not field:
+        return JsonResponse({'error': 'field parameter is required'}, status=400)
+    if field not in FIELD_CODES:
+        return JsonResponse({'error': f'Unknown field: {field}'}, status=400)
+
+    response = StreamingHttpResponse(event_stream(field), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
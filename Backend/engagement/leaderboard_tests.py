@@ -2,16 +2,97 @@
 Test cases for leaderboard functionality.
 """
 
-from django.test import TestCase
+import asyncio
+import json
+import random
+import threading
+from io import StringIO
+from urllib.parse import parse_qs, urlparse
+from datetime import timedelta
+from unittest import mock
+
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.db import connection
+from django.utils import timezone
+from asgiref.sync import async_to_sync, sync_to_async
+from django.core.cache import cache
+from django.core.management import call_command
 from django.contrib.auth import get_user_model
 from rest_framework.test import APITestCase
 from rest_framework import status
+from rest_framework_simplejwt.tokens import AccessToken
 from rest_framework.test import APIClient
 
 from posts.models import Post
 from engagement.models import Like, Comment, Follow
-from engagement.leaderboard_models import Leaderboard, LeaderboardUpdate
-from engagement.leaderboard_service import LeaderboardService
+from engagement.leaderboard_models import (
+    Leaderboard,
+    LeaderboardUpdate,
+    LeaderboardOutbox,
+    LeaderboardScoreBucket,
+    LeaderboardRankHistory,
+    LeaderboardUpdateSummary,
+    LeaderboardHistogram,
+    OverallLeaderboard,
+    ScoringConfig,
+)
+from engagement.leaderboard_windows import roll_windows
+from engagement.leaderboard_history import snapshot_ranks
+from engagement.leaderboard_following import followed_entries, get_following_leaderboard
+from engagement.leaderboard_overall import rebuild_overall
+from engagement.leaderboard_snapshots import FIELD_CODES
+from engagement.leaderboard_topn import TopEntry, get_ranked_top, get_read_model, get_top
+from engagement.leaderboard_audit import log_updates, prune_updates
+from engagement.leaderboard_scoring import (
+    SCORING_VERSION_KEY,
+    clear_weights_cache,
+    get_version,
+    get_weights,
+    rescore,
+    set_weights,
+)
+from engagement.leaderboard_histogram import (
+    bucket_bounds,
+    get_percentile,
+    rebuild_histograms,
+    score_bucket,
+)
+from engagement.leaderboard_rebuild import rebuild_leaderboards
+from engagement.leaderboard_bus import LeaderboardBus, LocalBackend
+from engagement.leaderboard_stream import (
+    RESYNC,
+    SUBSCRIBER_QUEUE_SIZE,
+    Subscription,
+    diff_rows,
+    get_hub,
+    load_top,
+)
+from engagement.leaderboard_serializers import (
+    LeaderboardListSerializer,
+    LeaderboardSerializer,
+    LeaderboardTimeSeriesSerializer,
+    UserLeaderboardStatsSerializer,
+)
+from engagement.leaderboard_rows import (
+    DETAIL_COLUMNS,
+    LIST_COLUMNS,
+    TIME_SERIES_COLUMNS,
+    fetch_rows,
+)
+from engagement.leaderboard_user_stats import get_user_stats
+from engagement.leaderboard_service import LeaderboardService, LeaderboardEvent
+from engagement.leaderboard_ranking import (
+    rank_fields_sql,
+    rank_fields_python,
+    supports_window_update,
+)
+from engagement.leaderboard_outbox import MAX_ATTEMPTS, drain_batch, drain_outbox, enqueue, _claim_with_lease
+from engagement.leaderboard_refresh import (
+    mark_field_dirty,
+    get_dirty_fields,
+    flush_dirty_fields,
+    flush_field,
+)
 
 User = get_user_model()
 
@@ -21,6 +102,7 @@ class LeaderboardModelTest(TestCase):
     
     def setUp(self):
         """Create test user and leaderboard."""
+        cache.clear()
         self.user = User.objects.create_user(
             username='testuser',
             email='test@university.edu',
@@ -67,6 +149,7 @@ class LeaderboardServiceTest(TestCase):
     
     def setUp(self):
         """Create test data."""
+        cache.clear()
         self.user = User.objects.create_user(
             username='testuser',
             email='test@university.edu',
@@ -104,6 +187,15 @@ class LeaderboardServiceTest(TestCase):
         self.assertEqual(leaderboard.total_follows, 1)
         self.assertEqual(leaderboard.all_time_score, 5)  # FOLLOW_WEIGHT = 5
     
+    def test_add_follow_score_failure_is_logged_and_raised(self):
+        """A failing follow update is logged and propagated, not swallowed."""
+        with mock.patch.object(
+            LeaderboardService, '_record_score_change', side_effect=RuntimeError('boom')
+        ):
+            with self.assertLogs('engagement.leaderboard_service', level='ERROR'):
+                with self.assertRaises(RuntimeError):
+                    LeaderboardService.add_follow_score(self.user.id, 'academics')
+    
     def test_update_rankings(self):
         """Test ranking update."""
         user2 = User.objects.create_user(
@@ -137,11 +229,1902 @@ class LeaderboardServiceTest(TestCase):
         self.assertIn('sports', stats['fields'])
 
 
+class LeaderboardAtomicScoreTest(TestCase):
+    """Test the single-UPDATE score path used by add and delete handlers."""
+    
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='scorer', email='scorer@university.edu', password='testpass123'
+        )
+    
+    def test_first_delta_creates_row(self):
+        """The first engagement creates the (user, field) row."""
+        LeaderboardService.apply_score_delta(self.user.id, 'music', 'comment', count=3)
+        
+        leaderboard = Leaderboard.objects.get(user=self.user, field='music')
+        self.assertEqual(leaderboard.total_comments, 3)
+        self.assertEqual(leaderboard.score, 6)
+        self.assertEqual(leaderboard.weekly_score, 6)
+        self.assertEqual(leaderboard.monthly_score, 6)
+        self.assertEqual(leaderboard.all_time_score, 6)
+    
+    def test_score_matches_calculate_score(self):
+        """Score is recomputed from all three counters."""
+        LeaderboardService.apply_score_delta(self.user.id, 'music', 'like', count=4)
+        LeaderboardService.apply_score_delta(self.user.id, 'music', 'follow')
+        LeaderboardService.apply_score_delta(self.user.id, 'music', 'comment')
+        
+        leaderboard = Leaderboard.objects.get(user=self.user, field='music')
+        self.assertEqual(leaderboard.score, leaderboard.calculate_score())
+        self.assertEqual(leaderboard.score, 4 + 5 + 2)
+    
+    def test_remove_floors_at_zero(self):
+        """Removing more than was added never goes negative."""
+        Leaderboard.objects.create(
+            user=self.user, field='music', total_likes=1, score=1,
+            weekly_score=0, monthly_score=1, all_time_score=1
+        )
+        
+        LeaderboardService.remove_score(self.user.id, 'music', 'like')
+        LeaderboardService.remove_score(self.user.id, 'music', 'like')
+        
+        leaderboard = Leaderboard.objects.get(user=self.user, field='music')
+        self.assertEqual(leaderboard.total_likes, 0)
+        self.assertEqual(leaderboard.score, 0)
+        self.assertEqual(leaderboard.weekly_score, 0)
+        self.assertEqual(leaderboard.monthly_score, 0)
+        self.assertEqual(leaderboard.all_time_score, 0)
+    
+    def test_remove_without_row_is_noop(self):
+        """Removing from a missing leaderboard does not create one."""
+        LeaderboardService.remove_score(self.user.id, 'music', 'follow')
+        
+        self.assertFalse(Leaderboard.objects.filter(user=self.user).exists())
+    
+    def test_like_delete_signal_deducts(self):
+        """Deleting a like goes through the same atomic path."""
+        liker = User.objects.create_user(
+            username='liker', email='liker@university.edu', password='testpass123'
+        )
+        post = Post.objects.create(user=self.user, title='Gig', category='music')
+        like = Like.objects.create(user=liker, post=post)
+        drain_outbox()
+        like.delete()
+        drain_outbox()
+        
+        leaderboard = Leaderboard.objects.get(user=self.user, field='music')
+        self.assertEqual(leaderboard.total_likes, 0)
+        self.assertEqual(leaderboard.score, 0)
+
+
+class LeaderboardApplyEventsTest(TestCase):
+    """Test batched event ingestion."""
+    
+    def setUp(self):
+        cache.clear()
+        self.alice = User.objects.create_user(
+            username='alice_lb', email='alice_lb@university.edu', password='testpass123'
+        )
+        self.bob = User.objects.create_user(
+            username='bob_lb', email='bob_lb@university.edu', password='testpass123'
+        )
+        self.post = Post.objects.create(user=self.alice, title='Recital', category='music')
+        self.events = [
+            ('like', self.alice.id, 'music', 1, self.post.id),
+            ('comment', self.alice.id, 'music', 1, self.post.id),
+            ('follow', self.bob.id, 'music', 1, None),
+            ('like', self.alice.id, 'music', -1, self.post.id),
+            ('like', self.alice.id, 'music', -1, self.post.id),
+            ('comment', self.bob.id, 'dance', -1, None),
+            ('follow', self.alice.id, 'dance', 2, None),
+        ]
+    
+    def snapshot(self):
+        return sorted(Leaderboard.objects.values_list(
+            'user_id', 'field', 'score', 'rank', 'total_likes', 'total_comments',
+            'total_follows', 'weekly_score', 'monthly_score', 'all_time_score'
+        ))
+    
+    def test_matches_per_event_path(self):
+        """A batch ends in the same state as applying events one by one."""
+        for kind, user_id, field, delta, post_id in self.events:
+            if delta > 0:
+                LeaderboardService._record_score_change(user_id, field, kind, post_id, delta)
+            else:
+                LeaderboardService.remove_score(user_id, field, kind)
+        LeaderboardService.update_all_rankings()
+        expected = self.snapshot()
+        expected_log_count = LeaderboardUpdate.objects.count()
+        
+        Leaderboard.objects.all().delete()
+        LeaderboardService.apply_events(self.events)
+        
+        self.assertEqual(self.snapshot(), expected)
+        self.assertEqual(LeaderboardUpdate.objects.count(), expected_log_count)
+    
+    def test_audit_rows_record_each_event(self):
+        """Each added engagement gets its own audit row."""
+        LeaderboardService.apply_events([
+            LeaderboardEvent('like', self.alice.id, 'music', post_id=self.post.id),
+            LeaderboardEvent('follow', self.alice.id, 'music'),
+        ])
+        
+        updates = LeaderboardUpdate.objects.order_by('id')
+        self.assertEqual([u.reason for u in updates], ['like', 'follow'])
+        self.assertEqual([u.score_change for u in updates], [1, 5])
+        self.assertEqual(updates[0].post_id, self.post.id)
+        self.assertEqual(updates[0].new_rank, 1)
+    
+    def test_query_count_does_not_grow_with_batch(self):
+        """A larger batch costs the same number of queries."""
+        small = [('like', self.alice.id, 'music', 1, self.post.id)] * 2
+        large = [('like', self.bob.id, 'dance', 1, None)] * 100
+        get_weights()  # loaded once per process, not per batch
+        
+        with self.assertNumQueries(14):
+            LeaderboardService.apply_events(small)
+        with self.assertNumQueries(14):
+            LeaderboardService.apply_events(large)
+
+
+class LeaderboardOutboxTest(TestCase):
+    """Test that signals only enqueue and the worker applies the outbox."""
+    
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(
+            username='author', email='author@university.edu', password='testpass123',
+            field_of_interest='technology'
+        )
+        self.fan = User.objects.create_user(
+            username='fan', email='fan@university.edu', password='testpass123'
+        )
+        self.post = Post.objects.create(user=self.author, title='Robot', category='technology')
+    
+    def test_signals_only_enqueue(self):
+        """Creating engagement writes outbox rows, not leaderboard rows."""
+        Like.objects.create(user=self.fan, post=self.post)
+        Comment.objects.create(user=self.fan, post=self.post, text='Wow')
+        Follow.objects.create(follower=self.fan, following=self.author)
+        
+        self.assertFalse(Leaderboard.objects.exists())
+        self.assertEqual(
+            sorted(LeaderboardOutbox.objects.values_list('kind', 'user_id', 'field', 'delta')),
+            [
+                ('comment', self.author.id, 'technology', 1),
+                ('follow', self.author.id, 'technology', 1),
+                ('like', self.author.id, 'technology', 1),
+            ]
+        )
+    
+    def test_drain_applies_and_deletes(self):
+        """Draining applies every delta, ranks the field and empties the outbox."""
+        Like.objects.create(user=self.fan, post=self.post)
+        Follow.objects.create(follower=self.fan, following=self.author)
+        
+        self.assertEqual(drain_outbox(), 2)
+        
+        leaderboard = Leaderboard.objects.get(user=self.author, field='technology')
+        self.assertEqual(leaderboard.score, 6)
+        self.assertEqual(leaderboard.rank, 1)
+        self.assertFalse(LeaderboardOutbox.objects.exists())
+        self.assertEqual(LeaderboardUpdate.objects.count(), 2)
+    
+    def test_leased_rows_are_not_taken_twice(self):
+        """A second worker skips rows leased by the first until the lease expires."""
+        Like.objects.create(user=self.fan, post=self.post)
+        self.assertEqual(len(_claim_with_lease('worker-a', 10, 60)), 1)
+        
+        if not connection.features.has_select_for_update_skip_locked:
+            self.assertEqual(drain_batch('worker-b'), 0)
+            LeaderboardOutbox.objects.update(locked_until=timezone.now() - timedelta(seconds=1))
+        
+        self.assertEqual(drain_batch('worker-b'), 1)
+        self.assertEqual(Leaderboard.objects.get(user=self.author).total_likes, 1)
+    
+    def test_deleted_user_events_are_dropped(self):
+        """Events for users deleted before draining are discarded."""
+        Like.objects.create(user=self.fan, post=self.post)
+        self.author.delete()
+        
+        self.assertEqual(drain_outbox(), 2)
+        self.assertFalse(Leaderboard.objects.exists())
+    
+    def test_failed_row_is_kept_for_retry(self):
+        """A failing row stays in the outbox with its attempts counted."""
+        LeaderboardOutbox.objects.create(kind='bogus', user_id=self.author.id, field='technology')
+        
+        with self.assertLogs('engagement.leaderboard_outbox', level='ERROR'):
+            self.assertEqual(drain_batch('worker-a'), 1)
+        
+        row = LeaderboardOutbox.objects.get()
+        self.assertEqual(row.attempts, 1)
+        self.assertEqual(row.locked_by, '')
+        self.assertIsNone(row.dead_lettered_at)
+    
+    def test_bad_row_does_not_fail_its_batch(self):
+        """Good rows around a failing one are applied; only the bad row is retried."""
+        for _ in range(3):
+            enqueue('like', self.author.id, 'technology')
+        bad = LeaderboardOutbox.objects.create(kind='bogus', user_id=self.author.id, field='technology')
+        for _ in range(4):
+            enqueue('like', self.author.id, 'technology')
+        
+        with self.assertLogs('engagement.leaderboard_outbox', level='ERROR'):
+            self.assertEqual(drain_batch('worker-a'), 8)
+        
+        leaderboard = Leaderboard.objects.get(user=self.author, field='technology')
+        self.assertEqual(leaderboard.total_likes, 7)
+        self.assertEqual(leaderboard.rank, 1)
+        self.assertEqual(list(LeaderboardOutbox.objects.values_list('id', 'attempts')), [(bad.id, 1)])
+    
+    def test_row_is_dead_lettered_after_max_attempts(self):
+        """A row that keeps failing is dead-lettered and no longer claimed."""
+        LeaderboardOutbox.objects.create(
+            kind='bogus', user_id=self.author.id, field='technology', attempts=MAX_ATTEMPTS - 1
+        )
+        
+        with self.assertLogs('engagement.leaderboard_outbox', level='ERROR') as logs:
+            self.assertEqual(drain_batch('worker-a'), 1)
+        
+        row = LeaderboardOutbox.objects.get()
+        self.assertEqual(row.attempts, MAX_ATTEMPTS)
+        self.assertIsNotNone(row.dead_lettered_at)
+        self.assertTrue(any('Dead-lettered' in line for line in logs.output))
+        self.assertEqual(drain_outbox(), 0)
+
+
+class LeaderboardConcurrencyTest(TransactionTestCase):
+    """Race writers on one leaderboard row."""
+    
+    THREADS = 4
+    LIKES_PER_THREAD = 25
+    
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='popular', email='popular@university.edu', password='testpass123'
+        )
+        self.post = Post.objects.create(user=self.user, title='Final', category='sports')
+    
+    def tearDown(self):
+        cache.clear()
+    
+    def test_interleaved_first_likes_are_not_lost(self):
+        """A writer that loses the insert race still applies its increment."""
+        bulk_create = Leaderboard.objects.bulk_create
+        raced = []
+        
+        def insert_after_rival(*args, **kwargs):
+            # Both writers found no row; the rival inserts and scores first.
+            if not raced:
+                raced.append(True)
+                LeaderboardService.add_like_score(self.post.id, 'sports')
+            return bulk_create(*args, **kwargs)
+        
+        with mock.patch.object(Leaderboard.objects, 'bulk_create', side_effect=insert_after_rival):
+            LeaderboardService.add_like_score(self.post.id, 'sports')
+        
+        self.assertEqual(raced, [True])
+        leaderboard = Leaderboard.objects.get(user=self.user, field='sports')
+        self.assertEqual((leaderboard.total_likes, leaderboard.score, leaderboard.weekly_score), (2, 2, 2))
+        self.assertEqual(LeaderboardUpdate.objects.filter(leaderboard=leaderboard).count(), 2)
+    
+    def test_concurrent_likes_are_not_lost(self):
+        """Every increment lands when threads race on the same row."""
+        if connection.vendor == 'sqlite':
+            # The interleaved test above covers SQLite, whose shared-cache
+            # test database fails concurrent writers instead of waiting.
+            self.skipTest('SQLite locks the whole table for concurrent writers')
+        
+        user, post = self.user, self.post
+        errors = []
+        
+        def worker():
+            try:
+                for _ in range(self.LIKES_PER_THREAD):
+                    LeaderboardService.add_like_score(post.id, 'sports')
+            except Exception as e:
+                errors.append(e)
+            finally:
+                connection.close()
+        
+        threads = [threading.Thread(target=worker) for _ in range(self.THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        self.assertEqual(errors, [])
+        total = self.THREADS * self.LIKES_PER_THREAD
+        leaderboard = Leaderboard.objects.get(user=user, field='sports')
+        self.assertEqual(leaderboard.total_likes, total)
+        self.assertEqual(leaderboard.score, total * LeaderboardService.LIKE_WEIGHT)
+        self.assertEqual(leaderboard.weekly_score, total * LeaderboardService.LIKE_WEIGHT)
+        self.assertEqual(LeaderboardUpdate.objects.filter(leaderboard=leaderboard).count(), total)
+
+
+class LeaderboardWindowTest(TestCase):
+    """Test rolling weekly/monthly scores maintained from daily buckets."""
+    
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='roller', email='roller@university.edu', password='testpass123'
+        )
+        self.today = timezone.localdate()
+    
+    def test_new_engagement_lands_in_todays_bucket(self):
+        """Adding points fills today's bucket and both windows."""
+        LeaderboardService.apply_score_delta(self.user.id, 'sports', 'comment')
+        
+        leaderboard = Leaderboard.objects.get(user=self.user, field='sports')
+        bucket = LeaderboardScoreBucket.objects.get(leaderboard=leaderboard)
+        self.assertEqual(bucket.day, self.today)
+        self.assertEqual(bucket.score, 2)
+        self.assertEqual((leaderboard.weekly_score, leaderboard.monthly_score), (2, 2))
+    
+    def test_removing_old_engagement_only_touches_windows_that_contain_it(self):
+        """A like from 10 days ago no longer counts towards the weekly score."""
+        ten_days_ago = timezone.now() - timedelta(days=10)
+        LeaderboardService.apply_score_delta(self.user.id, 'sports', 'like', count=2, occurred_at=ten_days_ago)
+        LeaderboardService.apply_score_delta(self.user.id, 'sports', 'like')
+        
+        LeaderboardService.remove_score(self.user.id, 'sports', 'like', occurred_at=ten_days_ago)
+        
+        leaderboard = Leaderboard.objects.get(user=self.user, field='sports')
+        self.assertEqual(leaderboard.total_likes, 2)
+        self.assertEqual(leaderboard.weekly_score, 1)
+        self.assertEqual(leaderboard.monthly_score, 2)
+        self.assertEqual(
+            LeaderboardScoreBucket.objects.get(day=self.today - timedelta(days=10)).score, 1
+        )
+    
+    def test_roll_subtracts_expired_buckets(self):
+        """Rolling expires buckets incrementally and is idempotent."""
+        leaderboard = Leaderboard.objects.create(
+            user=self.user, field='sports', weekly_score=8, monthly_score=8, all_time_score=8
+        )
+        LeaderboardScoreBucket.objects.create(leaderboard=leaderboard, day=self.today - timedelta(days=3), score=3)
+        LeaderboardScoreBucket.objects.create(leaderboard=leaderboard, day=self.today, score=5)
+        
+        roll_windows(self.today + timedelta(days=5))
+        roll_windows(self.today + timedelta(days=5))
+        leaderboard.refresh_from_db()
+        self.assertEqual((leaderboard.weekly_score, leaderboard.monthly_score), (5, 8))
+        
+        roll_windows(self.today + timedelta(days=30))
+        leaderboard.refresh_from_db()
+        self.assertEqual((leaderboard.weekly_score, leaderboard.monthly_score), (0, 0))
+        self.assertEqual(leaderboard.all_time_score, 8)
+        self.assertFalse(LeaderboardScoreBucket.objects.exists())
+    
+    def test_batch_matches_per_event_with_old_removals(self):
+        """apply_events fills the same buckets and windows as the per-event path."""
+        old = timezone.now() - timedelta(days=9)
+        LeaderboardService.apply_events([
+            ('like', self.user.id, 'sports', 3, None, old),
+            ('like', self.user.id, 'sports', 1, None),
+            ('like', self.user.id, 'sports', -1, None, old),
+        ])
+        
+        leaderboard = Leaderboard.objects.get(user=self.user, field='sports')
+        self.assertEqual((leaderboard.weekly_score, leaderboard.monthly_score), (1, 3))
+        self.assertEqual(
+            dict(LeaderboardScoreBucket.objects.values_list('day', 'score')),
+            {self.today: 1, self.today - timedelta(days=9): 2}
+        )
+
+
+class LeaderboardRankingTest(TestCase):
+    """Test set-based and Python rank recomputation agree."""
+    
+    SCORES = [40, 100, 70, 100, 0, 70, 70, 5]
+    
+    def setUp(self):
+        """Create a field with tied scores plus an unrelated field."""
+        self.entries = []
+        for i, score in enumerate(self.SCORES):
+            user = User.objects.create_user(
+                username=f'ranker{i}',
+                email=f'ranker{i}@university.edu',
+                password='testpass123',
+                field_of_interest='music'
+            )
+            self.entries.append(
+                Leaderboard.objects.create(user=user, field='music', score=score)
+            )
+            Leaderboard.objects.create(user=user, field='dance', score=score, rank=99)
+    
+    def expected_ranks(self):
+        """Ranks as the original per-row loop assigned them, ties by id."""
+        ordered = sorted(self.entries, key=lambda lb: (-lb.score, lb.id))
+        return {lb.id: rank for rank, lb in enumerate(ordered, start=1)}
+    
+    def current_ranks(self):
+        return dict(Leaderboard.objects.filter(field='music').values_list('id', 'rank'))
+    
+    def test_python_fallback_matches_loop(self):
+        """Python fallback assigns distinct ranks with ties broken by id."""
+        updated = rank_fields_python('music')
+        
+        self.assertEqual(self.current_ranks(), self.expected_ranks())
+        self.assertEqual(updated, len(self.SCORES))
+        self.assertEqual(rank_fields_python('music'), 0)
+    
+    def test_sql_matches_python(self):
+        """Window-function UPDATE gives the same ranks as the fallback."""
+        if not supports_window_update():
+            self.skipTest('backend has no window-function UPDATE support')
+        
+        updated = rank_fields_sql('music')
+        
+        self.assertEqual(self.current_ranks(), self.expected_ranks())
+        self.assertEqual(updated, len(self.SCORES))
+        self.assertEqual(rank_fields_sql('music'), 0)
+    
+    def test_only_requested_fields_are_ranked(self):
+        """Other fields keep their ranks."""
+        LeaderboardService.update_rankings('music')
+        
+        self.assertFalse(Leaderboard.objects.filter(field='dance').exclude(rank=99).exists())
+    
+    def test_update_all_rankings_partitions_by_field(self):
+        """Each field is ranked independently from 1."""
+        LeaderboardService.update_all_rankings()
+        
+        for field in ('music', 'dance'):
+            ranks = sorted(Leaderboard.objects.filter(field=field).values_list('rank', flat=True))
+            self.assertEqual(ranks, list(range(1, len(self.SCORES) + 1)))
+
+
+class LeaderboardRefreshTest(TestCase):
+    """Test debounced rank refresh through the dirty-field registry."""
+    
+    def setUp(self):
+        """Create two ranked users in one field."""
+        cache.clear()
+        self.user1 = User.objects.create_user(
+            username='fast', email='fast@university.edu', password='testpass123'
+        )
+        self.user2 = User.objects.create_user(
+            username='slow', email='slow@university.edu', password='testpass123'
+        )
+        self.lb1 = Leaderboard.objects.create(user=self.user1, field='art', score=10, rank=2)
+        self.lb2 = Leaderboard.objects.create(user=self.user2, field='art', score=5, rank=1)
+    
+    def tearDown(self):
+        cache.clear()
+    
+    def test_first_change_reranks_after_commit(self):
+        """The first change in a window re-ranks once the transaction commits."""
+        with self.captureOnCommitCallbacks(execute=True):
+            mark_field_dirty('art')
+            self.lb1.refresh_from_db()
+            self.assertEqual(self.lb1.rank, 2)
+        
+        self.lb1.refresh_from_db()
+        self.assertEqual(self.lb1.rank, 1)
+        self.assertEqual(get_dirty_fields(), {})
+    
+    def test_changes_within_window_are_coalesced(self):
+        """Later changes in the same window leave the field dirty for the flusher."""
+        with self.captureOnCommitCallbacks(execute=True):
+            mark_field_dirty('art')
+        
+        Leaderboard.objects.filter(id=self.lb2.id).update(score=50)
+        with self.captureOnCommitCallbacks(execute=True):
+            mark_field_dirty('art')
+        
+        self.lb2.refresh_from_db()
+        self.assertEqual(self.lb2.rank, 2)
+        self.assertIn('art', get_dirty_fields())
+        
+        self.assertEqual(flush_dirty_fields(), [])
+        self.assertEqual(flush_dirty_fields(force=True), ['art'])
+        self.lb2.refresh_from_db()
+        self.assertEqual(self.lb2.rank, 1)
+    
+    def test_like_updates_score_immediately(self):
+        """Scores are visible right away even while ranks are pending."""
+        post = Post.objects.create(user=self.user2, title='Mural', category='art')
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            LeaderboardService.add_like_score(post.id, 'art')
+        
+        self.lb2.refresh_from_db()
+        self.assertEqual(self.lb2.total_likes, 1)
+        # Field and overall rank flushes plus the user's stats invalidation.
+        self.assertEqual(len(callbacks), 3)
+        self.assertIn('art', get_dirty_fields())
+    
+    def test_logged_new_rank_is_filled_by_rerank(self):
+        """The update log gets the rank the debounced refresh assigns."""
+        with self.captureOnCommitCallbacks(execute=False):
+            LeaderboardService.add_follow_score(self.user2.id, 'art')
+        update = LeaderboardUpdate.objects.get(leaderboard=self.lb2)
+        self.assertEqual((update.previous_rank, update.new_rank), (1, None))
+        
+        flush_field('art', force=True)
+        
+        update.refresh_from_db()
+        # Tied at 10 points with the older entry, so second.
+        self.assertEqual((update.previous_rank, update.new_rank), (1, 2))
+
+
+class LeaderboardRebuildTest(TestCase):
+    """Test rebuilding leaderboard counters from the engagement tables."""
+    
+    def setUp(self):
+        """Create engagement in two fields plus drifted and stale rows."""
+        cache.clear()
+        self.author = User.objects.create_user(
+            username='author', email='author@university.edu', password='testpass123',
+            field_of_interest='music'
+        )
+        self.fans = [
+            User.objects.create_user(
+                username=f'fan{i}', email=f'fan{i}@university.edu', password='testpass123',
+                field_of_interest='art'
+            )
+            for i in range(3)
+        ]
+        song = Post.objects.create(user=self.author, title='Song', category='music')
+        sketch = Post.objects.create(user=self.author, title='Sketch', category='')
+        for fan in self.fans:
+            Like.objects.create(user=fan, post=song)
+            Follow.objects.create(follower=fan, following=self.author)
+        Like.objects.create(user=self.fans[0], post=sketch)
+        Comment.objects.create(user=self.fans[0], post=song, text='Nice')
+        Comment.objects.create(user=self.fans[1], post=song, text='Again')
+        
+        # Drifted counters for the author and a row with no engagement behind it.
+        self.drifted = Leaderboard.objects.create(
+            user=self.author, field='music', total_likes=1, score=1, all_time_score=1
+        )
+        self.stale = Leaderboard.objects.create(
+            user=self.fans[2], field='music', total_follows=2, score=10, all_time_score=10
+        )
+    
+    def test_rebuild_restores_counters_and_ranks(self):
+        """Counters, score and ranks match the engagement tables."""
+        results = {r['field']: r for r in rebuild_leaderboards(fields=['music', 'other'])}
+        
+        self.drifted.refresh_from_db()
+        self.assertEqual(
+            (self.drifted.total_likes, self.drifted.total_comments, self.drifted.total_follows),
+            (3, 2, 3)
+        )
+        self.assertEqual(self.drifted.score, 3 * 1 + 2 * 2 + 3 * 5)
+        self.assertEqual(self.drifted.all_time_score, self.drifted.score)
+        self.assertEqual(self.drifted.rank, 1)
+        
+        self.stale.refresh_from_db()
+        self.assertEqual((self.stale.total_follows, self.stale.score, self.stale.rank), (0, 0, 2))
+        
+        other = Leaderboard.objects.get(user=self.author, field='other')
+        self.assertEqual((other.total_likes, other.score), (1, 1))
+        self.assertEqual(results['music']['updated'], 2)
+        self.assertEqual(results['other']['created'], 1)
+    
+    def test_second_rebuild_writes_nothing(self):
+        """Only rows that drifted are written."""
+        rebuild_leaderboards(fields=['music', 'other'])
+        
+        results = rebuild_leaderboards(fields=['music', 'other'], chunk_size=1)
+        
+        self.assertEqual(sum(r['updated'] + r['created'] for r in results), 0)
+    
+    def test_dry_run_reports_without_writing(self):
+        """--dry-run reports the diff and leaves rows untouched."""
+        out = StringIO()
+        call_command('rebuild_leaderboards', '--field', 'music', '--dry-run', stdout=out)
+        
+        self.assertIn('[dry run] music: checked 2, updated 2, created 0', out.getvalue())
+        self.drifted.refresh_from_db()
+        self.assertEqual(self.drifted.total_likes, 1)
+
+
+class LeaderboardSnapshotTest(APITestCase):
+    """Test versioned top-N snapshots behind the hot read endpoints."""
+    
+    def setUp(self):
+        """Create two ranked users in one field."""
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='reader', email='reader@university.edu', password='testpass123'
+        )
+        self.other = User.objects.create_user(
+            username='climber', email='climber@university.edu', password='testpass123'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.lb1 = Leaderboard.objects.create(
+            user=self.user, field='music', score=20, rank=1, weekly_score=20
+        )
+        self.lb2 = Leaderboard.objects.create(
+            user=self.other, field='music', score=10, rank=2, weekly_score=10
+        )
+    
+    def tearDown(self):
+        cache.clear()
+    
+    def test_hot_reads_hit_no_database(self):
+        """Repeated reads are served from the snapshot without queries."""
+        urls = [
+            '/api/leaderboard/field/?field=music',
+            '/api/leaderboard/weekly/',
+            '/api/leaderboard/weekly/?field=music',
+            '/api/leaderboard/monthly/',
+            '/api/leaderboard/top-by-field/?limit=5',
+        ]
+        for url in urls:
+            cold = self.client.get(url)
+            with self.assertNumQueries(0):
+                hot = self.client.get(url)
+            self.assertEqual(hot.status_code, status.HTTP_200_OK)
+            self.assertEqual(hot.data, cold.data)
+    
+    def test_reranking_invalidates_snapshot(self):
+        """A re-rank bumps the field version so readers see the new order."""
+        url = '/api/leaderboard/field/?field=music'
+        first = self.client.get(url)
+        self.assertEqual(first.data['leaderboards'][0]['rank'], 1)
+        self.assertEqual(first.data['leaderboards'][0]['username'], 'reader')
+        
+        Leaderboard.objects.filter(id=self.lb2.id).update(score=50)
+        with self.captureOnCommitCallbacks(execute=True):
+            LeaderboardService.update_rankings('music')
+        
+        second = self.client.get(url)
+        self.assertEqual(second.data['leaderboards'][0]['username'], 'climber')
+    
+    def test_other_fields_keep_their_snapshot(self):
+        """Re-ranking one field leaves other fields' snapshots valid."""
+        Leaderboard.objects.create(user=self.other, field='dance', score=5, rank=1)
+        url = '/api/leaderboard/field/?field=dance'
+        self.client.get(url)
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            LeaderboardService.update_rankings('music')
+        
+        with self.assertNumQueries(0):
+            self.client.get(url)
+    
+    def test_top_by_field_is_one_query_for_any_limit(self):
+        """top-by-field costs one query on a cold read whatever the limit."""
+        for limit in (1, 2, 50):
+            cache.clear()
+            with self.assertNumQueries(1):
+                response = self.client.get(f'/api/leaderboard/top-by-field/?limit={limit}')
+            self.assertEqual(
+                [lb['username'] for lb in response.data['music']],
+                ['reader', 'climber'][:limit]
+            )
+            self.assertEqual(response.data['sports'], [])
+    
+    def test_top_by_field_limit_is_validated(self):
+        """A non-integer limit is a 400; out-of-range limits are clamped."""
+        response = self.client.get('/api/leaderboard/top-by-field/?limit=abc')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        
+        for limit, expected in (('-1', ['reader']), ('0', ['reader']), ('1000', ['reader', 'climber'])):
+            response = self.client.get(f'/api/leaderboard/top-by-field/?limit={limit}')
+            self.assertEqual(response.status_code, status.HTTP_200_OK, limit)
+            self.assertEqual([lb['username'] for lb in response.data['music']], expected, limit)
+    
+    def test_uncommitted_rerank_does_not_invalidate(self):
+        """Versions are only bumped once the writing transaction commits."""
+        url = '/api/leaderboard/weekly/?field=music'
+        self.client.get(url)
+        
+        with self.captureOnCommitCallbacks(execute=False):
+            LeaderboardService.update_rankings('music')
+            with self.assertNumQueries(0):
+                self.client.get(url)
+
+
+class LeaderboardAroundTest(APITestCase):
+    """Test the "around me" neighbour lookup."""
+    
+    SCORES = [90, 70, 70, 70, 50, 30, 10]
+    
+    def setUp(self):
+        """Create one field with a tie in the middle."""
+        self.entries = []
+        for i, score in enumerate(self.SCORES):
+            user = User.objects.create_user(
+                username=f'neighbour{i}',
+                email=f'neighbour{i}@university.edu',
+                password='testpass123'
+            )
+            self.entries.append(Leaderboard.objects.create(user=user, field='dance', score=score))
+        LeaderboardService.update_rankings('dance')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.entries[0].user)
+    
+    def around(self, entry, window):
+        return self.client.get(
+            f'/api/leaderboard/around/?field=dance&user_id={entry.user_id}&window={window}'
+        )
+    
+    def test_neighbours_follow_rank_order(self):
+        """Neighbours match the ranked slice around the user, ties included."""
+        ranked = list(Leaderboard.objects.filter(field='dance').order_by('rank'))
+        me = self.entries[2]
+        position = ranked.index(me)
+        
+        response = self.around(me, 2)
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['entry']['id'], me.id)
+        self.assertEqual(
+            [lb['id'] for lb in response.data['above']],
+            [lb.id for lb in ranked[position - 2:position]]
+        )
+        self.assertEqual(
+            [lb['id'] for lb in response.data['below']],
+            [lb.id for lb in ranked[position + 1:position + 3]]
+        )
+    
+    def test_edges_are_truncated(self):
+        """The leader has nobody above and the last entry nobody below."""
+        top = self.around(self.entries[0], 3)
+        bottom = self.around(self.entries[-1], 3)
+        
+        self.assertEqual(top.data['above'], [])
+        self.assertEqual(len(top.data['below']), 3)
+        self.assertEqual(len(bottom.data['above']), 3)
+        self.assertEqual(bottom.data['below'], [])
+    
+    def test_query_count_is_independent_of_window(self):
+        """One lookup for the user plus one range scan per side."""
+        with self.assertNumQueries(3):
+            self.around(self.entries[3], 1)
+        with self.assertNumQueries(3):
+            self.around(self.entries[3], 10)
+    
+    def test_missing_entry_and_parameters(self):
+        """Unknown users get 404, missing parameters 400."""
+        response = self.client.get('/api/leaderboard/around/?field=music&user_id=1')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        response = self.client.get('/api/leaderboard/around/?field=dance')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class LeaderboardHistoryTest(APITestCase):
+    """Test daily rank snapshots and the history endpoint."""
+    
+    def setUp(self):
+        """Create two ranked users in one field."""
+        self.leader, self.runner_up = [
+            User.objects.create_user(
+                username=f'history{i}',
+                email=f'history{i}@university.edu',
+                password='testpass123'
+            )
+            for i in range(2)
+        ]
+        self.leader_entry = Leaderboard.objects.create(user=self.leader, field='sports', score=50)
+        self.runner_up_entry = Leaderboard.objects.create(user=self.runner_up, field='sports', score=20)
+        LeaderboardService.update_rankings('sports')
+        self.today = timezone.localdate()
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.runner_up)
+    
+    def test_snapshot_is_one_row_per_entry_per_day(self):
+        """Re-running a day overwrites it; a new day adds rows."""
+        self.assertEqual(snapshot_ranks(self.today - timedelta(days=1)), 2)
+        Leaderboard.objects.filter(id=self.runner_up_entry.id).update(score=80)
+        LeaderboardService.update_rankings('sports')
+        snapshot_ranks(self.today)
+        snapshot_ranks(self.today)
+        
+        self.assertEqual(LeaderboardRankHistory.objects.count(), 4)
+        self.assertEqual(
+            LeaderboardRankHistory.objects.get(user=self.runner_up, day=self.today).rank, 1
+        )
+    
+    def test_history_endpoint(self):
+        """History is ordered by day, limited to the range, in one query."""
+        for days_ago in (40, 2, 1):
+            snapshot_ranks(self.today - timedelta(days=days_ago))
+        Leaderboard.objects.filter(id=self.runner_up_entry.id).update(score=80)
+        LeaderboardService.update_rankings('sports')
+        call_command('snapshot_leaderboard_ranks', stdout=StringIO())
+        
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/leaderboard/history/?field=sports')
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['user_id'], self.runner_up.id)
+        self.assertEqual(
+            [(point['day'], point['rank']) for point in response.data['history']],
+            [
+                (self.today - timedelta(days=2), 2),
+                (self.today - timedelta(days=1), 2),
+                (self.today, 1),
+            ]
+        )
+        
+        start = (self.today - timedelta(days=45)).isoformat()
+        end = (self.today - timedelta(days=30)).isoformat()
+        response = self.client.get(
+            f'/api/leaderboard/history/?field=sports&user_id={self.leader.id}&from={start}&to={end}'
+        )
+        self.assertEqual([point['rank'] for point in response.data['history']], [1])
+    
+    def test_invalid_parameters(self):
+        """Missing field, bad dates and oversized ranges are rejected."""
+        for query in ('', 'field=sports&from=yesterday', 'field=sports&from=2025-01-01&to=2024-01-01',
+                      'field=sports&from=2020-01-01&to=2025-01-01'):
+            response = self.client.get(f'/api/leaderboard/history/?{query}')
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, query)
+
+
+class LeaderboardAuditLogTest(APITestCase):
+    """Test buffered audit writes, pruning into summaries and the recent feed."""
+    
+    def setUp(self):
+        """Create an author with one post."""
+        self.user = User.objects.create_user(
+            username='audited', email='audited@university.edu', password='testpass123'
+        )
+        self.post = Post.objects.create(user=self.user, title='Entry', category='music')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+    
+    def log_likes(self, count, days_ago=0):
+        last_id = LeaderboardUpdate.objects.order_by('-id').values_list('id', flat=True).first() or 0
+        for _ in range(count):
+            LeaderboardService.add_like_score(self.post.id, 'music')
+        if days_ago:
+            LeaderboardUpdate.objects.filter(id__gt=last_id).update(
+                created_at=timezone.now() - timedelta(days=days_ago)
+            )
+    
+    def test_logged_updates_are_written_in_bulk(self):
+        """log_updates inserts a batch of rows with one query."""
+        self.log_likes(1)
+        leaderboard_id = LeaderboardUpdate.objects.get().leaderboard_id
+        
+        with self.assertNumQueries(1):
+            written = log_updates(
+                {'leaderboard_id': leaderboard_id, 'score_change': 1, 'reason': 'like'}
+                for _ in range(3)
+            )
+        
+        self.assertEqual(written, 3)
+        self.assertEqual(LeaderboardUpdate.objects.count(), 4)
+    
+    def test_prune_rolls_old_updates_into_daily_summaries(self):
+        """Old rows are summarized per entry and day; recent ones are kept."""
+        self.log_likes(3, days_ago=100)
+        self.log_likes(2, days_ago=95)
+        self.log_likes(1)
+        
+        self.assertEqual(prune_updates(90, batch_size=2), 5)
+        
+        self.assertEqual(LeaderboardUpdate.objects.count(), 1)
+        summaries = LeaderboardUpdateSummary.objects.order_by('day')
+        self.assertEqual(
+            [(summary.update_count, summary.score_change) for summary in summaries],
+            [(3, 3), (2, 2)]
+        )
+        
+        # Rows pruned by a later run are added to the existing summary.
+        self.log_likes(4, days_ago=95)
+        self.assertEqual(prune_updates(90), 4)
+        self.assertEqual(summaries.last().update_count, 6)
+    
+    def test_prune_command(self):
+        """The command reports how many rows it deleted."""
+        self.log_likes(2, days_ago=40)
+        out = StringIO()
+        
+        call_command('prune_leaderboard_updates', '--older-than', '30', stdout=out)
+        
+        self.assertIn('Pruned 2', out.getvalue())
+    
+    def test_recent_feed_is_bounded_and_joined(self):
+        """recent is one query, newest first, with the limit capped."""
+        self.log_likes(3)
+        
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/leaderboard-updates/recent/?limit=1000')
+        
+        self.assertEqual(response.data['count'], 3)
+        self.assertEqual(response.data['updates'][0]['leaderboard_user'], 'audited')
+        ids = [update['id'] for update in response.data['updates']]
+        self.assertEqual(ids, sorted(ids, reverse=True))
+        self.assertEqual(
+            self.client.get('/api/leaderboard-updates/recent/?limit=all').status_code,
+            status.HTTP_400_BAD_REQUEST
+        )
+
+
+class LeaderboardHistogramTest(APITestCase):
+    """Test score histograms and percentile estimates against exact ranks."""
+    
+    ENTRIES = 1500
+    
+    def setUp(self):
+        cache.clear()
+        self.users = User.objects.bulk_create([
+            User(username=f'sketch{i}', email=f'sketch{i}@university.edu')
+            for i in range(self.ENTRIES)
+        ])
+    
+    def tearDown(self):
+        cache.clear()
+    
+    def histogram(self, field):
+        return dict(
+            LeaderboardHistogram.objects.filter(field=field, count__gt=0)
+            .values_list('bucket', 'count')
+        )
+    
+    def assert_estimates_within_bounds(self, field, scores):
+        Leaderboard.objects.bulk_create([
+            Leaderboard(user=user, field=field, score=score)
+            for user, score in zip(self.users, scores)
+        ])
+        rebuild_histograms([field])
+        LeaderboardService.update_rankings(field)
+        
+        descending = sorted(scores, reverse=True)
+        errors = []
+        for score, rank in Leaderboard.objects.filter(field=field).values_list('score', 'rank'):
+            estimate = get_percentile(field, score)
+            self.assertEqual(estimate['total'], len(scores))
+            self.assertLessEqual(estimate['rank_low'], rank)
+            self.assertGreaterEqual(estimate['rank_high'], rank)
+            # Compare with the exact rank ties share: 1 + entries scoring higher.
+            errors.append(abs(estimate['rank'] - (descending.index(score) + 1)))
+        # Mean error stays well below 1% of the field.
+        self.assertLess(sum(errors) / len(errors), len(scores) / 100)
+    
+    def test_bucket_layout(self):
+        """Buckets are contiguous, exact below 64 and at most 1/16 wide above."""
+        previous = -1
+        for score in range(70000):
+            bucket = score_bucket(score)
+            low, high = bucket_bounds(bucket)
+            self.assertTrue(low <= score <= high)
+            self.assertIn(bucket - previous, (0, 1))
+            if score >= 64:
+                self.assertLessEqual((high - low + 1) * 16, low)
+            previous = bucket
+    
+    def test_uniform_distribution(self):
+        rng = random.Random(1)
+        self.assert_estimates_within_bounds(
+            'sports', [rng.randint(0, 5000) for _ in range(self.ENTRIES)]
+        )
+    
+    def test_long_tail_distribution(self):
+        rng = random.Random(2)
+        self.assert_estimates_within_bounds(
+            'music', [int(rng.paretovariate(1.2) * 10) - 10 for _ in range(self.ENTRIES)]
+        )
+    
+    def test_histogram_follows_score_changes(self):
+        """Incremental updates match a histogram rebuilt from scratch."""
+        author, fan = self.users[:2]
+        post = Post.objects.create(user=author, title='Entry', category='dance')
+        for _ in range(70):
+            LeaderboardService.add_like_score(post.id, 'dance')
+        LeaderboardService.add_follow_score(fan.id, 'dance')
+        LeaderboardService.remove_score(author.id, 'dance', 'like')
+        LeaderboardService.remove_score(fan.id, 'dance', 'follow')
+        LeaderboardService.remove_score(fan.id, 'dance', 'follow')
+        LeaderboardService.apply_events(
+            [('comment', author.id, 'dance', 3, post.id), ('follow', fan.id, 'dance', 2, None)]
+        )
+        
+        incremental = self.histogram('dance')
+        rebuild_histograms(['dance'])
+        self.assertEqual(incremental, self.histogram('dance'))
+        self.assertEqual(sum(incremental.values()), 2)
+    
+    def test_percentile_endpoint(self):
+        """Two queries: the user's score and the field histogram."""
+        Leaderboard.objects.bulk_create([
+            Leaderboard(user=user, field='art', score=score)
+            for user, score in zip(self.users, range(100))
+        ])
+        rebuild_histograms(['art'])
+        client = APIClient()
+        client.force_authenticate(user=self.users[96])
+        
+        with self.assertNumQueries(2):
+            response = client.get('/api/leaderboard/percentile/?field=art')
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual((response.data['rank'], response.data['top_percent']), (4, 4.0))
+        response = client.get('/api/leaderboard/percentile/?field=art&score=1000')
+        self.assertEqual((response.data['rank'], response.data['user_id']), (1, None))
+        self.assertEqual(
+            client.get('/api/leaderboard/percentile/?field=sports').status_code,
+            status.HTTP_404_NOT_FOUND
+        )
+        self.assertEqual(
+            client.get('/api/leaderboard/percentile/?field=art&score=-1').status_code,
+            status.HTTP_400_BAD_REQUEST
+        )
+        self.assertEqual(
+            client.get('/api/leaderboard/percentile/?field=chess&score=1').status_code,
+            status.HTTP_400_BAD_REQUEST
+        )
+
+
+class LeaderboardScoringConfigTest(TestCase):
+    """Test versioned scoring weights and bulk rescoring."""
+    
+    def setUp(self):
+        """Create two entries whose order depends on the weights."""
+        clear_weights_cache()
+        self.liked, self.followed = [
+            User.objects.create_user(
+                username=f'weighted{i}', email=f'weighted{i}@university.edu', password='testpass123'
+            )
+            for i in range(2)
+        ]
+        self.liked_entry = Leaderboard.objects.create(
+            user=self.liked, field='art', total_likes=10, score=10, all_time_score=10
+        )
+        self.followed_entry = Leaderboard.objects.create(
+            user=self.followed, field='art', total_follows=3, score=15, all_time_score=15
+        )
+        rebuild_histograms(['art'])
+        LeaderboardService.update_rankings('art')
+    
+    def tearDown(self):
+        clear_weights_cache()
+    
+    def test_defaults_until_first_version(self):
+        self.assertEqual(get_weights(), {'like': 1, 'comment': 2, 'follow': 5})
+        self.assertIsNone(get_version())
+        self.assertEqual(self.followed_entry.calculate_score(), 15)
+    
+    def test_new_version_takes_effect(self):
+        """Each change is a new version; new engagement uses the latest weights."""
+        set_weights(like=2, comment=1, follow=3)
+        set_weights(like=4, comment=1, follow=3, note='Favour likes')
+        
+        self.assertEqual(list(ScoringConfig.objects.values_list('version', flat=True)), [2, 1])
+        self.assertEqual(get_version(), 2)
+        self.assertEqual(self.liked_entry.calculate_score(), 40)
+        
+        post = Post.objects.create(user=self.followed, title='Entry', category='art')
+        LeaderboardService.add_like_score(post.id, 'art')
+        self.assertEqual(
+            LeaderboardUpdate.objects.get(leaderboard=self.followed_entry).score_change, 4
+        )
+    
+    def test_published_version_replaces_cached_weights(self):
+        """A version saved by another process is used from the next read."""
+        cache.clear()
+        self.assertEqual(get_weights()['like'], 1)
+        ScoringConfig.objects.create(version=1, like_weight=3, comment_weight=2, follow_weight=5)
+        # Within the TTL and not yet published: this process keeps its copy.
+        self.assertEqual(get_weights()['like'], 1)
+        
+        cache.set(SCORING_VERSION_KEY, 1)
+        self.assertEqual((get_version(), get_weights()['like']), (1, 3))
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            set_weights(like=4, comment=2, follow=5)
+        self.assertEqual(cache.get(SCORING_VERSION_KEY), 2)
+    
+    def test_rescore_updates_scores_ranks_and_histograms(self):
+        """Rescoring rewrites changed rows in batches and re-ranks."""
+        set_weights(like=2, comment=1, follow=3)
+        
+        self.assertEqual(rescore(batch_size=1), 2)
+        
+        self.liked_entry.refresh_from_db()
+        self.followed_entry.refresh_from_db()
+        self.assertEqual((self.liked_entry.score, self.liked_entry.all_time_score), (20, 20))
+        self.assertEqual((self.liked_entry.rank, self.followed_entry.rank), (1, 2))
+        self.assertEqual(get_percentile('art', 20)['rank'], 1)
+        # Nothing left to change.
+        self.assertEqual(rescore(), 0)
+    
+    def test_rescore_command(self):
+        """The command saves the new weights before rescoring."""
+        out = StringIO()
+        
+        call_command('rescore_leaderboards', '--follow', '1', '--note', 'Fewer follow points', stdout=out)
+        
+        self.assertIn('rescored 1 rows', out.getvalue())
+        self.assertEqual(ScoringConfig.objects.get().follow_weight, 1)
+        self.assertEqual(Leaderboard.objects.get(id=self.followed_entry.id).score, 3)
+
+
+class LeaderboardRowsTest(APITestCase):
+    """Test that the values_list read path matches the serializers exactly."""
+    
+    def setUp(self):
+        cache.clear()
+        self.users = [
+            User.objects.create_user(
+                username=f'flat{i}', email=f'flat{i}@university.edu', password='testpass123'
+            )
+            for i in range(4)
+        ]
+        for i, user in enumerate(self.users):
+            Leaderboard.objects.create(
+                user=user, field='sports', score=10 * i, weekly_score=i, monthly_score=2 * i,
+                all_time_score=10 * i, total_likes=i, total_comments=1, total_follows=0
+            )
+            Leaderboard.objects.create(user=user, field='music', score=i, weekly_score=4 - i)
+        LeaderboardService.update_all_rankings()
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.users[0])
+    
+    def tearDown(self):
+        cache.clear()
+    
+    def test_shapes_match_serializers(self):
+        """Each column shape renders the same dicts as its serializer."""
+        queryset = Leaderboard.objects.select_related('user').order_by('id')
+        for serializer_class, columns in (
+            (LeaderboardSerializer, DETAIL_COLUMNS),
+            (LeaderboardListSerializer, LIST_COLUMNS),
+            (LeaderboardTimeSeriesSerializer, TIME_SERIES_COLUMNS),
+        ):
+            self.assertEqual(
+                fetch_rows(queryset, columns),
+                [dict(row) for row in serializer_class(queryset, many=True).data]
+            )
+    
+    def test_endpoints_are_single_query(self):
+        """Lists cost one query regardless of how many users they include."""
+        for url in (
+            '/api/leaderboard/weekly/',
+            '/api/leaderboard/monthly/?field=sports',
+            '/api/leaderboard/field/?field=sports',
+            '/api/leaderboard/top-by-field/?limit=5',
+        ):
+            with self.assertNumQueries(1):
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK, url)
+        
+        with self.assertNumQueries(1):
+            response = self.client.get(f'/api/leaderboard/user/?user_id={self.users[2].id}')
+        self.assertEqual(response.data['count'], 2)
+        self.assertEqual(response.data['leaderboards'][0]['user_email'], 'flat2@university.edu')
+    
+    def test_weekly_matches_serializer_output(self):
+        response = self.client.get('/api/leaderboard/weekly/?field=music')
+        
+        expected = LeaderboardTimeSeriesSerializer(
+            Leaderboard.objects.filter(field='music').order_by('-weekly_score'), many=True
+        ).data
+        self.assertEqual(response.json()['leaderboards'], [dict(row) for row in expected])
+    
+    def test_list_pages_follow_cursor(self):
+        """The viewset list pages through values() rows with the cursor."""
+        first = self.client.get('/api/leaderboard/', {'page_size': 5})
+        
+        cursor = parse_qs(urlparse(first.data['next']).query)['cursor'][0]
+        second = self.client.get('/api/leaderboard/', {'page_size': 5, 'cursor': cursor})
+        
+        ids = [row['id'] for row in first.data['results'] + second.data['results']]
+        expected = LeaderboardSerializer(
+            Leaderboard.objects.order_by('-score', 'id'), many=True
+        ).data
+        self.assertEqual(ids, [row['id'] for row in expected])
+        self.assertEqual(dict(first.data['results'][0]), dict(expected[0]))
+
+
+@override_settings(LEADERBOARD_TOP_N=3)
+class LeaderboardTopNTest(APITestCase):
+    """Test the per-process top-N read model."""
+    
+    def setUp(self):
+        """Create five music entries and one art entry."""
+        cache.clear()
+        self.users = [
+            User.objects.create_user(
+                username=f'top{i}', email=f'top{i}@university.edu', password='testpass123'
+            )
+            for i in range(5)
+        ]
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.users[0])
+        for i, user in enumerate(self.users):
+            Leaderboard.objects.create(user=user, field='music', score=10 * i, rank=5 - i)
+        Leaderboard.objects.create(user=self.users[0], field='art', score=1, rank=1)
+    
+    def tearDown(self):
+        cache.clear()
+    
+    def test_matches_database_reads(self):
+        """Served rows equal the ROW_NUMBER fallback's rows for every field."""
+        self.assertEqual(get_ranked_top(FIELD_CODES, 3), LeaderboardService.get_top_by_field_rows(3))
+        self.assertEqual(
+            self.client.get('/api/leaderboard/top-by-field/?limit=2').data,
+            LeaderboardService.get_top_by_field_rows(2)
+        )
+    
+    def test_top_by_field_ranks_follow_row_order(self):
+        """Before a re-rank, both paths list by score and number by position."""
+        Leaderboard.objects.filter(user=self.users[0], field='music').update(score=99)
+        newcomer = User.objects.create_user(
+            username='newcomer', email='newcomer@university.edu', password='testpass123'
+        )
+        Leaderboard.objects.create(user=newcomer, field='music', score=100)
+        expected = [('top0', 1), ('top4', 2), ('top3', 3), ('top2', 4), ('top1', 5)]
+        
+        for limit in (2, 5):
+            response = self.client.get(f'/api/leaderboard/top-by-field/?limit={limit}')
+            self.assertEqual(
+                [(row['username'], row['rank']) for row in response.data['music']],
+                expected[:limit]
+            )
+    
+    def test_field_first_page_continues_into_cursor_pages(self):
+        """A page of the full top N links to the same next page as the database path."""
+        url = '/api/leaderboard/field/?field=music&page_size=3'
+        first = self.client.get(url)
+        
+        ids = [row['id'] for row in first.data['leaderboards']]
+        ids += [row['id'] for row in self.client.get(first.data['next']).data['leaderboards']]
+        self.assertEqual(
+            ids,
+            list(Leaderboard.objects.filter(field='music').order_by('-score', 'id').values_list('id', flat=True))
+        )
+    
+    def test_reloads_only_changed_fields(self):
+        """A re-rank reloads that field's table in one query; others stay cached."""
+        get_top(FIELD_CODES, 3)
+        Leaderboard.objects.filter(user=self.users[0], field='music').update(score=99)
+        with self.assertNumQueries(0):
+            self.assertEqual(get_top(['music'], 1)['music'][0]['username'], 'top4')
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            LeaderboardService.update_rankings('music')
+        art = get_read_model().tables['art']
+        with self.assertNumQueries(1):
+            top = get_top(FIELD_CODES, 3)
+        self.assertEqual(top['music'][0]['username'], 'top0')
+        self.assertIs(get_read_model().tables['art'], art)
+    
+    def test_tables_are_bounded(self):
+        """Each table holds N + 1 slotted records; larger requests fall back."""
+        get_top(['music'], 1)
+        
+        entries = get_read_model().tables['music'].entries
+        self.assertEqual(len(entries), 4)
+        self.assertFalse(hasattr(entries[0], '__dict__'))
+        self.assertIsInstance(entries[0], TopEntry)
+        self.assertIsNone(get_top(['music'], 5))
+        self.assertIsNone(get_top(['unknown'], 1))
+        self.assertEqual(
+            len(self.client.get('/api/leaderboard/top-by-field/?limit=5').data['music']), 5
+        )
+
+
+class LeaderboardConditionalGetTest(APITestCase):
+    """Test ETag / If-None-Match on the polled leaderboard endpoints."""
+    
+    def setUp(self):
+        """Create two ranked users in music and one in dance."""
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='poller', email='poller@university.edu', password='testpass123'
+        )
+        self.other = User.objects.create_user(
+            username='rival', email='rival@university.edu', password='testpass123'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        Leaderboard.objects.create(user=self.user, field='music', score=20, rank=1, weekly_score=20)
+        self.rival = Leaderboard.objects.create(
+            user=self.other, field='music', score=10, rank=2, weekly_score=10
+        )
+        Leaderboard.objects.create(user=self.other, field='dance', score=5, rank=1)
+    
+    def tearDown(self):
+        cache.clear()
+    
+    def test_current_client_gets_304_without_queries(self):
+        """A matching If-None-Match is answered before any table is read."""
+        for url in [
+            '/api/leaderboard/weekly/',
+            '/api/leaderboard/weekly/?field=music',
+            '/api/leaderboard/field/?field=music',
+        ]:
+            first = self.client.get(url)
+            self.assertEqual(first.status_code, status.HTTP_200_OK)
+            self.assertTrue(first['ETag'].startswith('W/"'))
+            self.assertEqual(first['Cache-Control'], 'private, no-cache')
+            
+            cache.clear()  # no snapshot to fall back on either
+            etag = self.client.get(url)['ETag']
+            with self.assertNumQueries(0):
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+            self.assertEqual(response['ETag'], etag)
+            self.assertFalse(response.content)
+    
+    def test_rerank_changes_etag(self):
+        """Writes to a field invalidate its ETag, and only its ETag."""
+        music = self.client.get('/api/leaderboard/weekly/?field=music')['ETag']
+        dance = self.client.get('/api/leaderboard/field/?field=dance')['ETag']
+        
+        Leaderboard.objects.filter(id=self.rival.id).update(score=50, weekly_score=50)
+        with self.captureOnCommitCallbacks(execute=True):
+            LeaderboardService.update_rankings('music')
+        
+        response = self.client.get('/api/leaderboard/weekly/?field=music', HTTP_IF_NONE_MATCH=music)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], music)
+        self.assertEqual(response.data['leaderboards'][0]['username'], 'rival')
+        self.assertEqual(
+            self.client.get('/api/leaderboard/field/?field=dance', HTTP_IF_NONE_MATCH=dance).status_code,
+            status.HTTP_304_NOT_MODIFIED
+        )
+    
+    def test_etag_depends_on_request_shape(self):
+        """Different pages or filters of the same field do not share an ETag."""
+        urls = [
+            '/api/leaderboard/field/?field=music',
+            '/api/leaderboard/field/?field=music&page_size=1',
+            '/api/leaderboard/weekly/?field=music',
+            '/api/leaderboard/monthly/?field=music',
+            '/api/leaderboard/weekly/',
+        ]
+        etags = {self.client.get(url)['ETag'] for url in urls}
+        self.assertEqual(len(etags), len(urls))
+    
+    def test_if_none_match_lists_and_weak_comparison(self):
+        """Any tag in the header list matches, compared weakly."""
+        url = '/api/leaderboard/weekly/?field=music'
+        etag = self.client.get(url)['ETag']
+        strong = etag.removeprefix('W/')
+        
+        for header in [f'"stale", {etag}', strong, '*']:
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=header)
+            self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED, header)
+        self.assertEqual(
+            self.client.get(url, HTTP_IF_NONE_MATCH='"stale"').status_code,
+            status.HTTP_200_OK
+        )
+
+
+class LeaderboardFollowingTest(APITestCase):
+    """Test the friends-only leaderboard."""
+    
+    url = '/api/leaderboard/following/?field=music'
+    
+    def setUp(self):
+        """Create a user following four of five ranked music users."""
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='me', email='me@university.edu', password='testpass123'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.others = [
+            User.objects.create_user(
+                username=f'friend{i}', email=f'friend{i}@university.edu', password='testpass123'
+            )
+            for i in range(5)
+        ]
+        for i, (user, score) in enumerate(zip(self.others, [50, 40, 30, 20, 60])):
+            Leaderboard.objects.create(user=user, field='music', score=score, rank=i + 1)
+        Leaderboard.objects.create(user=self.others[0], field='dance', score=99, rank=1)
+        self.own = Leaderboard.objects.create(user=self.user, field='music', score=35, rank=4)
+        # friend4 (60 points) is not followed.
+        Follow.objects.bulk_create([Follow(follower=self.user, following=u) for u in self.others[:4]])
+    
+    def tearDown(self):
+        cache.clear()
+    
+    def usernames(self, data):
+        return [(row['username'], row['following_rank']) for row in data['leaderboards']]
+    
+    def test_ranks_among_followed_accounts(self):
+        """Only followed accounts and the user take part, in score order."""
+        response = self.client.get(self.url)
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual((response.data['rank'], response.data['count']), (3, 5))
+        self.assertEqual(
+            self.usernames(response.data),
+            [('friend0', 1), ('friend1', 2), ('me', 3), ('friend2', 4), ('friend3', 5)]
+        )
+        
+        limited = self.client.get(self.url + '&limit=2').data
+        self.assertEqual(limited['rank'], 3)
+        self.assertEqual(self.usernames(limited), [('friend0', 1), ('friend1', 2)])
+    
+    def test_user_without_entry(self):
+        """Without an own entry the followed accounts are still ranked."""
+        self.own.delete()
+        
+        result = get_following_leaderboard(self.user.id, 'music', 10)
+        
+        self.assertEqual((result['rank'], result['count']), (None, 4))
+        self.assertEqual(len(result['leaderboards']), 4)
+    
+    def test_both_plans_agree_and_query_count_is_fixed(self):
+        """The IN and score-ordered plans return the same rows in five queries."""
+        for score_order in (False, True):
+            self.assertEqual(
+                list(followed_entries(self.user.id, 'music', score_order)
+                     .order_by('-score', 'id').values_list('id', flat=True)),
+                list(Leaderboard.objects.filter(
+                    field='music', user__in=self.others[:4]
+                ).order_by('-score', 'id').values_list('id', flat=True))
+            )
+        Follow.objects.bulk_create([
+            Follow(follower=self.user, following=User.objects.create_user(
+                username=f'extra{i}', email=f'extra{i}@university.edu', password='testpass123'
+            ))
+            for i in range(20)
+        ])
+        
+        with self.assertNumQueries(5):
+            get_following_leaderboard(self.user.id, 'music', 10)
+    
+    def test_cached_until_follows_or_field_change(self):
+        """Hot reads are free; following someone or a re-rank invalidates."""
+        self.client.get(self.url)
+        with self.assertNumQueries(0):
+            self.client.get(self.url)
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            Follow.objects.create(follower=self.user, following=self.others[4])
+        self.assertEqual(self.client.get(self.url).data['leaderboards'][0]['username'], 'friend4')
+        
+        Leaderboard.objects.filter(user=self.others[3], field='music').update(score=70)
+        with self.captureOnCommitCallbacks(execute=True):
+            LeaderboardService.update_rankings('music')
+        self.assertEqual(self.client.get(self.url).data['leaderboards'][0]['username'], 'friend3')
+    
+    def test_invalid_parameters(self):
+        """field is required and limit must be an integer."""
+        self.assertEqual(
+            self.client.get('/api/leaderboard/following/').status_code,
+            status.HTTP_400_BAD_REQUEST
+        )
+        self.assertEqual(
+            self.client.get(self.url + '&limit=all').status_code,
+            status.HTTP_400_BAD_REQUEST
+        )
+
+
+class LeaderboardOverallTest(APITestCase):
+    """Test the overall leaderboard maintained from field score changes."""
+    
+    url = '/api/leaderboard/overall/'
+    
+    def setUp(self):
+        """Create three users with no engagement yet."""
+        cache.clear()
+        self.users = [
+            User.objects.create_user(
+                username=f'overall{i}', email=f'overall{i}@university.edu', password='testpass123'
+            )
+            for i in range(3)
+        ]
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.users[0])
+    
+    def tearDown(self):
+        cache.clear()
+    
+    def overall(self):
+        return sorted(OverallLeaderboard.objects.values_list('user_id', 'score', 'rank'))
+    
+    def summed(self):
+        totals = {}
+        for user_id, score in Leaderboard.objects.values_list('user_id', 'score'):
+            totals[user_id] = totals.get(user_id, 0) + score
+        return totals
+    
+    def test_per_event_path_keeps_sum_and_ranks(self):
+        """Single score changes update the overall score and re-rank after commit."""
+        with self.captureOnCommitCallbacks(execute=True):
+            LeaderboardService._record_score_change(self.users[0].id, 'music', 'like', count=3)
+            LeaderboardService._record_score_change(self.users[0].id, 'dance', 'follow')
+            LeaderboardService._record_score_change(self.users[1].id, 'art', 'comment', count=4)
+        with self.captureOnCommitCallbacks(execute=True):
+            LeaderboardService.remove_score(self.users[0].id, 'dance', 'follow')
+            LeaderboardService.remove_score(self.users[2].id, 'art', 'like')
+        flush_dirty_fields(force=True)
+        
+        totals = self.summed()
+        self.assertEqual(
+            self.overall(),
+            [(self.users[0].id, totals[self.users[0].id], 2),
+             (self.users[1].id, totals[self.users[1].id], 1)]
+        )
+    
+    def test_apply_events_matches_rebuild(self):
+        """A batch keeps the same totals and ranks a full rebuild computes."""
+        LeaderboardService.apply_events([
+            ('like', self.users[0].id, 'music', 2, None),
+            ('follow', self.users[1].id, 'dance', 1, None),
+            ('like', self.users[1].id, 'music', 1, None),
+            ('like', self.users[0].id, 'music', -5, None),
+            ('comment', self.users[2].id, 'art', 3, None),
+        ])
+        maintained = self.overall()
+        self.assertEqual(
+            {user_id: score for user_id, score, _ in maintained}, self.summed()
+        )
+        self.assertEqual([rank for _, _, rank in sorted(maintained, key=lambda r: r[2])], [1, 2, 3])
+        
+        OverallLeaderboard.objects.update(score=0, rank=0)
+        rebuild_overall()
+        self.assertEqual(self.overall(), maintained)
+    
+    def test_rebuild_removes_users_without_entries(self):
+        """The backfill command recomputes every row and drops stale ones."""
+        Leaderboard.objects.create(user=self.users[0], field='music', score=7)
+        Leaderboard.objects.create(user=self.users[0], field='art', score=3)
+        OverallLeaderboard.objects.create(user=self.users[1], score=99, rank=1)
+        
+        out = StringIO()
+        call_command('rebuild_overall_leaderboard', stdout=out)
+        
+        self.assertIn('Wrote 1 overall leaderboard rows', out.getvalue())
+        self.assertEqual(self.overall(), [(self.users[0].id, 10, 1)])
+    
+    def test_endpoint_pages_and_caches(self):
+        """The endpoint is cursor-paginated by score; the first page is cached."""
+        for user, score in zip(self.users, [5, 20, 5]):
+            Leaderboard.objects.create(user=user, field='music', score=score)
+        with self.captureOnCommitCallbacks(execute=True):
+            rebuild_overall()
+        
+        first = self.client.get(self.url + '?page_size=2')
+        self.assertEqual(first.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [(row['username'], row['score'], row['rank']) for row in first.data['leaderboards']],
+            [('overall1', 20, 1), ('overall0', 5, 2)]
+        )
+        second = self.client.get(first.data['next'])
+        self.assertEqual([row['username'] for row in second.data['leaderboards']], ['overall2'])
+        self.assertIsNone(second.data['next'])
+        
+        with self.assertNumQueries(0):
+            self.client.get(self.url + '?page_size=2')
+        self.assertEqual(
+            self.client.get(self.url + '?page_size=2', HTTP_IF_NONE_MATCH=first['ETag']).status_code,
+            status.HTTP_304_NOT_MODIFIED
+        )
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            LeaderboardService._record_score_change(self.users[2].id, 'art', 'follow', count=10)
+        flush_dirty_fields(force=True)
+        self.assertEqual(
+            self.client.get(self.url + '?page_size=2').data['leaderboards'][0]['username'],
+            'overall2'
+        )
+
+
+class CountingBackend(LocalBackend):
+    """Local bus backend that counts how often it is started."""
+    
+    starts = 0
+    
+    def start(self, deliver):
+        self.starts += 1
+        super().start(deliver)
+
+
+class LeaderboardStreamTest(TestCase):
+    """Test the Server-Sent Events leaderboard stream."""
+    
+    url = '/api/leaderboard/stream/?field=music'
+    
+    def setUp(self):
+        """Create two ranked users in music."""
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='watcher', email='watcher@university.edu', password='testpass123'
+        )
+        self.other = User.objects.create_user(
+            username='chaser', email='chaser@university.edu', password='testpass123'
+        )
+        self.auth = {'Authorization': f'Bearer {AccessToken.for_user(self.user)}'}
+        Leaderboard.objects.create(user=self.user, field='music', score=20, rank=1)
+        self.chaser = Leaderboard.objects.create(user=self.other, field='music', score=10, rank=2)
+    
+    def tearDown(self):
+        cache.clear()
+    
+    def overtake(self):
+        """Let the chaser overtake and re-rank, running the on-commit hooks."""
+        Leaderboard.objects.filter(id=self.chaser.id).update(score=50)
+        with self.captureOnCommitCallbacks(execute=True):
+            LeaderboardService.update_rankings('music')
+    
+    @staticmethod
+    def parse(frame):
+        if isinstance(frame, bytes):
+            frame = frame.decode()
+        fields = dict(line.split(': ', 1) for line in frame.strip().split('\n'))
+        return fields['event'], json.loads(fields['data'])
+    
+    async def test_snapshot_then_deltas(self):
+        """The stream opens with the top N and then sends only what changed."""
+        response = await self.async_client.get(self.url, headers=self.auth)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        stream = response.streaming_content
+        
+        event, data = self.parse(await anext(stream))
+        self.assertEqual(event, 'snapshot')
+        self.assertEqual(
+            [(row['username'], row['rank'], row['score']) for row in data['leaderboards']],
+            [('watcher', 1, 20), ('chaser', 2, 10)]
+        )
+        
+        await sync_to_async(self.overtake)()
+        
+        event, data = self.parse(await asyncio.wait_for(anext(stream), 5))
+        self.assertEqual(event, 'delta')
+        self.assertEqual(
+            sorted((row['username'], row['rank'], row['score']) for row in data['changed']),
+            [('chaser', 1, 50), ('watcher', 2, 20)]
+        )
+        self.assertEqual(data['removed'], [])
+        await stream.aclose()
+    
+    def test_top_matches_top_by_field(self):
+        """Unranked entries are left out and ranks follow the listed order."""
+        newcomer = User.objects.create_user(
+            username='newcomer', email='newcomer@university.edu', password='testpass123'
+        )
+        Leaderboard.objects.create(user=newcomer, field='music', score=5)
+        Leaderboard.objects.filter(id=self.chaser.id).update(score=50)
+        
+        rows = load_top('music')
+        self.assertEqual(
+            [(row['username'], row['rank'], row['score']) for row in rows],
+            [('chaser', 1, 50), ('watcher', 2, 20)]
+        )
+        self.assertEqual(
+            [(row['username'], row['rank']) for row in get_ranked_top(['music'], 10)['music']],
+            [(row['username'], row['rank']) for row in rows]
+        )
+    
+    def test_requires_authentication_and_field(self):
+        """Anonymous clients get 401; a missing or unknown field gets 400."""
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_401_UNAUTHORIZED)
+        for url in ['/api/leaderboard/stream/', '/api/leaderboard/stream/?field=chess']:
+            self.assertEqual(
+                self.client.get(url, headers=self.auth).status_code,
+                status.HTTP_400_BAD_REQUEST
+            )
+    
+    def test_one_query_fans_out_to_every_subscriber(self):
+        """Idle subscribers share one bus listener and one reload per change."""
+        backend = CountingBackend()
+        bus = LeaderboardBus(backend)
+        
+        async def subscribe_all():
+            hub = get_hub()
+            return hub, [(await hub.subscribe('music'))[0] for _ in range(2000)]
+        
+        with mock.patch('engagement.leaderboard_stream.get_bus', return_value=bus):
+            hub, subscriptions = async_to_sync(subscribe_all)()
+        # One listener for the event loop and one backend start, not one per subscriber.
+        self.assertEqual((len(bus._listeners), backend.starts), (1, 1))
+        Leaderboard.objects.filter(id=self.chaser.id).update(score=15)
+        
+        with self.assertNumQueries(1):
+            async_to_sync(hub.feeds['music'].refresh)()
+        
+        frames = {subscription.queue.get_nowait() for subscription in subscriptions}
+        self.assertEqual(len(frames), 1)
+        event, data = self.parse(frames.pop())
+        self.assertEqual((event, [row['score'] for row in data['changed']]), ('delta', [15]))
+        
+        for subscription in subscriptions:
+            hub.unsubscribe(subscription)
+        self.assertEqual(hub.feeds, {})
+    
+    def test_slow_subscriber_is_resynced(self):
+        """A full queue is replaced by a resync marker, not grown without bound."""
+        subscription = Subscription(feed=None)
+        for i in range(SUBSCRIBER_QUEUE_SIZE + 1):
+            subscription.send(f'frame {i}')
+        
+        self.assertEqual(subscription.queue.qsize(), 1)
+        self.assertIs(subscription.queue.get_nowait(), RESYNC)
+    
+    def test_diff_rows(self):
+        """Only new or changed entries and departures are reported."""
+        previous = [
+            {'user_id': 1, 'rank': 1, 'score': 9},
+            {'user_id': 2, 'rank': 2, 'score': 5},
+            {'user_id': 3, 'rank': 3, 'score': 4},
+        ]
+        current = [
+            {'user_id': 1, 'rank': 1, 'score': 9},
+            {'user_id': 4, 'rank': 2, 'score': 6},
+            {'user_id': 2, 'rank': 3, 'score': 5},
+        ]
+        
+        self.assertEqual(diff_rows(previous, current), (current[1:], [3]))
+
+
+class LeaderboardPaginationTest(APITestCase):
+    """Test keyset pagination on the leaderboard list endpoints."""
+    
+    SCORES = [50, 40, 40, 40, 40, 30, 20, 20, 10]
+    
+    def setUp(self):
+        """Create one field with runs of tied scores and an update history."""
+        cache.clear()
+        self.entries = []
+        for i, score in enumerate(self.SCORES):
+            user = User.objects.create_user(
+                username=f'pager{i}',
+                email=f'pager{i}@university.edu',
+                password='testpass123'
+            )
+            self.entries.append(Leaderboard.objects.create(user=user, field='art', score=score))
+        LeaderboardService.update_rankings('art')
+        self.user = self.entries[0].user
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+    
+    def tearDown(self):
+        cache.clear()
+    
+    def walk(self, url, key):
+        """Follow ``next`` links and return every id served, in order."""
+        ids = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            ids.extend(item['id'] for item in response.data[key])
+            url = response.data['next']
+        return ids
+    
+    def test_field_pages_follow_rank_order(self):
+        """Walking the field in pages of 2 yields each entry once, ranked."""
+        expected = list(
+            Leaderboard.objects.filter(field='art').order_by('rank').values_list('id', flat=True)
+        )
+        
+        self.assertEqual(self.walk('/api/leaderboard/field/?field=art&page_size=2', 'leaderboards'), expected)
+    
+    def test_deep_pages_cost_the_same(self):
+        """A cursor page runs the same single query as the first page."""
+        first_url = '/api/leaderboard/field/?field=art&page_size=2'
+        with self.assertNumQueries(1):
+            response = self.client.get(first_url)
+        deep_url = response.data['next']
+        for _ in range(2):
+            deep_url = self.client.get(deep_url).data['next']
+        with self.assertNumQueries(1):
+            self.client.get(deep_url)
+    
+    def test_update_history_pages_newest_first(self):
+        """A user's score changes page by (created_at, id), newest first."""
+        leaderboard = self.entries[0]
+        same_time = timezone.now()
+        updates = LeaderboardUpdate.objects.bulk_create([
+            LeaderboardUpdate(leaderboard=leaderboard, score_change=i, reason='like')
+            for i in range(5)
+        ])
+        # Force ties on created_at so the id tie-breaker is exercised.
+        LeaderboardUpdate.objects.filter(id__in=[u.id for u in updates[:3]]).update(created_at=same_time)
+        expected = list(
+            LeaderboardUpdate.objects.filter(leaderboard=leaderboard)
+            .order_by('-created_at', '-id').values_list('id', flat=True)
+        )
+        
+        ids = self.walk(f'/api/leaderboard-updates/user/?user_id={self.user.id}&page_size=2', 'updates')
+        
+        self.assertEqual(ids, expected)
+    
+    def test_list_pages_and_invalid_cursor(self):
+        """The viewset list pages by (score, id); a bad cursor is a 404."""
+        ids, url = [], '/api/leaderboard/?field=art&page_size=4'
+        while url:
+            response = self.client.get(url)
+            ids.extend(item['id'] for item in response.data['results'])
+            url = response.data['next']
+        expected = sorted(self.entries, key=lambda lb: (-lb.score, lb.id))
+        self.assertEqual(ids, [lb.id for lb in expected])
+        
+        self.assertEqual(
+            self.client.get('/api/leaderboard/?cursor=not-a-cursor').status_code,
+            status.HTTP_404_NOT_FOUND
+        )
+
+
+class LeaderboardUserStatsTest(APITestCase):
+    """Test the shared, cached per-user stats."""
+    
+    def setUp(self):
+        """Create a user ranked in two fields and a rival in one."""
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='statsuser', email='stats@university.edu', password='testpass123'
+        )
+        self.rival = User.objects.create_user(
+            username='rival', email='rival@university.edu', password='testpass123'
+        )
+        self.music = Leaderboard.objects.create(user=self.user, field='music', score=30, rank=1)
+        Leaderboard.objects.create(user=self.user, field='art', score=10, rank=3, total_follows=2)
+        self.rival_music = Leaderboard.objects.create(user=self.rival, field='music', score=5, rank=2)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+    
+    def tearDown(self):
+        cache.clear()
+    
+    def test_stats_are_one_query_then_cached(self):
+        """Cold stats cost one query; repeated calls and my-stats cost none."""
+        with self.assertNumQueries(1):
+            stats = get_user_stats(self.user.id)
+        self.assertEqual(stats['total_score'], 40)
+        self.assertEqual(stats['avg_rank'], 2)
+        self.assertEqual(stats['field_count'], 2)
+        self.assertEqual(stats['fields']['music']['rank'], 1)
+        
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/leaderboard/my-stats/')
+        self.assertEqual(response.data['total_score'], 40)
+        self.assertEqual(response.data['average_rank'], 2)
+        self.assertEqual(
+            [lb['field'] for lb in response.data['leaderboards']], ['music', 'art']
+        )
+        
+        with self.assertNumQueries(0):
+            data = UserLeaderboardStatsSerializer(self.user).data
+        self.assertEqual(data['total_score'], 40)
+        self.assertEqual(data['total_rank'], 2)
+    
+    def test_own_score_change_invalidates(self):
+        """A write to one of the user's rows drops their cached stats."""
+        get_user_stats(self.user.id)
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            LeaderboardService.apply_score_delta(self.user.id, 'art', 'follow')
+        
+        self.assertEqual(get_user_stats(self.user.id)['total_score'], 45)
+    
+    def test_rerank_of_users_field_invalidates(self):
+        """A re-rank that moves the user's rank drops their cached stats."""
+        get_user_stats(self.user.id)
+        
+        Leaderboard.objects.filter(id=self.rival_music.id).update(score=100)
+        with self.captureOnCommitCallbacks(execute=True):
+            LeaderboardService.update_rankings('music')
+        
+        self.assertEqual(get_user_stats(self.user.id)['fields']['music']['rank'], 2)
+    
+    def test_unrelated_changes_keep_cache(self):
+        """Other users' writes and re-ranks of other fields are ignored."""
+        get_user_stats(self.user.id)
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            LeaderboardService.apply_score_delta(self.rival.id, 'sports', 'like')
+            LeaderboardService.update_rankings('sports')
+        
+        with self.assertNumQueries(0):
+            get_user_stats(self.user.id)
+
+
 class LeaderboardAPITest(APITestCase):
     """Test Leaderboard API endpoints."""
     
     def setUp(self):
         """Create test user and leaderboard."""
+        cache.clear()
         self.user = User.objects.create_user(
             username='testuser',
             email='test@university.edu',
@@ -0,0 +1,242 @@
+"""
+Per-process read model of every field's top entries.
+
+The hottest reads (``top-by-field`` and the first page of ``field``) only
+need the first few dozen entries of a field. Each worker process keeps the
+top ``LEADERBOARD_TOP_N`` (default 100) entries of every field in memory,
+as tuples of ``__slots__`` records, each table tagged with the field's
+snapshot version (see leaderboard_snapshots).
+
+A read fetches the current versions of the fields it needs in one cache
+round trip. Tables whose version moved are reloaded, all of them in one
+query that reads each field's top through its score index. The response
+dicts are built straight from the records: no ORM instances, and no
+pickled payload to load from the cache.
+
+Entries are held in the field's paging order (score descending, ties by
+id), so the first page of ``field`` continues exactly into its cursor
+pages. Versions are bumped when a field is re-ranked, so that order is
+also rank order when the table is loaded.
+
+``top-by-field`` and the live stream list only ranked entries (rank 0
+means the entry has not been through a re-rank yet) in that same order.
+Stored ranks lag score changes until the field's debounced re-rank, so
+those reads number the entries by position (``number_rows``) instead of
+returning the stored rank, and the ranks they show always agree with the
+order of the list.
+
+Memory is bounded by the number of fields times ``LEADERBOARD_TOP_N + 1``
+records: about 28 KB per field at 100 entries, 220 KB for all fields
+(measured with ``manage.py bench_leaderboard_topn``). Unknown fields are
+never cached.
+"""
+
+import sys
+import threading
+from itertools import islice
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import F, Q, Window
+from django.db.models.functions import RowNumber
+
+from .leaderboard_models import Leaderboard
+from .leaderboard_rows import LIST_COLUMNS
+from .leaderboard_snapshots import FIELD_CODES, get_versions
+
+
+# Paging order of a field: score descending, ties by id, as in leaderboard_ranking.
+TOP_ORDER = ('-score', 'id')
+
+
+def get_top_n():
+    return getattr(settings, 'LEADERBOARD_TOP_N', 100)
+
+
+def number_rows(rows):
+    """Set each row's ``rank`` to its 1-based position in ``rows``; return ``rows``."""
+    for position, row in enumerate(rows, 1):
+        row['rank'] = position
+    return rows
+
+
+def top_queryset(fields, limit):
+    """
+    Return the first ``limit`` entries of each of ``fields`` as one query.
+
+    Each field's entries are picked by ``id IN (... ORDER BY score DESC, id
+    LIMIT n)``, a range scan of the ``(field, -score, id)`` index, so the
+    cost does not grow with the size of the fields. Backends without
+    sliced ``IN`` subqueries number every row of the fields instead.
+    """
+    order = ['field', *TOP_ORDER]
+    if not connection.features.allow_sliced_subqueries_with_in:
+        return (
+            Leaderboard.objects
+            .filter(field__in=fields)
+            .annotate(position=Window(
+                RowNumber(),
+                partition_by=F('field'),
+                order_by=[F('score').desc(), F('id').asc()]
+            ))
+            .filter(position__lte=limit)
+            .order_by(*order)
+        )
+    picked = Q()
+    for field in fields:
+        top = Leaderboard.objects.filter(field=field).order_by(*TOP_ORDER)
+        picked |= Q(id__in=top.values('id')[:limit])
+    return Leaderboard.objects.filter(picked).order_by(*order)
+
+
+class TopEntry:
+    """One entry, with the LeaderboardListSerializer fields as slots."""
+
+    __slots__ = tuple(key for key, _ in LIST_COLUMNS)
+
+    def __init__(self, values):
+        for name, value in zip(self.__slots__, values):
+            setattr(self, name, value)
+
+    def as_row(self):
+        """Return the entry as a response dict (LIST_COLUMNS shape)."""
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class FieldTop:
+    """A field's top entries, as of ``version``."""
+
+    __slots__ = ('version', 'entries')
+
+    def __init__(self, version, entries):
+        self.version = version
+        self.entries = entries
+
+
+class TopNReadModel:
+    """
+    The top ``size`` entries of every field, refreshed on version change.
+
+    One more entry than ``size`` is kept, so that a page of ``size``
+    entries knows whether another page follows.
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self.tables = {}
+        self.lock = threading.Lock()
+
+    def top(self, fields, limit, ranked=False):
+        """
+        Return the top ``limit`` entries of each of ``fields``.
+
+        Args:
+            fields: Field codes (all in FIELD_CODES)
+            limit: Entries per field, at most ``size + 1``
+            ranked: Leave out unranked entries and number the rest by position
+
+        Returns:
+            Dictionary of field -> list of LIST_COLUMNS-shaped dicts
+        """
+        versions = get_versions(fields)
+        tables = self.tables
+        stale = [
+            field for field in fields
+            if field not in tables or tables[field].version != versions[field]
+        ]
+        if stale:
+            self.load(stale, versions)
+            tables = self.tables
+        if not ranked:
+            return {
+                field: [entry.as_row() for entry in tables[field].entries[:limit]]
+                for field in fields
+            }
+        return {
+            field: number_rows([
+                entry.as_row()
+                for entry in islice((entry for entry in tables[field].entries if entry.rank), limit)
+            ])
+            for field in fields
+        }
+
+    def load(self, fields, versions):
+        """
+        Reload the tables of ``fields`` in one query.
+
+        ``versions`` must have been read before the query, so a table loaded
+        concurrently with a write is tagged with the older version and
+        reloaded by the next reader.
+        """
+        rows = {field: [] for field in fields}
+        queryset = top_queryset(fields, self.size + 1).values_list(
+            *(source for _, source in LIST_COLUMNS)
+        )
+        field_index = [key for key, _ in LIST_COLUMNS].index('field')
+        for values in queryset:
+            rows[values[field_index]].append(TopEntry(values))
+        with self.lock:
+            # Replace rather than mutate, so readers never see a half-built table.
+            tables = dict(self.tables)
+            for field in fields:
+                tables[field] = FieldTop(versions[field], tuple(rows[field]))
+            self.tables = tables
+
+    def memory_bytes(self):
+        """Approximate bytes held by the tables, records and their values."""
+        seen = set()
+
+        def size(obj):
+            if id(obj) in seen:
+                return 0
+            seen.add(id(obj))
+            return sys.getsizeof(obj)
+
+        total = size(self.tables)
+        for table in self.tables.values():
+            total += size(table) + size(table.entries)
+            for entry in table.entries:
+                total += size(entry)
+                total += sum(size(getattr(entry, name)) for name in TopEntry.__slots__)
+        return total
+
+
+_model = None
+_model_lock = threading.Lock()
+
+
+def get_read_model():
+    """Return this process's read model, sized by LEADERBOARD_TOP_N."""
+    global _model
+    with _model_lock:
+        if _model is None or _model.size != get_top_n():
+            _model = TopNReadModel(get_top_n())
+        return _model
+
+
+def get_top(fields, limit):
+    """
+    Serve the top ``limit`` entries of ``fields`` from the read model.
+
+    Returns:
+        Dictionary of field -> list of entry dicts, or None if the request
+        is outside what the read model holds (unknown field, or ``limit``
+        above ``LEADERBOARD_TOP_N + 1``)
+    """
+    fields = list(fields)
+    if limit > get_top_n() + 1 or any(field not in FIELD_CODES for field in fields):
+        return None
+    return get_read_model().top(fields, limit)
+
+
+def get_ranked_top(fields, limit):
+    """
+    Like ``get_top``, but only ranked entries, numbered by position.
+
+    Returns:
+        Dictionary of field -> list of entry dicts, or None as for ``get_top``
+    """
+    fields = list(fields)
+    if limit > get_top_n() + 1 or any(field not in FIELD_CODES for field in fields):
+        return None
+    return get_read_model().top(fields, limit, ranked=True)
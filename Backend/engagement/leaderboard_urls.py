@@ -5,6 +5,7 @@ Add to engagement/urls.py or main project urls.py
 
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
+from .leaderboard_stream import leaderboard_stream
 from .leaderboard_views import LeaderboardViewSet, LeaderboardUpdateViewSet
 
 router = DefaultRouter()
@@ -12,5 +13,7 @@ router.register(r'leaderboard', LeaderboardViewSet, basename='leaderboard')
 router.register(r'leaderboard-updates', LeaderboardUpdateViewSet, basename='leaderboard-update')
 
 urlpatterns = [
+    # Before the router, which would route 'stream' to the detail view.
+    path('leaderboard/stream/', leaderboard_stream, name='leaderboard-stream'),
     path('', include(router.urls)),
 ]
@@ -0,0 +1,87 @@
+"""
+Per-user leaderboard stats shared by my-stats, LeaderboardService and
+UserLeaderboardStatsSerializer.
+
+Stats are built from one query over the user's rows (at most one per field)
+and cached as a single object. The cached object is tagged with the user's
+version, bumped whenever one of the user's rows is written, and with the
+versions of the fields the user is ranked in, bumped on every re-rank of
+those fields (a re-rank moves ranks without touching the user's row).
+"""
+
+from django.core.cache import cache
+
+from .leaderboard_models import Leaderboard
+from .leaderboard_snapshots import FIELD_CODES, get_snapshot_timeout, read_versioned, user_scope
+
+
+USER_STATS_KEY = 'leaderboard:user-stats:{user_id}'
+
+STATS_COLUMNS = (
+    'id', 'user__username', 'field', 'score', 'rank',
+    'total_likes', 'total_comments', 'total_follows',
+)
+
+
+def compute_user_stats(user_id):
+    """
+    Build a user's stats from a single query.
+
+    Returns:
+        Dictionary with total_score, avg_rank, field_count, a per-field
+        breakdown and the rows in LeaderboardListSerializer shape
+    """
+    rows = [
+        dict(zip(STATS_COLUMNS, values))
+        for values in Leaderboard.objects.filter(user_id=user_id)
+        .order_by('-score', 'id')
+        .values_list(*STATS_COLUMNS)
+    ]
+    for row in rows:
+        row['username'] = row.pop('user__username')
+
+    field_count = len(rows)
+    return {
+        'total_score': sum(row['score'] for row in rows),
+        'avg_rank': round(sum(row['rank'] for row in rows) / max(field_count, 1)),
+        'field_count': field_count,
+        'fields': {
+            row['field']: {
+                'score': row['score'],
+                'rank': row['rank'],
+                'likes': row['total_likes'],
+                'comments': row['total_comments'],
+                'follows': row['total_follows']
+            }
+            for row in rows
+        },
+        'leaderboards': rows,
+    }
+
+
+def get_user_stats(user_id):
+    """
+    Return a user's stats, from cache while none of their rows or ranks moved.
+
+    Args:
+        user_id: ID of the user
+
+    Returns:
+        Dictionary as built by ``compute_user_stats``
+    """
+    key = USER_STATS_KEY.format(user_id=user_id)
+    scope = user_scope(user_id)
+    cached, versions = read_versioned(key, FIELD_CODES + [scope])
+    if cached is not None and all(
+        versions.get(name) == version for name, version in cached['versions'].items()
+    ):
+        return cached['data']
+
+    data = compute_user_stats(user_id)
+    tags = [scope] + [row['field'] for row in data['leaderboards'] if row['field'] in versions]
+    cache.set(
+        key,
+        {'versions': {name: versions[name] for name in tags}, 'data': data},
+        timeout=get_snapshot_timeout()
+    )
+    return data
@@ -4,16 +4,42 @@ from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from django.db.models import Sum, Count, Q
 from django.utils import timezone
-from datetime import timedelta
+from datetime import date, timedelta
 
-from .leaderboard_models import Leaderboard, LeaderboardUpdate
+from .leaderboard_models import Leaderboard, LeaderboardUpdate, OverallLeaderboard
 from .leaderboard_serializers import (
     LeaderboardSerializer,
     LeaderboardUpdateSerializer,
     LeaderboardListSerializer,
     UserLeaderboardStatsSerializer,
-    LeaderboardTimeSeriesSerializer,
 )
+from .leaderboard_conditional import conditional_get
+from .leaderboard_following import get_following_leaderboard
+from .leaderboard_histogram import get_percentile
+from .leaderboard_history import get_rank_history
+from .leaderboard_overall import OVERALL, OVERALL_COLUMNS
+from .leaderboard_pagination import LeaderboardPagination, LeaderboardUpdatePagination
+from .leaderboard_rows import (
+    DETAIL_COLUMNS,
+    LIST_COLUMNS,
+    TIME_SERIES_COLUMNS,
+    build_rows,
+    fetch_rows,
+    row_values,
+)
+from .leaderboard_service import LeaderboardService
+from .leaderboard_snapshots import FIELD_CODES, follow_scope, get_or_build, user_scope
+from .leaderboard_topn import get_ranked_top, get_top
+from .leaderboard_user_stats import get_user_stats
+
+
+TOP_BY_FIELD_MAX_LIMIT = 100
+AROUND_MAX_WINDOW = 50
+HISTORY_DEFAULT_DAYS = 30
+HISTORY_MAX_DAYS = 366
+RECENT_UPDATES_MAX_LIMIT = 100
+FOLLOWING_DEFAULT_LIMIT = 50
+FOLLOWING_MAX_LIMIT = 100
 
 
 class LeaderboardViewSet(viewsets.ReadOnlyModelViewSet):
@@ -28,11 +54,17 @@ class LeaderboardViewSet(viewsets.ReadOnlyModelViewSet):
     - GET /api/leaderboard/weekly/ - Weekly rankings
     - GET /api/leaderboard/monthly/ - Monthly rankings
     - GET /api/leaderboard/my-stats/ - Current user's leaderboard stats
+    - GET /api/leaderboard/around/ - Entries around a user in a field
+    - GET /api/leaderboard/history/ - A user's daily rank in a field
+    - GET /api/leaderboard/percentile/ - Approximate percentile in a field
+    - GET /api/leaderboard/following/ - Rank among followed accounts
+    - GET /api/leaderboard/overall/ - Ranking by total score across fields
     """
     
     queryset = Leaderboard.objects.all()
     serializer_class = LeaderboardSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = LeaderboardPagination
     filter_backends = [filters.OrderingFilter, filters.SearchFilter]
     ordering_fields = ['score', 'rank', 'updated_at']
     ordering = ['-score']
@@ -42,18 +74,30 @@ class LeaderboardViewSet(viewsets.ReadOnlyModelViewSet):
         """
         Optionally filter by field if provided in query params.
         """
-        queryset = Leaderboard.objects.all()
+        queryset = Leaderboard.objects.select_related('user')
         field = self.request.query_params.get('field', None)
         if field:
             queryset = queryset.filter(field=field)
         return queryset
     
+    def list(self, request, *args, **kwargs):
+        """
+        List leaderboard entries one page at a time.
+        
+        Rows are read with ``values()`` and shaped like LeaderboardSerializer
+        without building model instances; see engagement/leaderboard_rows.py.
+        """
+        queryset = row_values(self.filter_queryset(self.get_queryset()), DETAIL_COLUMNS)
+        page = self.paginate_queryset(queryset)
+        return self.get_paginated_response(build_rows(page, DETAIL_COLUMNS))
+    
     @action(detail=False, methods=['get'])
     def field(self, request):
         """
-        Get leaderboard for a specific field.
+        Get leaderboard for a specific field, one page at a time.
         
-        Usage: GET /api/leaderboard/field/?field=sports
+        Usage: GET /api/leaderboard/field/?field=sports&page_size=50
+               then follow ``next`` (``?cursor=...``) for later pages
         """
         field = request.query_params.get('field', None)
         if not field:
@@ -62,14 +106,66 @@ class LeaderboardViewSet(viewsets.ReadOnlyModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        leaderboards = Leaderboard.objects.filter(field=field).order_by('rank')
-        serializer = LeaderboardListSerializer(leaderboards, many=True)
+        def build():
+            leaderboards = self.paginator.paginate_queryset(
+                row_values(Leaderboard.objects.filter(field=field), LIST_COLUMNS), request
+            )
+            return {
+                'field': field,
+                'next': self.paginator.get_next_link(),
+                'leaderboards': build_rows(leaderboards, LIST_COLUMNS)
+            }
+
+        def first_page():
+            # Served from this worker's top-N read model when it holds the page.
+            top = get_top([field], page_size + 1)
+            if top is None:
+                return get_or_build('field', [field], build, params=[page_size])
+            leaderboards = self.paginator.paginate_first_rows(top[field], request)
+            return {
+                'field': field,
+                'next': self.paginator.get_next_link(),
+                'leaderboards': leaderboards
+            }
+
+        if field not in FIELD_CODES:
+            return Response(build())
+        cursor = request.query_params.get(self.paginator.cursor_query_param)
+        page_size = self.paginator.get_page_size(request)
         
-        return Response({
-            'field': field,
-            'count': leaderboards.count(),
-            'leaderboards': serializer.data
-        })
+        def respond():
+            return Response(build() if cursor else first_page())
+        
+        return conditional_get(request, 'field', [field], respond, params=[field, page_size, cursor])
+    
+    @action(detail=False, methods=['get'])
+    def overall(self, request):
+        """
+        Get the overall leaderboard (score summed across fields), one page at a time.
+        
+        Usage: GET /api/leaderboard/overall/?page_size=50
+               then follow ``next`` (``?cursor=...``) for later pages
+        """
+        def build():
+            leaderboards = self.paginator.paginate_queryset(
+                row_values(OverallLeaderboard.objects.all(), OVERALL_COLUMNS), request
+            )
+            return {
+                'next': self.paginator.get_next_link(),
+                'leaderboards': build_rows(leaderboards, OVERALL_COLUMNS)
+            }
+        
+        cursor = request.query_params.get(self.paginator.cursor_query_param)
+        page_size = self.paginator.get_page_size(request)
+        
+        def respond():
+            if cursor:
+                return Response(build())
+            return Response(
+                get_or_build('overall', [], build, params=[page_size], scopes=[OVERALL])
+            )
+        
+        return conditional_get(request, 'overall', [OVERALL], respond, params=[page_size, cursor])
     
     @action(detail=False, methods=['get'])
     def user(self, request):
@@ -85,13 +181,12 @@ class LeaderboardViewSet(viewsets.ReadOnlyModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        leaderboards = Leaderboard.objects.filter(user_id=user_id)
-        serializer = LeaderboardSerializer(leaderboards, many=True)
+        leaderboards = fetch_rows(Leaderboard.objects.filter(user_id=user_id), DETAIL_COLUMNS)
         
         return Response({
             'user_id': user_id,
-            'count': leaderboards.count(),
-            'leaderboards': serializer.data
+            'count': len(leaderboards),
+            'leaderboards': leaderboards
         })
     
     @action(detail=False, methods=['get'])
@@ -103,46 +198,243 @@ class LeaderboardViewSet(viewsets.ReadOnlyModelViewSet):
         Usage: GET /api/leaderboard/weekly/
         """
         field = request.query_params.get('field', None)
+
+        def build():
+            queryset = Leaderboard.objects.all()
+            if field:
+                queryset = queryset.filter(field=field)
+
+            # Sort by weekly score
+            leaderboards = queryset.order_by('-weekly_score')[:50]  # Top 50
+            return {
+                'period': 'weekly',
+                'field': field or 'all',
+                'leaderboards': fetch_rows(leaderboards, TIME_SERIES_COLUMNS)
+            }
+
+        if field and field not in FIELD_CODES:
+            return Response(build())
+        fields = [field] if field else FIELD_CODES
+        return conditional_get(
+            request, 'weekly', fields,
+            lambda: Response(get_or_build('weekly', fields, build)),
+            params=[field]
+        )
+    
+    @action(detail=False, methods=['get'])
+    def monthly(self, request):
+        """
+        Get monthly leaderboard rankings.
+        Includes all users sorted by monthly_score.
+        
+        Usage: GET /api/leaderboard/monthly/
+        """
+        field = request.query_params.get('field', None)
+
+        def build():
+            queryset = Leaderboard.objects.all()
+            if field:
+                queryset = queryset.filter(field=field)
+
+            # Sort by monthly score
+            leaderboards = queryset.order_by('-monthly_score')[:50]  # Top 50
+            return {
+                'period': 'monthly',
+                'field': field or 'all',
+                'leaderboards': fetch_rows(leaderboards, TIME_SERIES_COLUMNS)
+            }
+
+        if field and field not in FIELD_CODES:
+            return Response(build())
+        fields = [field] if field else FIELD_CODES
+        return conditional_get(
+            request, 'monthly', fields,
+            lambda: Response(get_or_build('monthly', fields, build)),
+            params=[field]
+        )
+    
+    @action(detail=False, methods=['get'])
+    def around(self, request):
+        """
+        Get the entries just above and below a user in a field.
         
-        queryset = Leaderboard.objects.all()
-        if field:
-            queryset = queryset.filter(field=field)
+        Usage: GET /api/leaderboard/around/?field=sports&user_id=1&window=5
+        """
+        field = request.query_params.get('field', None)
+        user_id = request.query_params.get('user_id', None)
+        if not field or not user_id:
+            return Response(
+                {'error': 'field and user_id parameters are required'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            user_id = int(user_id)
+            window = int(request.query_params.get('window', 5))
+        except ValueError:
+            return Response(
+                {'error': 'user_id and window must be integers'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        window = max(1, min(window, AROUND_MAX_WINDOW))
         
-        # Sort by weekly score
-        leaderboards = queryset.order_by('-weekly_score')[:50]  # Top 50
-        serializer = LeaderboardTimeSeriesSerializer(leaderboards, many=True)
+        entry, above, below = LeaderboardService.get_around_user(user_id, field, window)
+        if entry is None:
+            return Response(
+                {'error': 'User has no leaderboard entry in this field'},
+                status=status.HTTP_404_NOT_FOUND
+            )
         
         return Response({
-            'period': 'weekly',
-            'field': field or 'all',
-            'leaderboards': serializer.data
+            'field': field,
+            'user_id': user_id,
+            'window': window,
+            'entry': LeaderboardListSerializer(entry).data,
+            'above': LeaderboardListSerializer(above, many=True).data,
+            'below': LeaderboardListSerializer(below, many=True).data,
         })
     
     @action(detail=False, methods=['get'])
-    def monthly(self, request):
+    def history(self, request):
         """
-        Get monthly leaderboard rankings.
-        Includes all users sorted by monthly_score.
+        Get a user's daily rank and score in a field over a date range.
         
-        Usage: GET /api/leaderboard/monthly/
+        Usage: GET /api/leaderboard/history/?field=sports&user_id=1&from=2025-11-01&to=2025-11-30
+        
+        ``user_id`` defaults to the current user, ``to`` to today and
+        ``from`` to 30 days before ``to``.
         """
         field = request.query_params.get('field', None)
+        if not field:
+            return Response(
+                {'error': 'field parameter is required'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            user_id = int(request.query_params.get('user_id', request.user.id))
+            end = request.query_params.get('to')
+            end = date.fromisoformat(end) if end else timezone.localdate()
+            start = request.query_params.get('from')
+            start = date.fromisoformat(start) if start else end - timedelta(days=HISTORY_DEFAULT_DAYS)
+        except ValueError:
+            return Response(
+                {'error': 'user_id must be an integer and from/to dates in YYYY-MM-DD format'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if start > end or (end - start).days > HISTORY_MAX_DAYS:
+            return Response(
+                {'error': f'from must be before to and at most {HISTORY_MAX_DAYS} days apart'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
         
-        queryset = Leaderboard.objects.all()
-        if field:
-            queryset = queryset.filter(field=field)
+        return Response({
+            'field': field,
+            'user_id': user_id,
+            'from': start,
+            'to': end,
+            'history': get_rank_history(user_id, field, start, end),
+        })
+    
+    @action(detail=False, methods=['get'])
+    def percentile(self, request):
+        """
+        Get a user's approximate rank and "top N%" in a field.
+        
+        Usage: GET /api/leaderboard/percentile/?field=sports&user_id=1
+               GET /api/leaderboard/percentile/?field=sports&score=120
         
-        # Sort by monthly score
-        leaderboards = queryset.order_by('-monthly_score')[:50]  # Top 50
-        serializer = LeaderboardTimeSeriesSerializer(leaderboards, many=True)
+        Served from the field's score histogram; the exact rank is always
+        between ``rank_low`` and ``rank_high``. ``user_id`` defaults to the
+        current user.
+        """
+        field = request.query_params.get('field', None)
+        if not field:
+            return Response(
+                {'error': 'field parameter is required'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if field not in FIELD_CODES:
+            return Response(
+                {'error': f'Unknown field: {field}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            score = request.query_params.get('score')
+            user_id = None if score is not None else int(request.query_params.get('user_id', request.user.id))
+            score = int(score) if score is not None else None
+        except ValueError:
+            return Response(
+                {'error': 'user_id and score must be integers'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if score is None:
+            score = Leaderboard.objects.filter(user_id=user_id, field=field).values_list(
+                'score', flat=True
+            ).first()
+            if score is None:
+                return Response(
+                    {'error': 'User has no leaderboard entry in this field'},
+                    status=status.HTTP_404_NOT_FOUND
+                )
+        elif score < 0:
+            return Response(
+                {'error': 'score must not be negative'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
         
         return Response({
-            'period': 'monthly',
-            'field': field or 'all',
-            'leaderboards': serializer.data
+            'field': field,
+            'user_id': user_id,
+            'score': score,
+            **get_percentile(field, score),
         })
     
     @action(detail=False, methods=['get'])
+    def following(self, request):
+        """
+        Rank the current user among the accounts they follow in a field.
+        
+        Usage: GET /api/leaderboard/following/?field=sports&limit=50
+        
+        Returns the user's ``rank`` among followed accounts, the ``count``
+        of ranked entries and the top ``limit`` of them, each with its
+        ``following_rank``. Cached like the other hot reads, and also
+        invalidated when the user follows or unfollows someone.
+        """
+        field = request.query_params.get('field', None)
+        if not field:
+            return Response(
+                {'error': 'field parameter is required'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            limit = int(request.query_params.get('limit', FOLLOWING_DEFAULT_LIMIT))
+        except ValueError:
+            return Response(
+                {'error': 'limit must be an integer'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        limit = max(1, min(limit, FOLLOWING_MAX_LIMIT))
+        user_id = request.user.id
+        
+        def build():
+            return {
+                'field': field,
+                'user_id': user_id,
+                **get_following_leaderboard(user_id, field, limit),
+            }
+        
+        if field not in FIELD_CODES:
+            return Response(build())
+        scopes = [follow_scope(user_id), user_scope(user_id)]
+        return conditional_get(
+            request, 'following', [field] + scopes,
+            lambda: Response(get_or_build(
+                'following', [field], build, params=[user_id, limit], scopes=scopes
+            )),
+            params=[field, limit, user_id]
+        )
+    
+    @action(detail=False, methods=['get'], url_path='my-stats')
     def my_stats(self, request):
         """
         Get current user's leaderboard stats across all fields.
@@ -150,35 +442,48 @@ class LeaderboardViewSet(viewsets.ReadOnlyModelViewSet):
         Usage: GET /api/leaderboard/my-stats/
         """
         user = request.user
-        leaderboards = Leaderboard.objects.filter(user=user)
+        user_stats = get_user_stats(user.id)
         
         stats = {
             'user_id': user.id,
             'username': user.username,
             'email': user.email,
             'field_of_interest': user.field_of_interest,
-            'leaderboards': LeaderboardListSerializer(leaderboards, many=True).data,
-            'total_score': sum([lb.score for lb in leaderboards]),
-            'average_rank': round(sum([lb.rank for lb in leaderboards]) / max(leaderboards.count(), 1)),
+            'leaderboards': user_stats['leaderboards'],
+            'total_score': user_stats['total_score'],
+            'average_rank': user_stats['avg_rank'],
         }
         
         return Response(stats)
     
-    @action(detail=False, methods=['get'])
+    @action(detail=False, methods=['get'], url_path='top-by-field')
     def top_by_field(self, request):
         """
         Get top users for each field.
         
         Usage: GET /api/leaderboard/top-by-field/
-        """
-        limit = int(request.query_params.get('limit', 10))
-        
-        response_data = {}
-        for field_code, field_name in Leaderboard.FIELD_CHOICES:
-            top_users = Leaderboard.objects.filter(field=field_code).order_by('rank')[:limit]
-            response_data[field_code] = LeaderboardListSerializer(top_users, many=True).data
         
-        return Response(response_data)
+        Lists ranked entries by score; ``rank`` is the position in the list
+        (see leaderboard_topn). Served from the read model, or from one
+        ROW_NUMBER query when ``limit`` is larger than the model holds.
+        """
+        try:
+            limit = int(request.query_params.get('limit', 10))
+        except ValueError:
+            return Response(
+                {'error': 'limit must be an integer'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        # Bounded so the number of cached snapshots stays small.
+        limit = max(1, min(limit, TOP_BY_FIELD_MAX_LIMIT))
+
+        def build():
+            return LeaderboardService.get_top_by_field_rows(limit)
+
+        top = get_ranked_top(FIELD_CODES, limit)
+        if top is not None:
+            return Response(top)
+        return Response(get_or_build('top-by-field', FIELD_CODES, build, params=[limit]))
 
 
 class LeaderboardUpdateViewSet(viewsets.ReadOnlyModelViewSet):
@@ -191,18 +496,20 @@ class LeaderboardUpdateViewSet(viewsets.ReadOnlyModelViewSet):
     - GET /api/leaderboard-updates/user/{user_id}/ - Get updates for user
     """
     
-    queryset = LeaderboardUpdate.objects.all()
+    queryset = LeaderboardUpdate.objects.select_related('leaderboard__user', 'post')
     serializer_class = LeaderboardUpdateSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = LeaderboardUpdatePagination
     filter_backends = [filters.OrderingFilter]
     ordering = ['-created_at']
     
     @action(detail=False, methods=['get'])
     def user(self, request):
         """
-        Get leaderboard update history for a specific user.
+        Get leaderboard update history for a specific user, newest first.
         
         Usage: GET /api/leaderboard-updates/user/?user_id=1
+               then follow ``next`` (``?cursor=...``) for older updates
         """
         user_id = request.query_params.get('user_id', None)
         if not user_id:
@@ -211,11 +518,16 @@ class LeaderboardUpdateViewSet(viewsets.ReadOnlyModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        updates = LeaderboardUpdate.objects.filter(leaderboard__user_id=user_id)
+        updates = self.paginator.paginate_queryset(
+            LeaderboardUpdate.objects.filter(leaderboard__user_id=user_id)
+            .select_related('leaderboard__user', 'post'),
+            request
+        )
         serializer = self.get_serializer(updates, many=True)
         
         return Response({
             'user_id': user_id,
+            'next': self.paginator.get_next_link(),
             'updates': serializer.data
         })
     
@@ -225,9 +537,22 @@ class LeaderboardUpdateViewSet(viewsets.ReadOnlyModelViewSet):
         Get recent leaderboard updates across all users.
         
         Usage: GET /api/leaderboard-updates/recent/?limit=20
+        
+        Reads the newest rows off the (-created_at, -id) index, so the
+        cost depends on ``limit`` (at most 100), not on the table size.
         """
-        limit = int(request.query_params.get('limit', 20))
-        recent_updates = LeaderboardUpdate.objects.all()[:limit]
+        try:
+            limit = int(request.query_params.get('limit', 20))
+        except ValueError:
+            return Response(
+                {'error': 'limit must be an integer'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        limit = max(1, min(limit, RECENT_UPDATES_MAX_LIMIT))
+        recent_updates = list(
+            LeaderboardUpdate.objects.select_related('leaderboard__user', 'post')
+            .order_by('-created_at', '-id')[:limit]
+        )
         serializer = self.get_serializer(recent_updates, many=True)
         
         return Response({
@@ -0,0 +1,129 @@
+"""
+Rolling weekly/monthly leaderboard scores from daily score buckets.
+
+Every score change is also added to a LeaderboardScoreBucket for the day
+the engagement happened. ``Leaderboard.weekly_score``/``monthly_score``
+hold the sum of the buckets inside each window and are kept up to date
+incrementally:
+
+- writers add to the window columns whose window still contains the
+  bucket's day (see ``window_columns``);
+- ``roll_windows`` (``manage.py roll_leaderboard_windows``, run at least
+  daily) subtracts the buckets that have just left each window with one
+  set-based UPDATE, then prunes buckets no window needs any more.
+
+Nothing is ever reset wholesale, so the weekly leaderboard is always a
+true last-7-days ranking.
+"""
+
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from .leaderboard_models import Leaderboard, LeaderboardScoreBucket, LeaderboardWindow
+from .leaderboard_snapshots import bump_versions
+
+
+# period -> (score column, window length in days)
+WINDOWS = {
+    'weekly': ('weekly_score', 7),
+    'monthly': ('monthly_score', 30),
+}
+
+
+def bucket_day(occurred_at=None):
+    """Return the bucket day for an engagement timestamp (defaults to now)."""
+    return timezone.localdate(occurred_at) if occurred_at else timezone.localdate()
+
+
+def get_rolled_through(today=None):
+    """
+    Return ``{period: last day already expired from the window}``.
+
+    Windows that have never been rolled start at ``today - length``.
+    """
+    today = today or timezone.localdate()
+    rolled = dict(LeaderboardWindow.objects.values_list('period', 'rolled_through'))
+    return {
+        period: rolled.get(period, today - timedelta(days=length))
+        for period, (_, length) in WINDOWS.items()
+    }
+
+
+def window_columns(day, rolled_through):
+    """Return the window score columns that still include ``day``."""
+    return [
+        column for period, (column, _) in WINDOWS.items()
+        if day > rolled_through[period]
+    ]
+
+
+def add_to_bucket(leaderboard_id, day, amount):
+    """
+    Atomically add ``amount`` points to a leaderboard's bucket for ``day``.
+
+    Negative amounts floor at zero and never create a bucket.
+    """
+    buckets = LeaderboardScoreBucket.objects.filter(leaderboard_id=leaderboard_id, day=day)
+    if amount < 0:
+        buckets.update(score=Greatest(F('score') - (-amount), Value(0)))
+        return
+    if buckets.update(score=F('score') + amount):
+        return
+    LeaderboardScoreBucket.objects.bulk_create(
+        [LeaderboardScoreBucket(leaderboard_id=leaderboard_id, day=day)],
+        ignore_conflicts=True
+    )
+    buckets.update(score=F('score') + amount)
+
+
+def roll_windows(today=None):
+    """
+    Subtract buckets that have left each window and prune unused buckets.
+
+    Idempotent: running it twice on the same day is a no-op, and a missed
+    day is caught up on the next run.
+
+    Returns:
+        Dictionary of period -> number of leaderboard rows adjusted
+    """
+    today = today or timezone.localdate()
+    adjusted = {}
+
+    for period, (column, length) in WINDOWS.items():
+        expire_through = today - timedelta(days=length)
+        with transaction.atomic():
+            window, created = LeaderboardWindow.objects.select_for_update().get_or_create(
+                period=period,
+                defaults={'rolled_through': expire_through}
+            )
+            if created or window.rolled_through >= expire_through:
+                adjusted[period] = 0
+                continue
+
+            expiring = LeaderboardScoreBucket.objects.filter(
+                day__gt=window.rolled_through,
+                day__lte=expire_through
+            )
+            expired_total = (
+                expiring.filter(leaderboard=OuterRef('pk'))
+                .order_by()
+                .values('leaderboard')
+                .annotate(total=Sum('score'))
+                .values('total')
+            )
+            adjusted[period] = Leaderboard.objects.filter(
+                id__in=expiring.values('leaderboard_id')
+            ).update(**{column: Greatest(F(column) - Subquery(expired_total), Value(0))})
+
+            window.rolled_through = expire_through
+            window.save(update_fields=['rolled_through'])
+            if adjusted[period]:
+                bump_versions()
+
+    oldest_needed = min(get_rolled_through(today).values())
+    LeaderboardScoreBucket.objects.filter(day__lte=oldest_needed).delete()
+    return adjusted
@@ -0,0 +1,119 @@
+"""
+Benchmark the friends-only leaderboard query.
+
+Usage:
+    python manage.py bench_leaderboard_following
+    python manage.py bench_leaderboard_following --entries 50000 --follows 50 500 5000
+
+Builds one field with ``--entries`` ranked users and, for each follow-list
+size, a user following that many of them at random. Times
+``get_following_leaderboard`` and, for comparison, the top-N read forced
+through the score-ordered join and with the follow list passed as an
+``IN (...)`` list (the cached follow-set approach). Everything runs inside a transaction that is rolled back at
+the end.
+"""
+
+import random
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from engagement.leaderboard_following import (
+    FOLLOWING_COLUMNS,
+    followed_entries,
+    get_following_leaderboard,
+)
+from engagement.leaderboard_histogram import rebuild_histograms
+from engagement.leaderboard_models import Leaderboard
+from engagement.leaderboard_rows import fetch_rows
+from engagement.models import Follow
+
+User = get_user_model()
+
+BENCH_FIELD = 'other'
+INSERT_BATCH_SIZE = 5000
+
+
+class Command(BaseCommand):
+    help = 'Time the friends-only leaderboard for several follow-list sizes.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--entries', type=int, default=50_000, help='Ranked users in the field.')
+        parser.add_argument(
+            '--follows', type=int, nargs='+', default=[50, 500, 5000],
+            help='Follow-list sizes to benchmark.',
+        )
+        parser.add_argument('--limit', type=int, default=50)
+        parser.add_argument('--repeat', type=int, default=30)
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        limit = options['limit']
+        with transaction.atomic():
+            users = self._populate(options['entries'], rng)
+            rebuild_histograms([BENCH_FIELD])
+            with connection.cursor() as cursor:
+                # Planner statistics, as autovacuum keeps them on PostgreSQL.
+                cursor.execute('ANALYZE')
+            for size in options['follows']:
+                follower = User.objects.create(
+                    username=f'bench_follower_{size}', email=f'bench_follower_{size}@example.edu'
+                )
+                Follow.objects.bulk_create(
+                    [Follow(follower=follower, following=user) for user in rng.sample(users, size)],
+                    batch_size=INSERT_BATCH_SIZE
+                )
+                following_ids = list(
+                    Follow.objects.filter(follower=follower).values_list('following_id', flat=True)
+                )
+
+                endpoint = self._time(
+                    lambda: get_following_leaderboard(follower.id, BENCH_FIELD, limit),
+                    options['repeat']
+                )
+                join = self._time(
+                    lambda: fetch_rows(
+                        followed_entries(follower.id, BENCH_FIELD, score_order=True)
+                        .order_by('-score', 'id')[:limit],
+                        FOLLOWING_COLUMNS
+                    ),
+                    options['repeat']
+                )
+                cached = self._time(
+                    lambda: fetch_rows(
+                        Leaderboard.objects.filter(field=BENCH_FIELD, user_id__in=following_ids)
+                        .order_by('-score', 'id')[:limit],
+                        FOLLOWING_COLUMNS
+                    ),
+                    options['repeat']
+                )
+                self.stdout.write(
+                    f'{size:>6} follows  endpoint {endpoint:7.2f} ms  '
+                    f'top-N join form {join:7.2f} ms  top-N cached IN list {cached:7.2f} ms'
+                )
+            transaction.set_rollback(True)
+
+    @staticmethod
+    def _time(run, repeat):
+        run()  # warm up
+        started = time.perf_counter()
+        for _ in range(repeat):
+            run()
+        return (time.perf_counter() - started) / repeat * 1000
+
+    def _populate(self, entries, rng):
+        users = User.objects.bulk_create(
+            [
+                User(username=f'bench_followed_{i}', email=f'bench_followed_{i}@example.edu', password='!')
+                for i in range(entries)
+            ],
+            batch_size=INSERT_BATCH_SIZE
+        )
+        Leaderboard.objects.bulk_create(
+            [Leaderboard(user=user, field=BENCH_FIELD, score=rng.randint(0, 5000)) for user in users],
+            batch_size=INSERT_BATCH_SIZE
+        )
+        return users
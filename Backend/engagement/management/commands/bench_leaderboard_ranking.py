@@ -0,0 +1,96 @@
+"""
+Benchmark leaderboard rank recomputation strategies.
+
+Usage:
+    python manage.py bench_leaderboard_ranking
+    python manage.py bench_leaderboard_ranking --rows 10000 100000 --legacy-max 10000
+
+Everything runs inside a transaction that is rolled back at the end, so the
+synthetic users and leaderboard rows never persist.
+"""
+
+import random
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from engagement.leaderboard_models import Leaderboard
+from engagement.leaderboard_ranking import (
+    rank_fields_python,
+    rank_fields_sql,
+    supports_window_update,
+)
+
+User = get_user_model()
+
+BENCH_FIELD = 'other'
+INSERT_BATCH_SIZE = 5000
+
+
+def legacy_update_rankings(field):
+    """The original per-row loop, kept here only for comparison."""
+    leaderboards = Leaderboard.objects.filter(field=field).order_by('-score')
+    updated_count = 0
+    for rank, leaderboard in enumerate(leaderboards, start=1):
+        if leaderboard.rank != rank:
+            leaderboard.rank = rank
+            leaderboard.save(update_fields=['rank'])
+            updated_count += 1
+    return updated_count
+
+
+class Command(BaseCommand):
+    help = 'Benchmark per-row, bulk_update and window-function rank recomputation.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rows', type=int, nargs='+', default=[10_000, 100_000, 1_000_000],
+            help='Leaderboard rows per field to benchmark with.',
+        )
+        parser.add_argument(
+            '--legacy-max', type=int, default=100_000,
+            help='Skip the per-row loop above this many rows.',
+        )
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        strategies = [('per-row save', legacy_update_rankings), ('bulk_update', rank_fields_python)]
+        if supports_window_update():
+            strategies.append(('window UPDATE', rank_fields_sql))
+
+        for rows in options['rows']:
+            with transaction.atomic():
+                self._populate(rows, rng)
+                for name, strategy in strategies:
+                    if strategy is legacy_update_rankings and rows > options['legacy_max']:
+                        self.stdout.write(f'{rows:>9} rows  {name:<14} skipped')
+                        continue
+                    Leaderboard.objects.filter(field=BENCH_FIELD).update(rank=0)
+                    started = time.perf_counter()
+                    changed = strategy(BENCH_FIELD)
+                    elapsed = time.perf_counter() - started
+                    self.stdout.write(
+                        f'{rows:>9} rows  {name:<14} {elapsed:8.3f}s  ({changed} ranks written)'
+                    )
+                transaction.set_rollback(True)
+
+    def _populate(self, rows, rng):
+        Leaderboard.objects.filter(field=BENCH_FIELD).delete()
+        for start in range(0, rows, INSERT_BATCH_SIZE):
+            stop = min(start + INSERT_BATCH_SIZE, rows)
+            users = User.objects.bulk_create([
+                User(
+                    username=f'bench_rank_{i}',
+                    email=f'bench_rank_{i}@example.edu',
+                    password='!',
+                    field_of_interest=BENCH_FIELD,
+                )
+                for i in range(start, stop)
+            ])
+            Leaderboard.objects.bulk_create([
+                Leaderboard(user=user, field=BENCH_FIELD, score=rng.randint(0, rows // 10))
+                for user in users
+            ])
@@ -0,0 +1,88 @@
+"""
+Benchmark the values_list read path against the DRF serializers.
+
+Usage:
+    python manage.py bench_leaderboard_rows
+    python manage.py bench_leaderboard_rows --rows 50 500 --repeat 50
+
+For each list size, renders the same rows with LeaderboardSerializer /
+LeaderboardListSerializer / LeaderboardTimeSeriesSerializer (with the user
+joined via select_related, i.e. without the N+1) and with the matching
+shape from engagement/leaderboard_rows.py, and reports rows per second.
+Everything runs inside a transaction that is rolled back at the end.
+"""
+
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from engagement.leaderboard_models import Leaderboard
+from engagement.leaderboard_rows import (
+    DETAIL_COLUMNS,
+    LIST_COLUMNS,
+    TIME_SERIES_COLUMNS,
+    fetch_rows,
+)
+from engagement.leaderboard_serializers import (
+    LeaderboardListSerializer,
+    LeaderboardSerializer,
+    LeaderboardTimeSeriesSerializer,
+)
+
+User = get_user_model()
+
+BENCH_FIELD = 'other'
+
+SHAPES = [
+    ('detail', LeaderboardSerializer, DETAIL_COLUMNS),
+    ('list', LeaderboardListSerializer, LIST_COLUMNS),
+    ('time series', LeaderboardTimeSeriesSerializer, TIME_SERIES_COLUMNS),
+]
+
+
+class Command(BaseCommand):
+    help = 'Compare rows/sec of ModelSerializer and values_list rendering for leaderboard lists.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rows', type=int, nargs='+', default=[50, 500],
+            help='List sizes to benchmark.',
+        )
+        parser.add_argument('--repeat', type=int, default=20, help='Renders per measurement.')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self._populate(max(options['rows']))
+            for rows in options['rows']:
+                queryset = Leaderboard.objects.filter(field=BENCH_FIELD).order_by('-score', 'id')[:rows]
+                for name, serializer_class, columns in SHAPES:
+                    serialized = self._rate(
+                        lambda: serializer_class(queryset.select_related('user'), many=True).data,
+                        rows, options['repeat']
+                    )
+                    flat = self._rate(lambda: fetch_rows(queryset, columns), rows, options['repeat'])
+                    self.stdout.write(
+                        f'{rows:>5} rows  {name:<12} serializer {serialized:>9,.0f} rows/s  '
+                        f'values_list {flat:>9,.0f} rows/s  ({flat / serialized:.1f}x)'
+                    )
+            transaction.set_rollback(True)
+
+    @staticmethod
+    def _rate(render, rows, repeat):
+        render()  # warm up
+        started = time.perf_counter()
+        for _ in range(repeat):
+            render()
+        return rows * repeat / (time.perf_counter() - started)
+
+    def _populate(self, rows):
+        users = User.objects.bulk_create([
+            User(username=f'bench_rows_{i}', email=f'bench_rows_{i}@example.edu', password='!')
+            for i in range(rows)
+        ])
+        Leaderboard.objects.bulk_create([
+            Leaderboard(user=user, field=BENCH_FIELD, score=i, rank=rows - i)
+            for i, user in enumerate(users)
+        ])
@@ -0,0 +1,105 @@
+"""
+Benchmark the per-process top-N read model (engagement/leaderboard_topn.py).
+
+Usage:
+    python manage.py bench_leaderboard_topn
+    python manage.py bench_leaderboard_topn --users 20000 --top-n 100 --repeat 200
+
+Fills every field with ``--users`` entries, then reports:
+
+- refresh cost: reloading all fields (one query) and a single field;
+- memory held by the loaded tables (deep size, and the tracemalloc total
+  allocated by a load);
+- top-by-field reads at limit 10 and N, served from the read model, from
+  the cached snapshot payload and straight from the database.
+
+Everything runs inside a transaction that is rolled back at the end.
+"""
+
+import random
+import time
+import tracemalloc
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from engagement.leaderboard_models import Leaderboard
+from engagement.leaderboard_service import LeaderboardService
+from engagement.leaderboard_snapshots import FIELD_CODES, get_or_build, get_versions
+from engagement.leaderboard_topn import TopNReadModel
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Measure refresh cost, memory and read latency of the top-N read model.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10000, help='Entries per field.')
+        parser.add_argument('--top-n', type=int, default=100, help='Entries kept per field.')
+        parser.add_argument('--repeat', type=int, default=100, help='Runs per measurement.')
+
+    def handle(self, *args, **options):
+        top_n, repeat = options['top_n'], options['repeat']
+        with transaction.atomic():
+            self._populate(options['users'])
+            model = TopNReadModel(top_n)
+            versions = get_versions(FIELD_CODES)
+
+            full = self._time(lambda: model.load(FIELD_CODES, versions), repeat)
+            single = self._time(lambda: model.load(FIELD_CODES[:1], versions), repeat)
+            self.stdout.write(
+                f'refresh  all {len(FIELD_CODES)} fields {full:8.2f} ms   one field {single:8.2f} ms'
+            )
+
+            tracemalloc.start()
+            fresh = TopNReadModel(top_n)
+            before = tracemalloc.get_traced_memory()[0]
+            fresh.load(FIELD_CODES, versions)
+            allocated = tracemalloc.get_traced_memory()[0] - before
+            tracemalloc.stop()
+            held = fresh.memory_bytes()
+            self.stdout.write(
+                f'memory   {held / 1024:8.1f} KB held ({held / 1024 / len(FIELD_CODES):.1f} KB/field, '
+                f'{held / len(FIELD_CODES) / (top_n + 1):.0f} B/entry), '
+                f'{allocated / 1024:.1f} KB allocated by a load'
+            )
+
+            for limit in sorted({10, top_n}):
+                served = self._time(lambda: fresh.top(FIELD_CODES, limit), repeat)
+                def build(limit=limit):
+                    return LeaderboardService.get_top_by_field_rows(limit)
+
+                get_or_build('top-by-field', FIELD_CODES, build, params=[limit])
+                snapshot = self._time(
+                    lambda: get_or_build('top-by-field', FIELD_CODES, build, params=[limit]), repeat
+                )
+                database = self._time(build, repeat)
+                self.stdout.write(
+                    f'top-by-field limit={limit:<4} read model {served:7.3f} ms   '
+                    f'snapshot {snapshot:7.3f} ms   database {database:7.3f} ms'
+                )
+            cache.delete_many([f'leaderboard:snapshot:top-by-field:all:{limit}' for limit in (10, top_n)])
+            transaction.set_rollback(True)
+
+    @staticmethod
+    def _time(run, repeat):
+        run()  # warm up
+        started = time.perf_counter()
+        for _ in range(repeat):
+            run()
+        return (time.perf_counter() - started) * 1000 / repeat
+
+    def _populate(self, users):
+        rng = random.Random(0)
+        created = User.objects.bulk_create([
+            User(username=f'bench_topn_{i}', email=f'bench_topn_{i}@example.edu', password='!')
+            for i in range(users)
+        ])
+        Leaderboard.objects.bulk_create([
+            Leaderboard(user=user, field=field, score=rng.randrange(10000))
+            for field in FIELD_CODES
+            for user in created
+        ], batch_size=5000)
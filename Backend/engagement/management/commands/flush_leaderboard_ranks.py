@@ -0,0 +1,40 @@
+"""
+Re-rank leaderboard fields that were marked dirty by the write path.
+
+Usage:
+    python manage.py flush_leaderboard_ranks            # one pass
+    python manage.py flush_leaderboard_ranks --loop     # run until stopped
+    python manage.py flush_leaderboard_ranks --force    # ignore the debounce window
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from engagement.leaderboard_refresh import flush_dirty_fields, get_debounce_seconds
+
+
+class Command(BaseCommand):
+    help = 'Re-rank dirty leaderboard fields at most once per debounce window.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true', help='Keep flushing until interrupted.')
+        parser.add_argument(
+            '--interval', type=float, default=None,
+            help='Seconds between passes in --loop mode (defaults to the debounce window).',
+        )
+        parser.add_argument('--force', action='store_true', help='Re-rank even if ranked recently.')
+
+    def handle(self, *args, **options):
+        interval = options['interval'] or get_debounce_seconds()
+
+        while True:
+            flushed = flush_dirty_fields(force=options['force'])
+            if flushed:
+                self.stdout.write(f"Re-ranked: {', '.join(flushed)}")
+            if not options['loop']:
+                break
+            try:
+                time.sleep(interval)
+            except KeyboardInterrupt:
+                break
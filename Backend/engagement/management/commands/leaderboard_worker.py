@@ -0,0 +1,61 @@
+"""
+Apply pending leaderboard score changes from the outbox.
+
+Usage:
+    python manage.py leaderboard_worker                 # drain once and exit
+    python manage.py leaderboard_worker --loop          # keep polling
+    python manage.py leaderboard_worker --loop --batch-size 1000 --sleep 0.5
+
+Safe to run several copies at once; see engagement/leaderboard_outbox.py.
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from engagement.leaderboard_outbox import (
+    DEFAULT_BATCH_SIZE,
+    DEFAULT_LEASE_SECONDS,
+    default_worker_id,
+    drain_batch,
+)
+
+
+class Command(BaseCommand):
+    help = 'Drain the leaderboard outbox: apply score deltas and re-rank.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true', help='Keep polling until interrupted.')
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+        parser.add_argument(
+            '--sleep', type=float, default=1.0,
+            help='Seconds to wait when the outbox is empty in --loop mode.',
+        )
+        parser.add_argument(
+            '--lease-seconds', type=int, default=DEFAULT_LEASE_SECONDS,
+            help='How long a claimed batch is reserved on backends without SKIP LOCKED.',
+        )
+
+    def handle(self, *args, **options):
+        worker_id = default_worker_id()
+        total = 0
+
+        try:
+            while True:
+                close_old_connections()
+                try:
+                    processed = drain_batch(worker_id, options['batch_size'], options['lease_seconds'])
+                except Exception as e:
+                    self.stderr.write(f"Error applying outbox batch: {str(e)}")
+                    processed = 0
+                total += processed
+                if processed:
+                    continue
+                if not options['loop']:
+                    break
+                time.sleep(options['sleep'])
+        except KeyboardInterrupt:
+            pass
+
+        self.stdout.write(f"Applied {total} leaderboard outbox entries")
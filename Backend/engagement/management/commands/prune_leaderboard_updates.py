@@ -0,0 +1,32 @@
+"""
+Fold old LeaderboardUpdate rows into daily summaries and delete them.
+
+Usage:
+    python manage.py prune_leaderboard_updates --older-than 90
+    python manage.py prune_leaderboard_updates --older-than 30 --batch-size 2000
+
+Run daily (e.g. from cron). Each batch is its own short transaction, so it
+can run next to normal traffic and be interrupted and restarted safely.
+Run one copy at a time.
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from engagement.leaderboard_audit import PRUNE_BATCH_SIZE, prune_updates
+
+
+class Command(BaseCommand):
+    help = 'Summarize leaderboard updates older than N days per entry and day, then delete them.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--older-than', type=int, required=True, metavar='DAYS',
+            help='Prune updates created more than this many days ago.',
+        )
+        parser.add_argument('--batch-size', type=int, default=PRUNE_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        if options['older_than'] < 0 or options['batch_size'] < 1:
+            raise CommandError('--older-than must be >= 0 and --batch-size >= 1')
+        deleted = prune_updates(options['older_than'], options['batch_size'])
+        self.stdout.write(f"Pruned {deleted} leaderboard updates")
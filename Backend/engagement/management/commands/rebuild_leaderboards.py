@@ -0,0 +1,50 @@
+"""
+Rebuild leaderboard counters from Like, Comment and Follow.
+
+Usage:
+    python manage.py rebuild_leaderboards                    # every field
+    python manage.py rebuild_leaderboards --field music --field art
+    python manage.py rebuild_leaderboards --dry-run          # report drift only
+    python manage.py rebuild_leaderboards --workers 4
+
+Stop ``leaderboard_worker`` while rebuilding; see
+engagement/leaderboard_rebuild.py.
+"""
+
+from django.core.management.base import BaseCommand
+
+from engagement.leaderboard_rebuild import CHUNK_SIZE, rebuild_leaderboards
+
+
+class Command(BaseCommand):
+    help = 'Recompute leaderboard counters from engagement tables and re-rank.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--field', action='append', dest='fields',
+            help='Field to rebuild (repeatable). Defaults to every field.',
+        )
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Report rows that would change without writing them.',
+        )
+        parser.add_argument('--workers', type=int, default=1, help='Number of worker processes.')
+        parser.add_argument(
+            '--chunk-size', type=int, default=CHUNK_SIZE,
+            help='Number of user ids processed per chunk.',
+        )
+
+    def handle(self, *args, **options):
+        results = rebuild_leaderboards(
+            fields=options['fields'],
+            dry_run=options['dry_run'],
+            workers=max(1, options['workers']),
+            chunk_size=options['chunk_size'],
+        )
+
+        prefix = '[dry run] ' if options['dry_run'] else ''
+        for result in results:
+            self.stdout.write(
+                f"{prefix}{result['field']}: checked {result['checked']}, "
+                f"updated {result['updated']}, created {result['created']}"
+            )
@@ -0,0 +1,26 @@
+"""
+Recompute the overall (cross-field) leaderboard from the Leaderboard table.
+
+Usage:
+    python manage.py rebuild_overall_leaderboard
+
+The overall leaderboard is kept up to date as scores change; run this once
+after deploying it, or after changing scores outside LeaderboardService.
+``rebuild_leaderboards`` and ``rescore_leaderboards`` already do this.
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from engagement.leaderboard_overall import rebuild_overall
+
+
+class Command(BaseCommand):
+    help = 'Recompute overall leaderboard scores and ranks from the Leaderboard table.'
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        written = rebuild_overall()
+        elapsed = time.perf_counter() - started
+        self.stdout.write(f"Wrote {written} overall leaderboard rows in {elapsed:.2f}s")
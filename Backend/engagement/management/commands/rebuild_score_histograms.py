@@ -0,0 +1,31 @@
+"""
+Recompute the per-field score histograms used for percentile lookups.
+
+Usage:
+    python manage.py rebuild_score_histograms
+    python manage.py rebuild_score_histograms --field sports
+
+Histograms are kept up to date as scores change; run this once after
+deploying them, or after changing scores outside LeaderboardService.
+``rebuild_leaderboards`` already does this for the fields it rebuilds.
+"""
+
+from django.core.management.base import BaseCommand
+
+from engagement.leaderboard_histogram import rebuild_histograms
+from engagement.leaderboard_snapshots import FIELD_CODES
+
+
+class Command(BaseCommand):
+    help = 'Recompute leaderboard score histograms from the Leaderboard table.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--field', action='append', dest='fields',
+            help='Field to rebuild (repeatable; default: all fields).',
+        )
+
+    def handle(self, *args, **options):
+        fields = options['fields'] or FIELD_CODES
+        written = rebuild_histograms(fields)
+        self.stdout.write(f"Wrote {written} histogram buckets for {len(fields)} fields")
@@ -0,0 +1,62 @@
+"""
+Apply the current scoring weights to every stored leaderboard score.
+
+Usage:
+    python manage.py rescore_leaderboards
+    python manage.py rescore_leaderboards --like 2 --comment 1 --follow 3 --note "Favour likes"
+    python manage.py rescore_leaderboards --field sports --batch-size 100000
+
+Passing any weight first saves a new ScoringConfig version (unspecified
+weights keep their current value). Rows are rescored with set-based
+UPDATEs, then re-ranked. UserFieldRanking picks up new weights on the
+next ``calculate_rankings`` run.
+
+Workers switch to a new version on their next batch, but a batch already
+in flight when the weights change can still commit with the old ones.
+Re-run the command once the outbox has drained to correct those rows; it
+only writes rows whose score is still off.
+"""
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from engagement.leaderboard_scoring import (
+    RESCORE_BATCH_SIZE,
+    get_version,
+    get_weights,
+    rescore,
+    set_weights,
+)
+
+
+class Command(BaseCommand):
+    help = 'Recompute leaderboard scores from the counters with the current (or new) weights.'
+
+    def add_arguments(self, parser):
+        for kind in ('like', 'comment', 'follow'):
+            parser.add_argument(f'--{kind}', type=int, help=f'New {kind} weight.')
+        parser.add_argument('--note', default='', help='Reason for the weight change.')
+        parser.add_argument(
+            '--field', action='append', dest='fields',
+            help='Field to rescore (repeatable; default: all fields).',
+        )
+        parser.add_argument('--batch-size', type=int, default=RESCORE_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        new = {kind: options[kind] for kind in ('like', 'comment', 'follow') if options[kind] is not None}
+        if any(weight < 0 for weight in new.values()):
+            raise CommandError('Weights must not be negative')
+        if new:
+            weights = {**get_weights(), **new}
+            set_weights(weights['like'], weights['comment'], weights['follow'], note=options['note'])
+
+        started = time.perf_counter()
+        changed = rescore(options['fields'], options['batch_size'])
+        elapsed = time.perf_counter() - started
+
+        weights = get_weights()
+        self.stdout.write(
+            f"Scoring v{get_version() or 0} (like={weights['like']} comment={weights['comment']} "
+            f"follow={weights['follow']}): rescored {changed} rows in {elapsed:.2f}s"
+        )
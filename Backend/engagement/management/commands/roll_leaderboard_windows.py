@@ -0,0 +1,22 @@
+"""
+Advance the rolling weekly/monthly leaderboard windows.
+
+Usage:
+    python manage.py roll_leaderboard_windows
+
+Run at least once a day (e.g. from cron shortly after midnight UTC).
+Safe to run more often; missed days are caught up on the next run.
+"""
+
+from django.core.management.base import BaseCommand
+
+from engagement.leaderboard_windows import roll_windows
+
+
+class Command(BaseCommand):
+    help = 'Subtract expired daily score buckets from weekly/monthly leaderboard scores.'
+
+    def handle(self, *args, **options):
+        adjusted = roll_windows()
+        for period, count in adjusted.items():
+            self.stdout.write(f"{period}: adjusted {count} leaderboard rows")
@@ -0,0 +1,36 @@
+"""
+Record today's leaderboard ranks for the rank history charts.
+
+Usage:
+    python manage.py snapshot_leaderboard_ranks
+    python manage.py snapshot_leaderboard_ranks --day 2025-11-20
+
+Run once a day (e.g. from cron after roll_leaderboard_windows). Re-running
+on the same day overwrites that day's snapshot.
+"""
+
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from engagement.leaderboard_history import snapshot_ranks
+
+
+class Command(BaseCommand):
+    help = 'Store each leaderboard entry\'s current rank and score as a daily snapshot.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--day',
+            help='Snapshot day as YYYY-MM-DD (default: today).',
+        )
+
+    def handle(self, *args, **options):
+        day = None
+        if options['day']:
+            try:
+                day = date.fromisoformat(options['day'])
+            except ValueError:
+                raise CommandError('--day must be a date in YYYY-MM-DD format')
+        written = snapshot_ranks(day)
+        self.stdout.write(f"Wrote {written} rank history rows")
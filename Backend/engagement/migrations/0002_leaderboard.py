@@ -0,0 +1,72 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:04
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('engagement', '0001_initial'),
+        ('posts', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Leaderboard',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('field', models.CharField(choices=[('academics', 'Academics'), ('sports', 'Sports'), ('music', 'Music'), ('dance', 'Dance'), ('art', 'Art'), ('technology', 'Technology'), ('leadership', 'Leadership'), ('other', 'Other')], max_length=50)),
+                ('score', models.PositiveIntegerField(default=0)),
+                ('rank', models.PositiveIntegerField(default=0)),
+                ('weekly_score', models.PositiveIntegerField(default=0)),
+                ('monthly_score', models.PositiveIntegerField(default=0)),
+                ('all_time_score', models.PositiveIntegerField(default=0)),
+                ('total_likes', models.PositiveIntegerField(default=0)),
+                ('total_comments', models.PositiveIntegerField(default=0)),
+                ('total_follows', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('weekly_reset_at', models.DateTimeField(blank=True, null=True)),
+                ('monthly_reset_at', models.DateTimeField(blank=True, null=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='leaderboards', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-score'],
+            },
+        ),
+        migrations.CreateModel(
+            name='LeaderboardUpdate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('previous_rank', models.PositiveIntegerField(blank=True, null=True)),
+                ('new_rank', models.PositiveIntegerField(blank=True, null=True)),
+                ('score_change', models.IntegerField(default=0)),
+                ('reason', models.CharField(choices=[('like', 'Like on Post'), ('comment', 'Comment on Post'), ('follow', 'User Followed'), ('manual', 'Manual Adjustment')], max_length=20)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('leaderboard', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='updates', to='engagement.leaderboard')),
+                ('post', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='leaderboard_updates', to='posts.post')),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='leaderboard',
+            index=models.Index(fields=['field', '-score'], name='engagement__field_c5f7de_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='leaderboard',
+            index=models.Index(fields=['user', 'field'], name='engagement__user_id_c7c0dd_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='leaderboard',
+            unique_together={('user', 'field')},
+        ),
+        migrations.AddIndex(
+            model_name='leaderboardupdate',
+            index=models.Index(fields=['leaderboard', '-created_at'], name='engagement__leaderb_c2d967_idx'),
+        ),
+    ]
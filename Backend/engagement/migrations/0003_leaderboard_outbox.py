@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('engagement', '0002_leaderboard'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LeaderboardOutbox',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('like', 'Like on Post'), ('comment', 'Comment on Post'), ('follow', 'User Followed')], max_length=20)),
+                ('user_id', models.BigIntegerField()),
+                ('field', models.CharField(choices=[('academics', 'Academics'), ('sports', 'Sports'), ('music', 'Music'), ('dance', 'Dance'), ('art', 'Art'), ('technology', 'Technology'), ('leadership', 'Leadership'), ('other', 'Other')], max_length=50)),
+                ('delta', models.IntegerField(default=1)),
+                ('post_id', models.BigIntegerField(blank=True, null=True)),
+                ('locked_by', models.CharField(blank=True, default='', max_length=64)),
+                ('locked_until', models.DateTimeField(blank=True, null=True)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['id'],
+                'indexes': [models.Index(fields=['locked_until', 'id'], name='engagement__locked__d7c965_idx')],
+            },
+        ),
+    ]
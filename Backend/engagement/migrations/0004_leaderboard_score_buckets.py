@@ -0,0 +1,101 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:17
+
+import django.db.models.deletion
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def seed_score_buckets(apps, schema_editor):
+    """
+    Give existing weekly/monthly counters a bucket each so the new rolling
+    windows start from today's totals: the weekly score lands in today's
+    bucket, the monthly remainder in a bucket just outside the weekly window.
+    """
+    Leaderboard = apps.get_model('engagement', 'Leaderboard')
+    LeaderboardScoreBucket = apps.get_model('engagement', 'LeaderboardScoreBucket')
+    LeaderboardWindow = apps.get_model('engagement', 'LeaderboardWindow')
+
+    today = timezone.localdate()
+    LeaderboardWindow.objects.create(period='weekly', rolled_through=today - timedelta(days=7))
+    LeaderboardWindow.objects.create(period='monthly', rolled_through=today - timedelta(days=30))
+
+    buckets = []
+    rows = Leaderboard.objects.filter(models.Q(weekly_score__gt=0) | models.Q(monthly_score__gt=0))
+    for leaderboard_id, weekly, monthly in rows.values_list('id', 'weekly_score', 'monthly_score').iterator():
+        if weekly:
+            buckets.append(LeaderboardScoreBucket(leaderboard_id=leaderboard_id, day=today, score=weekly))
+        if monthly > weekly:
+            buckets.append(LeaderboardScoreBucket(
+                leaderboard_id=leaderboard_id,
+                day=today - timedelta(days=7),
+                score=monthly - weekly
+            ))
+    LeaderboardScoreBucket.objects.bulk_create(buckets, batch_size=1000)
+    Leaderboard.objects.filter(weekly_score__gt=models.F('monthly_score')).update(
+        monthly_score=models.F('weekly_score')
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('engagement', '0003_leaderboard_outbox'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LeaderboardScoreBucket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('score', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='LeaderboardWindow',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period', models.CharField(max_length=20, unique=True)),
+                ('rolled_through', models.DateField()),
+            ],
+        ),
+        migrations.AddField(
+            model_name='leaderboardoutbox',
+            name='occurred_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='leaderboard',
+            index=models.Index(fields=['field', '-weekly_score'], name='engagement__field_fd0e06_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='leaderboard',
+            index=models.Index(fields=['field', '-monthly_score'], name='engagement__field_77f0d7_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='leaderboard',
+            index=models.Index(fields=['-weekly_score'], name='engagement__weekly__41fcbd_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='leaderboard',
+            index=models.Index(fields=['-monthly_score'], name='engagement__monthly_9b74b8_idx'),
+        ),
+        migrations.AddField(
+            model_name='leaderboardscorebucket',
+            name='leaderboard',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='score_buckets', to='engagement.leaderboard'),
+        ),
+        migrations.AddIndex(
+            model_name='leaderboardscorebucket',
+            index=models.Index(fields=['day'], name='engagement__day_23d170_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='leaderboardscorebucket',
+            unique_together={('leaderboard', 'day')},
+        ),
+        migrations.RunPython(seed_score_buckets, migrations.RunPython.noop),
+    ]
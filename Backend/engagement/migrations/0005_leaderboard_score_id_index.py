@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:24
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('engagement', '0004_leaderboard_score_buckets'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='leaderboard',
+            name='engagement__field_c5f7de_idx',
+        ),
+        migrations.AddIndex(
+            model_name='leaderboard',
+            index=models.Index(fields=['field', '-score', 'id'], name='engagement__field_452dbc_idx'),
+        ),
+    ]
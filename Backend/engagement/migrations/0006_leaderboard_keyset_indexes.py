@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:26
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('engagement', '0005_leaderboard_score_id_index'),
+        ('posts', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='leaderboard',
+            index=models.Index(fields=['-score', 'id'], name='engagement__score_65ecee_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='leaderboardupdate',
+            index=models.Index(fields=['-created_at', '-id'], name='engagement__created_68d538_idx'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:47
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('engagement', '0006_leaderboard_keyset_indexes'),
+        ('posts', '0002_post_change_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['created_at'], name='engagement__created_2bb0c4_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='like',
+            index=models.Index(fields=['created_at'], name='engagement__created_b19b20_idx'),
+        ),
+    ]
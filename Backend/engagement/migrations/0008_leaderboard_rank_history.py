@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:53
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('engagement', '0007_engagement_created_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LeaderboardRankHistory',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('field', models.CharField(choices=[('academics', 'Academics'), ('sports', 'Sports'), ('music', 'Music'), ('dance', 'Dance'), ('art', 'Art'), ('technology', 'Technology'), ('leadership', 'Leadership'), ('other', 'Other')], max_length=50)),
+                ('day', models.DateField()),
+                ('rank', models.PositiveIntegerField()),
+                ('score', models.PositiveIntegerField()),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='leaderboard_history', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['day'], name='engagement__day_776e6b_idx')],
+                'unique_together': {('user', 'field', 'day')},
+            },
+        ),
+    ]
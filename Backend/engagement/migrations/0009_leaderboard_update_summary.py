@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:56
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('engagement', '0008_leaderboard_rank_history'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LeaderboardUpdateSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('update_count', models.PositiveIntegerField(default=0)),
+                ('score_change', models.IntegerField(default=0)),
+                ('best_rank', models.PositiveIntegerField(blank=True, null=True)),
+                ('worst_rank', models.PositiveIntegerField(blank=True, null=True)),
+                ('leaderboard', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='update_summaries', to='engagement.leaderboard')),
+            ],
+            options={
+                'unique_together': {('leaderboard', 'day')},
+            },
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('engagement', '0009_leaderboard_update_summary'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LeaderboardHistogram',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('field', models.CharField(choices=[('academics', 'Academics'), ('sports', 'Sports'), ('music', 'Music'), ('dance', 'Dance'), ('art', 'Art'), ('technology', 'Technology'), ('leadership', 'Leadership'), ('other', 'Other')], max_length=50)),
+                ('bucket', models.PositiveIntegerField()),
+                ('count', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'unique_together': {('field', 'bucket')},
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 21:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('engagement', '0013_overall_leaderboard'),
+        ('posts', '0002_post_change_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='leaderboardupdate',
+            index=models.Index(condition=models.Q(('new_rank__isnull', True)), fields=['leaderboard'], name='lb_update_rank_pending'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 21:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('engagement', '0014_leaderboard_update_rank_pending'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='leaderboardoutbox',
+            name='dead_lettered_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -186,7 +186,7 @@ export const engagementAPI = {
 export const leaderboardAPI = {
   // Get leaderboard by field and time period
   getLeaderboard: (field: string = 'academics', timePeriod: string = 'ALL_TIME') =>
-    api.get('/leaderboard/', { params: { field, time_period: timePeriod } }),
+    api.get('/rankings/', { params: { field, time_period: timePeriod } }),
 
   // Get user rankings
   getUserRankings: (userId: number) =>